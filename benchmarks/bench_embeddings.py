@@ -0,0 +1,72 @@
+"""Benchmark dos métodos de projeção: tempo e trustworthiness por base.
+
+Usa a mesma preparação de features do app (top placas, features candidatas,
+sem linhas inválidas nem colunas constantes, StandardScaler).
+
+Uso:
+    python benchmarks/bench_embeddings.py
+    python benchmarks/bench_embeddings.py --sample-size 20000 --methods pca fft_tsne
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(ROOT, 'data', 'processed')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from sklearn.manifold import trustworthiness  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+from smartdrive.embeddings import available_methods, compute_embedding  # noqa: E402
+from smartdrive.features import TSNE_CANDIDATE_FEATURES  # noqa: E402
+from smartdrive.loader import read_trips  # noqa: E402
+from smartdrive.mappings import file_options, file_to_operation, plate_to_model_by_operation  # noqa: E402
+
+
+def load_features(dataset, sample_size, random_state):
+    """Matriz normalizada das top placas da base, como em run_tsne"""
+    folder_to_operation = {file_options[name]: op for name, op in file_to_operation.items()}
+    plates = list(plate_to_model_by_operation[folder_to_operation[dataset]].keys())
+
+    df = read_trips(os.path.join(DATA_PATH, dataset), plates=plates)
+    if len(df) > sample_size:
+        df = df.sample(sample_size, random_state=random_state)
+
+    features = df[[col for col in TSNE_CANDIDATE_FEATURES if col in df.columns]]
+    features = features.replace([np.inf, -np.inf], np.nan).dropna()
+    features = features.loc[:, features.nunique() > 1]
+    return StandardScaler().fit_transform(features.to_numpy(dtype=float))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--datasets', nargs='+', default=list(file_options.values()))
+    parser.add_argument('--methods', nargs='+', default=available_methods())
+    parser.add_argument('--sample-size', type=int, default=5000)
+    parser.add_argument('--random-state', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'base':<24} {'método':<10} {'n':>6} {'tempo (s)':>10} {'trustworthiness':>16}")
+    for dataset in args.datasets:
+        if not os.path.isdir(os.path.join(DATA_PATH, dataset)):
+            print(f"{dataset:<24} (pasta não encontrada)")
+            continue
+
+        features = load_features(dataset, args.sample_size, args.random_state)
+        n_samples = features.shape[0]
+        perplexity = max(1, min(30, max(5, n_samples // 3), n_samples - 1))
+
+        for method in args.methods:
+            start = time.perf_counter()
+            embedding = compute_embedding(features, method, perplexity, args.random_state)
+            elapsed = time.perf_counter() - start
+            score = trustworthiness(features, embedding, n_neighbors=10)
+            print(f"{dataset:<24} {method:<10} {n_samples:>6} {elapsed:>10.2f} {score:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
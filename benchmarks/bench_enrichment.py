@@ -0,0 +1,113 @@
+"""Benchmark do enriquecimento colunar vs. as funções linha a linha.
+
+Antes de medir, confere se ``enrich_trips`` produz exatamente as mesmas
+colunas que o caminho antigo (``apply`` por linha) numa amostra sintética.
+
+Uso:
+    python benchmarks/bench_enrichment.py
+    python benchmarks/bench_enrichment.py --sizes 100000 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from smartdrive.enrichment import (  # noqa: E402
+    CRITICAL_EVENT_COLUMNS,
+    TIME_EVENT_COLUMNS,
+    classify_fuel_efficiency,
+    classify_vehicle_type,
+    enrich_trips,
+    get_expected_consumption,
+    identify_dominant_event_from_columns,
+)
+from smartdrive.mappings import plate_to_vehicle_info  # noqa: E402
+
+
+def make_trips(n_rows, seed=0):
+    """Gera viagens sintéticas com as colunas usadas pelo enriquecimento"""
+    rng = np.random.default_rng(seed)
+
+    # Placas conhecidas e desconhecidas
+    plates = list(plate_to_vehicle_info.keys()) + ['XXX0000', 'YYY1111']
+    plate_codes = rng.integers(0, len(plates), n_rows)
+    plate = pd.Categorical.from_codes(plate_codes, categories=plates)
+
+    efficiency = rng.gamma(2.0, 2.0, n_rows).astype('float32')
+    efficiency[rng.random(n_rows) < 0.02] = np.nan
+    efficiency[rng.random(n_rows) < 0.02] = 0.0
+
+    data = {'plate': plate, 'fuel_efficiency': efficiency}
+    for column in TIME_EVENT_COLUMNS.values():
+        values = rng.integers(0, 600, n_rows).astype('int32')
+        values[rng.random(n_rows) < 0.3] = 0
+        data[column] = values
+    for column in CRITICAL_EVENT_COLUMNS:
+        values = np.zeros(n_rows, dtype='int32')
+        hits = rng.random(n_rows) < 0.05
+        values[hits] = rng.integers(1, 4, hits.sum())
+        data[column] = values
+
+    return pd.DataFrame(data)
+
+
+def enrich_rowwise(df):
+    """Caminho antigo: Series.apply e DataFrame.apply(axis=1)"""
+    df['vehicle_type'] = df['plate'].apply(classify_vehicle_type).astype(object)
+    df['expected_consumption'] = df['plate'].apply(get_expected_consumption).astype(float)
+    df['efficiency_class'] = df.apply(
+        lambda row: classify_fuel_efficiency(row['fuel_efficiency'], row['expected_consumption']),
+        axis=1
+    )
+    df['dominant_event'] = df.apply(identify_dominant_event_from_columns, axis=1)
+    return df
+
+
+def check_parity(n_rows=20000):
+    """Compara as colunas geradas pelos dois caminhos"""
+    expected = enrich_rowwise(make_trips(n_rows, seed=1))
+    actual = enrich_trips(make_trips(n_rows, seed=1))
+
+    for column in ['vehicle_type', 'expected_consumption', 'efficiency_class', 'dominant_event']:
+        pd.testing.assert_series_equal(
+            actual[column], expected[column], check_dtype=False, check_categorical=False
+        )
+    print(f"✅ Paridade conferida em {n_rows} linhas")
+
+
+def bench(n_rows, rowwise_limit):
+    df = make_trips(n_rows)
+
+    start = time.perf_counter()
+    enrich_trips(df.copy())
+    vectorized = time.perf_counter() - start
+    line = f"{n_rows:>12,} linhas | colunar: {vectorized:8.3f}s ({n_rows / vectorized:>14,.0f} linhas/s)"
+
+    if n_rows <= rowwise_limit:
+        start = time.perf_counter()
+        enrich_rowwise(df.copy())
+        rowwise = time.perf_counter() - start
+        line += f" | apply: {rowwise:8.3f}s ({n_rows / rowwise:>10,.0f} linhas/s, {rowwise / vectorized:.0f}x)"
+
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--rowwise-limit', type=int, default=100_000,
+                        help='Maior tamanho em que o caminho linha a linha também é medido')
+    args = parser.parse_args()
+
+    check_parity()
+    for n_rows in args.sizes:
+        bench(n_rows, args.rowwise_limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark dos filtros da barra lateral: cópia + refatiamento vs. FilterIndex.
+
+Confere primeiro se o índice seleciona exatamente as mesmas viagens que a
+lógica antiga de filtros e depois mede a latência e o pico de memória
+alocada por mudança de filtro.
+
+Uso:
+    python benchmarks/bench_filters.py
+    python benchmarks/bench_filters.py --rows 5000000 --reruns 20
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_panels import apply_filters, make_fleet, random_filters  # noqa: E402
+from smartdrive.filter_index import FilterIndex  # noqa: E402
+
+
+def check_parity(df_all, index, filter_sets):
+    for filters in filter_sets:
+        expected = apply_filters(df_all, *filters).index.to_numpy()
+        actual = df_all.index.to_numpy()[index.select(*filters)]
+        assert np.array_equal(actual, expected), filters
+    print(f"✅ Paridade conferida em {len(filter_sets)} combinações de filtros")
+
+
+def measure(run, filter_sets):
+    timings, peaks = [], []
+    for filters in filter_sets:
+        tracemalloc.start()
+        start = time.perf_counter()
+        run(filters)
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return np.array(timings), np.array(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--reruns', type=int, default=10)
+    args = parser.parse_args()
+
+    df_all = make_fleet(args.rows)
+    start = time.perf_counter()
+    index = FilterIndex(df_all)
+    build_time = time.perf_counter() - start
+    print(f"Índice montado em {build_time:.2f}s para {len(df_all):,} viagens (uma vez por carga)")
+
+    rng = np.random.default_rng(1)
+    check_parity(df_all, index, random_filters(rng, 20))
+
+    filter_sets = random_filters(rng, args.reruns)
+    for name, run in [('cópia', lambda f: apply_filters(df_all, *f)),
+                      ('índice', lambda f: index.select(*f))]:
+        timings, peaks = measure(run, filter_sets)
+        print(f"{name:<8} mediana {np.median(timings) * 1000:8.1f} ms  p95 {np.percentile(timings, 95) * 1000:8.1f} ms"
+              f"  pico alocado {np.median(peaks) / 2**20:8.1f} MB por rerun")
+
+
+if __name__ == '__main__':
+    main()
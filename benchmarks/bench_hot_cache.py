@@ -0,0 +1,109 @@
+"""Tempo até o primeiro gráfico num processo novo, com e sem o cache quente.
+
+Cada medição sobe um processo Python novo (imports do Streamlit, pandas e
+sklearn incluídos), abre o app com AppTest, escolhe a base e a projeção PCA
+e para quando o primeiro gráfico é desenhado. Modos:
+
+- sem cache: SMARTDRIVE_HOT_CACHE vazio (Parquet + enriquecimento a cada início)
+- 1ª carga: pasta do cache vazia (Parquet + enriquecimento + gravação do .arrow)
+- cache quente: .arrow já gravado (mapeado em memória)
+
+O cache de embeddings aponta para uma pasta vazia em cada processo, para o
+PCA custar o mesmo em todos os modos. Os arquivos ficam no cache de páginas
+do SO: mede o processo frio, não o disco frio.
+
+Uso:
+    python benchmarks/bench_hot_cache.py
+    python benchmarks/bench_hot_cache.py --dataset Reiter --scale 20 --repeats 5
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+APP = os.path.join(ROOT, 'src', 'streamlit_tsne_app.py')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+def first_chart(dataset):
+    """Processo filho: roda o app até o primeiro gráfico e imprime o instante (time.time)"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.run()
+    [box for box in at.sidebar.selectbox if box.label.startswith('📂')][0].set_value(dataset)
+    [box for box in at.sidebar.selectbox if box.label.startswith('Método')][0].set_value('pca')
+    at.run()
+    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+    assert not errors, errors
+    assert len(at.get('plotly_chart')) > 0, 'nenhum gráfico desenhado'
+    print(time.time(), flush=True)
+
+
+def time_to_first_chart(dataset, workdir, hot_cache_dir):
+    embedding_dir = tempfile.mkdtemp(prefix='bench_hot_emb_')
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.path.join(ROOT, 'src'),
+        SMARTDRIVE_HOT_CACHE=hot_cache_dir,
+        SMARTDRIVE_EMBEDDING_CACHE=embedding_dir,
+        SMARTDRIVE_REFERENCE_MAPS=embedding_dir
+    )
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--dataset', dataset],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+    shutil.rmtree(embedding_dir)
+    return float(result.stdout.strip().splitlines()[-1]) - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default='Framento')
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_chart(args.dataset)
+        return
+
+    # O app lê data/processed relativo ao diretório atual
+    workdir = ROOT
+    if args.scale > 1:
+        from bench_sessions import make_scaled_data
+
+        workdir = tempfile.mkdtemp(prefix='bench_hot_cache_')
+        make_scaled_data(args.dataset, args.scale, workdir)
+
+    hot_cache_dir = tempfile.mkdtemp(prefix='bench_hot_arrow_')
+    results = {'sem cache': [], '1ª carga': [], 'cache quente': []}
+    for _ in range(args.repeats):
+        results['sem cache'].append(time_to_first_chart(args.dataset, workdir, ''))
+        for stale in glob.glob(os.path.join(hot_cache_dir, '*.arrow')):
+            os.remove(stale)
+        results['1ª carga'].append(time_to_first_chart(args.dataset, workdir, hot_cache_dir))
+        results['cache quente'].append(time_to_first_chart(args.dataset, workdir, hot_cache_dir))
+
+    arrow_files = glob.glob(os.path.join(hot_cache_dir, '*.arrow'))
+    arrow_mb = sum(os.path.getsize(path) for path in arrow_files) / 1024 / 1024
+    print(f"Base {args.dataset} x{args.scale} | {args.repeats} processos por modo | cache quente {arrow_mb:.1f} MB")
+    for mode, timings in results.items():
+        print(f"{mode:<13} primeiro gráfico: mediana {np.median(timings):6.2f}s  (min {min(timings):.2f}s)")
+
+    shutil.rmtree(hot_cache_dir)
+    if workdir != ROOT:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark do layout dos Parquet: 4 partes sem ordem vs. layout ordenado por (plate, endTime).
+
+Monta as duas versões a partir de um dataset processado (repetido --copies
+vezes com placas renomeadas, simulando uma frota maior) e mede leituras
+seletivas: a carga do app (top 10 placas), uma placa e uma placa numa
+semana. Para o layout novo, testa alguns tamanhos de row group.
+
+O tamanho em MB só é comparável com --copies 1: no layout antigo, em ordem de
+chegada, as cópias idênticas ficam lado a lado e comprimem além do real.
+
+Uso:
+    python benchmarks/bench_layout.py
+    python benchmarks/bench_layout.py --dataset reiter --copies 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(ROOT, 'data', 'processed')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from preprocess_data import write_sorted_dataset  # noqa: E402
+from smartdrive.loader import build_filter, open_dataset, read_trips  # noqa: E402
+from smartdrive.mappings import file_options, file_to_operation, plate_to_model_by_operation  # noqa: E402
+
+
+def make_fleet(dataset, copies):
+    """Tabela com as viagens do dataset repetidas, cada cópia com placas próprias, em ordem de chegada"""
+    table = ds.dataset(os.path.join(DATA_PATH, dataset), format='parquet').to_table()
+    table = table.set_column(table.schema.get_field_index('plate'), 'plate', table.column('plate').cast(pa.string()))
+    tables = [table]
+    for k in range(1, copies):
+        plates = pc.binary_join_element_wise(table.column('plate'), pa.scalar(f'C{k}'), '-')
+        tables.append(table.set_column(table.schema.get_field_index('plate'), 'plate', plates))
+    fleet = pa.concat_tables(tables)
+    # A telemetria chega em ordem de tempo, misturando as placas
+    return fleet.take(pc.sort_indices(fleet, sort_keys=[('endTime', 'ascending')]))
+
+
+def write_old_layout(table, folder):
+    """Layout anterior: 4 partes com o mesmo número de linhas, placa como categoria"""
+    os.makedirs(folder)
+    plate_index = table.schema.get_field_index('plate')
+    table = table.set_column(plate_index, 'plate', pc.dictionary_encode(table.column('plate')))
+    for i, rows in enumerate(np.array_split(np.arange(table.num_rows), 4)):
+        pq.write_table(table.take(rows), os.path.join(folder, f"part_{i}.parquet"), compression='zstd')
+
+
+def write_new_layout(table, folder, row_group_rows):
+    counts = {item['values']: item['counts'] for item in pc.value_counts(table.column('plate')).to_pylist()}
+    write_sorted_dataset(table.to_batches(max_chunksize=50_000), table.schema, counts, folder,
+                         row_group_rows=row_group_rows)
+
+
+def row_groups_read(folder, expression):
+    dataset = open_dataset(folder)
+    total = sum(fragment.num_row_groups for fragment in dataset.get_fragments())
+    read = sum(len(fragment.split_by_row_group(filter=expression)) for fragment in dataset.get_fragments(filter=expression))
+    return read, total
+
+
+def timed(run, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default='framento')
+    parser.add_argument('--copies', type=int, default=10)
+    parser.add_argument('--row-groups', type=int, nargs='+', default=[8_192, 16_384, 32_768, 65_536])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    operation = {folder: file_to_operation[name] for name, folder in file_options.items()}[args.dataset]
+    top_plates = list(plate_to_model_by_operation[operation].keys())
+
+    fleet = make_fleet(args.dataset, args.copies)
+    one_plate = top_plates[0]
+    week = (pc.field('endTime') >= '2025-08-08') & (pc.field('endTime') < '2025-08-15')
+    print(f"Frota: {fleet.num_rows:,} viagens, {len(pc.unique(fleet.column('plate'))):,} placas")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts = {'antes (4 partes)': os.path.join(tmp, 'antes')}
+        write_old_layout(fleet, layouts['antes (4 partes)'])
+        for rows in args.row_groups:
+            layouts[f'ordenado, RG {rows:,}'] = os.path.join(tmp, f'rg_{rows}')
+            write_new_layout(fleet, layouts[f'ordenado, RG {rows:,}'], rows)
+
+        print(f"\n{'layout':<22}{'MB':>7}{'top placas':>22}{'1 placa':>22}{'1 placa, 1 semana':>24}")
+        for name, folder in layouts.items():
+            size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder)) / 1024**2
+            schema = open_dataset(folder).schema
+            plate_week = (ds.field('plate') == one_plate) & week
+            queries = [
+                (build_filter(schema, plates=top_plates), lambda f=folder: read_trips(f, plates=top_plates)),
+                (build_filter(schema, plates=[one_plate]), lambda f=folder: read_trips(f, plates=[one_plate])),
+                (plate_week, lambda f=folder: open_dataset(f).to_table(filter=plate_week)),
+            ]
+            cells = []
+            for expression, run in queries:
+                read, total = row_groups_read(folder, expression)
+                seconds = timed(run, args.repeats)
+                cells.append(f"{seconds * 1000:7.1f} ms {read:>4}/{total:<4} RG")
+            print(f"{name:<22}{size:>7.1f}" + ''.join(f"{cell:>22}" for cell in cells[:2]) + f"{cells[2]:>24}")
+
+
+if __name__ == '__main__':
+    main()
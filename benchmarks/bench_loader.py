@@ -0,0 +1,79 @@
+"""Benchmark da leitura dos Parquet: leitura completa vs. leitura projetada.
+
+Cada medição roda num processo novo para que o pico de RSS seja só da leitura.
+
+Uso:
+    python benchmarks/bench_loader.py
+    python benchmarks/bench_loader.py --datasets framento reiter
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(ROOT, 'data', 'processed')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+# Executado no processo filho
+_CHILD = '''
+import json, os, resource, sys, time
+sys.path.insert(0, {src!r})
+import pandas as pd
+from smartdrive.loader import count_rows, read_trips
+from smartdrive.mappings import plate_to_vehicle_info
+
+folder, mode = {folder!r}, {mode!r}
+plates = {plates!r}
+start = time.perf_counter()
+if mode == 'antes':
+    df_bruto = pd.read_parquet(folder)
+    df = df_bruto[df_bruto['plate'].isin(plates)].copy()
+    total = len(df_bruto)
+else:
+    df = read_trips(folder, plates=plates)
+    total = count_rows(folder)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'segundos': elapsed,
+    'pico_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'linhas': len(df), 'colunas': df.shape[1], 'total': total
+}}))
+'''
+
+
+def measure(folder, mode, plates):
+    code = _CHILD.format(src=os.path.join(ROOT, 'src'), folder=folder, mode=mode, plates=plates)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    from smartdrive.mappings import plate_to_model_by_operation, file_options, file_to_operation
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--datasets', nargs='+', default=list(file_options.values()))
+    args = parser.parse_args()
+
+    folder_to_operation = {file_options[name]: op for name, op in file_to_operation.items()}
+
+    for dataset in args.datasets:
+        folder = os.path.join(DATA_PATH, dataset)
+        if not os.path.isdir(folder):
+            print(f"⏭️  {dataset}: pasta não encontrada em {DATA_PATH}")
+            continue
+
+        plates = list(plate_to_model_by_operation[folder_to_operation[dataset]].keys())
+        for mode in ['antes', 'depois']:
+            result = measure(folder, mode, plates)
+            print(
+                f"{dataset:<24} {mode:<7} {result['segundos']:7.3f}s  "
+                f"pico RSS {result['pico_rss_mb']:8.1f} MB  "
+                f"{result['linhas']:>7} linhas x {result['colunas']:>3} colunas  "
+                f"(total {result['total']})"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark dos painéis de agregação: varredura das viagens vs. cubo.
+
+Confere primeiro se o cubo produz os mesmos números que os groupbys sobre
+as viagens filtradas e depois mede a latência dos painéis por rerun.
+
+Uso:
+    python benchmarks/bench_panels.py
+    python benchmarks/bench_panels.py --rows 5000000 --reruns 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from smartdrive.cube import (  # noqa: E402
+    CRITICAL_EVENTS_FOR_RANKING,
+    build_cube,
+    consumption_comparison,
+    event_analysis,
+    high_efficiency_analysis,
+    select_cells,
+    summary_metrics,
+    type_distribution,
+)
+from synthetic import make_app_frame  # noqa: E402
+
+VEHICLE_TYPES = ['Extra Pesado', 'Médio', 'Leve', 'Desconhecido']
+EFFICIENCY_CLASSES = ['Todos', 'Alta Eficiência', 'Média Eficiência', 'Baixa Eficiência']
+
+
+def make_fleet(n_rows, seed=0):
+    """Viagens sintéticas já enriquecidas, como o app mantém em cache"""
+    return make_app_frame(n_rows, seed=seed)
+
+
+def apply_filters(df, vehicle_types, efficiency_class, dist_min, dist_max, day_min, day_max):
+    """Mesma lógica de filtros do app"""
+    df_filtered = df.copy()
+    if vehicle_types:
+        df_filtered = df_filtered[df_filtered['vehicle_type'].isin(vehicle_types)]
+    if efficiency_class != 'Todos':
+        df_filtered = df_filtered[df_filtered['efficiency_class'] == efficiency_class]
+    df_filtered = df_filtered[(df_filtered['totalDistance'] >= dist_min) & (df_filtered['totalDistance'] <= dist_max)]
+    return df_filtered[(df_filtered['day_of_month'] >= day_min) & (df_filtered['day_of_month'] <= day_max)]
+
+
+def panels_by_scan(df_all, filters):
+    """Painéis calculados com groupbys sobre as viagens (caminho antigo)"""
+    df = apply_filters(df_all, *filters)
+    type_dist = df_all.groupby(['vehicle_type', 'efficiency_class']).agg(
+        {'plate': 'count', 'fuel_efficiency': 'mean'}).round(2)
+    consumption = df.groupby(['plate', 'vehicle_type', 'expected_consumption'], observed=True).agg(
+        {'fuel_efficiency': 'mean'}).reset_index().round(2)
+    high = df[df['efficiency_class'] == 'Alta Eficiência']
+    top_efficient = high.groupby(['plate', 'vehicle_model', 'vehicle_type'], observed=True)[
+        'fuel_efficiency'].mean().sort_values(ascending=False).head(10)
+    eff_by_type = high.groupby('vehicle_type')['fuel_efficiency'].agg(['count', 'mean']).round(2)
+    event_totals = {c: df[c].sum() for c in df.columns if c.startswith('event_')}
+    top_critical = df[CRITICAL_EVENTS_FOR_RANKING].sum(axis=1).groupby(df['plate'], observed=True).sum() \
+        .sort_values(ascending=False).head(10)
+    return {
+        'trips': len(df), 'plates': df['plate'].nunique(), 'drivers': df['driverId'].nunique(),
+        'mean_efficiency': df['fuel_efficiency'].mean(), 'type_dist': type_dist,
+        'consumption': consumption, 'top_efficient': top_efficient, 'eff_by_type': eff_by_type,
+        'event_totals': event_totals, 'trips_with_events': int(df['percurso_com_evento'].sum()),
+        'top_critical': top_critical
+    }
+
+
+def panels_by_cube(cube, df_all, filters):
+    """Painéis respondidos pelo cubo (fallback para as viagens se necessário)"""
+    cells = select_cells(cube, *filters)
+    if cells is None:
+        cells = build_cube(apply_filters(df_all, *filters))
+    return {
+        **summary_metrics(cells), 'type_dist': type_distribution(cube),
+        'consumption': consumption_comparison(cells), 'high': high_efficiency_analysis(cells),
+        'events': event_analysis(cells)
+    }
+
+
+def check_parity(df_all, cube, filter_sets):
+    for filters in filter_sets:
+        expected = panels_by_scan(df_all, filters)
+        actual = panels_by_cube(cube, df_all, filters)
+        assert actual['trips'] == expected['trips'], filters
+        assert actual['plates'] == expected['plates'] and actual['drivers'] == expected['drivers'], filters
+        assert np.isclose(actual['mean_efficiency'], expected['mean_efficiency'], rtol=1e-5, equal_nan=True)
+        assert actual['events']['trips_with_events'] == expected['trips_with_events'], filters
+        totals = actual['events']['event_totals'].set_index('Evento')['Total']
+        for column, total in expected['event_totals'].items():
+            assert totals.get(column.replace('event_', ''), 0) == total, (filters, column)
+        assert np.allclose(
+            actual['type_dist'].to_numpy(dtype=float), expected['type_dist'].to_numpy(dtype=float), equal_nan=True
+        )
+        if actual['high'][0] is not None:
+            assert np.allclose(actual['high'][0].to_numpy(), expected['top_efficient'].to_numpy(), rtol=1e-5)
+            assert np.allclose(actual['high'][1].to_numpy(dtype=float), expected['eff_by_type'].to_numpy(dtype=float))
+    print(f"✅ Paridade conferida em {len(filter_sets)} combinações de filtros")
+
+
+def random_filters(rng, n):
+    filter_sets = []
+    for _ in range(n):
+        types = list(rng.choice(VEHICLE_TYPES, rng.integers(0, 5), replace=False))
+        dist_min = int(rng.choice([0, 5, 10, 20]))
+        day_min = int(rng.integers(1, 15))
+        filter_sets.append((
+            types, str(rng.choice(EFFICIENCY_CLASSES)), dist_min, dist_min + int(rng.choice([15, 50, 100])),
+            day_min, day_min + int(rng.integers(0, 17))
+        ))
+    return filter_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--reruns', type=int, default=10)
+    args = parser.parse_args()
+
+    df_all = make_fleet(args.rows)
+    start = time.perf_counter()
+    cube = build_cube(df_all)
+    build_time = time.perf_counter() - start
+    print(f"Cubo: {len(cube):,} células para {len(df_all):,} viagens, montado em {build_time:.2f}s (uma vez por carga)")
+
+    rng = np.random.default_rng(1)
+    check_parity(df_all, cube, random_filters(rng, 10))
+
+    filter_sets = random_filters(rng, args.reruns)
+    for name, run in [('varredura', lambda f: panels_by_scan(df_all, f)),
+                      ('cubo', lambda f: panels_by_cube(cube, df_all, f))]:
+        timings = []
+        for filters in filter_sets:
+            start = time.perf_counter()
+            run(filters)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<10} mediana {np.median(timings) * 1000:8.1f} ms  p95 {np.percentile(timings, 95) * 1000:8.1f} ms por rerun")
+
+
+if __name__ == '__main__':
+    main()
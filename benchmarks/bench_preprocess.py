@@ -0,0 +1,140 @@
+"""Benchmark do pré-processamento: pandas em memória vs. conversão em streaming.
+
+Gera um JSON lines a partir de um dataset já processado (repetido --copies
+vezes), converte com as duas abordagens, cada uma num processo novo, e
+compara tempo, linhas/s e pico de RSS. Confere também se as duas geram os
+mesmos dados e tipos.
+
+Uso:
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --dataset reiter --copies 10 --modes depois
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(ROOT, 'data', 'processed')
+
+# Executado no processo filho
+_CHILD = '''
+import json, os, resource, sys, time
+sys.path.insert(0, {scripts!r})
+import numpy as np
+import pandas as pd
+
+raw_path, output_dir, mode = {raw_path!r}, {output_dir!r}, {mode!r}
+start = time.perf_counter()
+if mode == 'antes':
+    # Caminho anterior: JSON inteiro em memória + optimize_dataframe + 4 partes
+    df = pd.read_json(raw_path, lines=True)
+    for col in df.select_dtypes(include=['float64']).columns:
+        df[col] = df[col].astype('float32')
+    for col in df.select_dtypes(include=['int64']).columns:
+        if df[col].max() < 2147483647 and df[col].min() > -2147483648:
+            df[col] = df[col].astype('int32')
+    for col in df.select_dtypes(include=['object']).columns:
+        if len(df[col].unique()) / len(df[col]) < 0.5:
+            df[col] = df[col].astype('category')
+    folder = os.path.join(output_dir, 'bench')
+    os.makedirs(folder)
+    for i, chunk in enumerate(np.array_split(df, 4)):
+        chunk.to_parquet(os.path.join(folder, f"part_{{i}}.parquet"), engine='pyarrow', compression='zstd')
+    rows = len(df)
+else:
+    from preprocess_data import convert_dataset
+    rows = convert_dataset('bench', raw_path, output_dir=output_dir, block_size_mb={block_mb!r})['rows']
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'segundos': elapsed, 'linhas': rows,
+    'pico_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}}))
+'''
+
+
+# Gerado num processo à parte: ru_maxrss do filho herda o pico do processo que o criou
+_MAKE_RAW = '''
+import pandas as pd
+df = pd.read_parquet({folder!r})
+# Volta aos tipos de origem do JSON
+for col in df.select_dtypes(include=['category']).columns:
+    df[col] = df[col].astype(object)
+lines = df.to_json(orient='records', lines=True, force_ascii=False)
+with open({path!r}, 'w') as handle:
+    for _ in range({copies!r}):
+        handle.write(lines)
+print(len(df) * {copies!r})
+'''
+
+
+def make_raw_json(dataset, copies, path):
+    """JSON lines com as linhas do dataset processado repetidas"""
+    code = _MAKE_RAW.format(folder=os.path.join(DATA_PATH, dataset), path=path, copies=copies)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return int(output.stdout.strip().splitlines()[-1])
+
+
+def measure(raw_path, output_dir, mode, block_mb):
+    code = _CHILD.format(
+        scripts=os.path.join(ROOT, 'scripts'), raw_path=raw_path, output_dir=output_dir, mode=mode, block_mb=block_mb
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def check_parity(before_folder, after_folder):
+    """Mesmas linhas e tipos; a ordem e o tipo das colunas de ordenação mudam no layout novo"""
+    sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+    from preprocess_data import SORT_COLUMNS
+
+    before = pd.read_parquet(before_folder)
+    after = pd.read_parquet(after_folder)
+    assert list(before.columns) == list(after.columns)
+    other = [col for col in before.columns if col not in SORT_COLUMNS]
+    assert (before[other].dtypes == after[other].dtypes).all()
+
+    for df in (before, after):
+        for col in df.select_dtypes(include=['category']).columns:
+            df[col] = df[col].astype(object)
+    before = before.sort_values(list(before.columns)).reset_index(drop=True)
+    after = after.sort_values(list(after.columns)).reset_index(drop=True)
+    for col in before.columns:
+        left, right = before[col], after[col]
+        assert left.equals(right) or np.allclose(left, right, equal_nan=True), col
+    print(f"✅ Paridade conferida: {len(after):,} linhas, {after.shape[1]} colunas, mesmos tipos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default='framento')
+    parser.add_argument('--copies', type=int, default=3)
+    parser.add_argument('--block-mb', type=float, default=32)
+    # O caminho antigo precisa de ~10x o tamanho do JSON em RAM
+    parser.add_argument('--modes', nargs='+', default=['antes', 'depois'], choices=['antes', 'depois'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'bench.json')
+        rows = make_raw_json(args.dataset, args.copies, raw_path)
+        print(f"JSON de teste: {rows:,} linhas, {os.path.getsize(raw_path) / 1024**2:.0f} MB")
+
+        results = {}
+        for mode in args.modes:
+            output_dir = os.path.join(tmp, mode)
+            os.makedirs(output_dir)
+            results[mode] = measure(raw_path, output_dir, mode, args.block_mb)
+            r = results[mode]
+            print(f"{mode:<8} {r['segundos']:7.2f}s  {r['linhas'] / r['segundos']:>10,.0f} linhas/s  pico RSS {r['pico_rss_mb']:7.0f} MB")
+
+        if len(results) == 2:
+            check_parity(os.path.join(tmp, 'antes', 'bench'), os.path.join(tmp, 'depois', 'bench'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Teste de carga do app: N sessões simultâneas no mesmo processo do Streamlit.
+
+Cada sessão é um AppTest que abre a base e faz --reruns mudanças de filtro
+(dia inicial), com a projeção PCA para que o t-SNE não domine a medição.
+Reporta o crescimento de RSS do processo por sessão e a latência p50/p95
+dos reruns. Com --app dá para medir outra versão do script (ex.: a anterior,
+copiada para src/). Com --scale K o app roda numa pasta temporária com a base
+repetida K vezes, simulando uma frota maior.
+
+Uso:
+    python benchmarks/bench_sessions.py
+    python benchmarks/bench_sessions.py --sessions 20 --reruns 10 --dataset Reiter --scale 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_APP = os.path.join(ROOT, 'src', 'streamlit_tsne_app.py')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+def make_scaled_data(dataset, scale, workdir):
+    """Cria data/processed/<base> em workdir com as viagens repetidas scale vezes"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from smartdrive.loader import open_dataset
+    from smartdrive.mappings import file_options
+
+    folder = file_options[dataset]
+    table = open_dataset(os.path.join(ROOT, 'data', 'processed', folder)).to_table()
+    target = os.path.join(workdir, 'data', 'processed', folder)
+    os.makedirs(target)
+    pq.write_table(pa.concat_tables([table] * scale), os.path.join(target, 'part_0.parquet'), compression='zstd')
+
+
+def rss_mb(field='VmRSS'):
+    """Memória residente do processo (VmRSS) ou pico (VmHWM), em MB"""
+    with open('/proc/self/status') as handle:
+        for line in handle:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def serialize_script_compilation():
+    """ast.parse não é thread-safe no CPython 3.11: compila o script de uma sessão por vez"""
+    from streamlit.runtime.scriptrunner import magic
+
+    add_magic = magic.add_magic
+    compile_lock = threading.Lock()
+
+    def locked_add_magic(code, script_path):
+        with compile_lock:
+            return add_magic(code, script_path)
+
+    magic.add_magic = locked_add_magic
+
+
+def open_session(app_path, dataset):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=600)
+    at.run()
+    [box for box in at.sidebar.selectbox if box.label.startswith('📂')][0].set_value(dataset)
+    [box for box in at.sidebar.selectbox if box.label.startswith('Método')][0].set_value('pca')
+    return at
+
+
+def run_session(at, reruns, latencies, lock):
+    """Primeira carga da base + reruns mudando o dia inicial"""
+    at.run()
+    day_input = [box for box in at.sidebar.number_input if box.label.startswith('Dia inicial')][0]
+    for i in range(reruns):
+        day_input.set_value(1 + i % 10)
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+    errors = [e.value for e in at.exception]
+    assert not errors, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--reruns', type=int, default=5)
+    parser.add_argument('--dataset', default='Framento')
+    parser.add_argument('--app', default=DEFAULT_APP)
+    parser.add_argument('--scale', type=int, default=1)
+    args = parser.parse_args()
+
+    # O app lê data/processed (e grava data/cache) relativo ao diretório atual
+    workdir = ROOT
+    if args.scale > 1:
+        workdir = tempfile.mkdtemp(prefix='bench_sessions_')
+        make_scaled_data(args.dataset, args.scale, workdir)
+    os.chdir(workdir)
+    serialize_script_compilation()
+
+    # Aquecimento: imports e primeira carga da base fora da medição
+    warmup = open_session(args.app, args.dataset)
+    run_session(warmup, 1, [], threading.Lock())
+    del warmup
+    baseline = rss_mb()
+
+    sessions = [open_session(args.app, args.dataset) for _ in range(args.sessions)]
+    latencies = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for future in [pool.submit(run_session, at, args.reruns, latencies, lock) for at in sessions]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    growth = rss_mb() - baseline
+    print(f"App: {os.path.relpath(args.app, ROOT)} | base {args.dataset} x{args.scale} | "
+          f"{args.sessions} sessões x {args.reruns} reruns")
+    print(f"RSS: base {baseline:.0f} MB -> {baseline + growth:.0f} MB "
+          f"(+{growth:.0f} MB, {growth / args.sessions:.1f} MB por sessão), pico {rss_mb('VmHWM'):.0f} MB")
+    print(f"Rerun: p50 {np.percentile(latencies, 50) * 1000:.0f} ms  p95 {np.percentile(latencies, 95) * 1000:.0f} ms"
+          f"  | total {wall:.1f}s")
+
+    if workdir != ROOT:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Custo de importação do app (processo novo) e tempo de um rerun sem mudanças.
+
+Início a frio: os imports do topo do script (extraídos do próprio arquivo)
+rodam num processo novo com ``python -X importtime``; reporta o tempo
+total, os pacotes que mais pesam e se sklearn, scipy, plotly.express ou
+plotly.subplots entraram já no início. O processo já tem streamlit, pandas e numpy importados antes da
+medição (o servidor os carrega de qualquer jeito).
+
+Rerun: abre o app com AppTest na base e seção escolhidas (caches já
+quentes, projeção PCA) e mede --reruns reruns sem mudança de widget, ou seja,
+só o custo do script: layout, consultas aos caches e desenho. Reporta o tempo
+de parede do AppTest e o timer do próprio app ("Página (rerun completo)").
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --dataset Reiter --section "⚠️ Eventos Críticos" --reruns 20
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_APP = os.path.join(ROOT, 'src', 'streamlit_tsne_app.py')
+
+# Pacotes pesados que o início a frio não deveria carregar
+LAZY_PACKAGES = ['sklearn', 'scipy', 'plotly.express', 'plotly.subplots']
+
+
+def import_block(app_path):
+    """Código com os imports do topo do script do app"""
+    with open(app_path) as handle:
+        tree = ast.parse(handle.read())
+    return '\n'.join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure_imports(app_path):
+    """Processo novo com -X importtime: (tempo total em ms, {pacote: ms acumulado}, pesados carregados)"""
+    code = '\n'.join([
+        'import streamlit, pandas, numpy, sys, time',
+        'start = time.perf_counter()',
+        'sys.stderr.write("--- app ---\\n")',
+        import_block(app_path),
+        'elapsed = time.perf_counter() - start',
+        f'print(elapsed * 1000, *[name for name in {LAZY_PACKAGES!r} if name in sys.modules])'
+    ])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=os.path.dirname(app_path), capture_output=True, text=True, check=True,
+        env=dict(os.environ, PYTHONPATH=os.path.dirname(app_path))
+    )
+    elapsed, *heavy = result.stdout.split()
+
+    # Só as linhas depois do marcador, e só os imports de primeiro nível
+    packages = {}
+    lines = result.stderr.split('--- app ---\n', 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('  '):
+            continue
+        top = name.strip().split('.')[0]
+        packages[top] = packages.get(top, 0) + int(cumulative) / 1000
+    return float(elapsed), packages, heavy
+
+
+def measure_reruns(app_path, dataset, section, reruns):
+    """(parede, timer do app) em ms de reruns sem mudança, com a base e a seção já carregadas"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=600)
+    at.run()
+    [box for box in at.sidebar.selectbox if box.label.startswith('📂')][0].set_value(dataset)
+    [box for box in at.sidebar.selectbox if box.label.startswith('Método')][0].set_value('pca')
+    at.run()
+    at.radio(key='dashboard_section').set_value(section)
+    at.run()
+
+    wall, page = [], []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        wall.append((time.perf_counter() - start) * 1000)
+        page.append(at.session_state['section_timings']['Página (rerun completo)']['last_ms'])
+    errors = [e.value for e in at.exception]
+    assert not errors, errors
+    return wall, page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=DEFAULT_APP)
+    parser.add_argument('--repeats', type=int, default=5, help='processos novos para a medição dos imports')
+    parser.add_argument('--dataset', default='Framento')
+    parser.add_argument('--section', default='📊 Visualização t-SNE')
+    parser.add_argument('--reruns', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    runs = [measure_imports(args.app) for _ in range(args.repeats)]
+    elapsed = [run[0] for run in runs]
+    packages, heavy = runs[-1][1], runs[-1][2]
+    print(f"App: {os.path.relpath(args.app, ROOT)}")
+    print(f"Imports do app (processo novo): mediana {np.median(elapsed):.0f} ms  "
+          f"(mín {min(elapsed):.0f} ms, {args.repeats} processos)")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {ms:8.1f} ms  {name}")
+    print(f"Pesados carregados no início: {', '.join(heavy) if heavy else 'nenhum'}")
+
+    # O app lê data/processed relativo ao diretório atual; aquecimento desligado
+    os.chdir(ROOT)
+    os.environ['SMARTDRIVE_WARMUP'] = '0'
+    sys.path.insert(0, os.path.dirname(args.app))
+    wall, page = measure_reruns(args.app, args.dataset, args.section, args.reruns)
+    print(f"Rerun sem mudanças ({args.dataset}, {args.section}):")
+    print(f"   parede (AppTest)  p50 {np.percentile(wall, 50):.0f} ms  p95 {np.percentile(wall, 95):.0f} ms")
+    print(f"   script (timer)    p50 {np.percentile(page, 50):.1f} ms  p95 {np.percentile(page, 95):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Suíte reprodutível dos estágios do app, sem Streamlit, sobre telemetria sintética.
+
+Para cada escala (--rows), gera viagens sintéticas com o esquema das bases
+processadas (benchmarks/synthetic.py), grava no layout do preprocess_data.py
+numa pasta temporária e mede, com --repeats repetições:
+
+- load_and_process_data: leitura projetada do Parquet + enriquecimento (load_trips)
+- apply_filters: montagem do FilterIndex e seleção com os filtros padrão e com um filtro estreito
+- create_distribution_plots: figura de distribuições das viagens selecionadas
+- features: montagem da FeatureMatrix (float32) da seleção e prepare_tsne_input reaproveitando-a
+- run_tsne: projeção da amostra, um estágio por método (--methods; sem cache de embeddings)
+- create_tsne_plot e a serialização da figura para JSON (o que o st.plotly_chart envia)
+- create_tsne_raster (imagem agregada no servidor) e sua serialização
+- com --fleet-clusters: mapa da frota em dois níveis (micro-clusters + centróides) e sua figura
+
+Os resultados (mediana, mínimo e máximo em ms, linhas de entrada e saída) vão
+para benchmarks/results/<data>_<commit>.json com o commit, a máquina e as
+versões dos pacotes. --compare confronta dois arquivos e marca regressões.
+
+Uso:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --rows 100000 1000000 --methods pca tsne --repeats 5
+    python benchmarks/bench_suite.py --compare benchmarks/results/A.json benchmarks/results/B.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from synthetic import DEFAULT_OPERATION, ROOT, make_trips, write_dataset
+
+from smartdrive.filter_index import FilterIndex, take_rows  # noqa: E402
+from smartdrive.mappings import plate_to_model_by_operation  # noqa: E402
+from smartdrive.pipeline import load_trips  # noqa: E402
+from smartdrive.hierarchical import cluster_summary, hierarchical_embedding  # noqa: E402
+from smartdrive.plots import create_distribution_plots, create_fleet_map, create_tsne_plot, create_tsne_raster  # noqa: E402
+from smartdrive.sampling import DEFAULT_SAMPLING_STRATEGY, SAMPLING_STRATEGIES  # noqa: E402
+from smartdrive.tsne import build_feature_matrix, prepare_fleet_input, prepare_tsne_input, run_tsne  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Pacotes cujas versões mudam os tempos
+PACKAGES = ['numpy', 'pandas', 'pyarrow', 'sklearn', 'plotly', 'streamlit']
+
+# Filtros do app: padrão da barra lateral e um recorte estreito
+DEFAULT_FILTERS = ([], 'Todos', 0, 1000, 1, 31)
+NARROW_FILTERS = (['Médio'], 'Alta Eficiência', 10, 60, 5, 12)
+
+
+def git_state():
+    """Commit atual e se há alterações não commitadas"""
+    def git(*args):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {'commit': git('rev-parse', '--short', 'HEAD'), 'dirty': bool(status) if status is not None else None}
+
+
+def environment():
+    """Máquina e versões dos pacotes"""
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'packages': versions
+    }
+
+
+def measure(func, repeats):
+    """Executa func `repeats` vezes; devolve (último resultado, tempos em ms)"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def summary(timings, rows_in=None, rows_out=None):
+    return {
+        'median_ms': float(np.median(timings)), 'min_ms': float(min(timings)), 'max_ms': float(max(timings)),
+        'repeats': len(timings), 'rows_in': rows_in, 'rows_out': rows_out
+    }
+
+
+def run_scale(n_rows, args):
+    """Gera a base da escala e mede os estágios; devolve {estágio: resumo}"""
+    plate_model_map = plate_to_model_by_operation[args.operation]
+    top_plates = list(plate_model_map.keys())
+
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        folder = os.path.join(workdir, 'synthetic')
+        write_dataset(make_trips(n_rows, operation=args.operation, seed=args.seed), folder)
+
+        stages = {}
+        (df_all, total_rows), timings = measure(
+            lambda: load_trips(folder, top_plates, plate_model_map), args.repeats
+        )
+        stages['load_and_process_data'] = summary(timings, total_rows, len(df_all))
+
+        filter_index, timings = measure(lambda: FilterIndex(df_all), args.repeats)
+        stages['apply_filters: índice'] = summary(timings, len(df_all))
+        for label, filters in [('padrão', DEFAULT_FILTERS), ('estreito', NARROW_FILTERS)]:
+            positions, timings = measure(lambda: filter_index.select(*filters), args.repeats)
+            stages[f'apply_filters: {label}'] = summary(timings, len(df_all), len(positions))
+        selection = filter_index.select(*DEFAULT_FILTERS)
+
+        distribution_input = take_rows(df_all, selection, ['fuel_efficiency', 'vehicle_type', 'totalDistance'])
+        _, timings = measure(lambda: create_distribution_plots(distribution_input), args.repeats)
+        stages['create_distribution_plots'] = summary(timings, len(distribution_input))
+
+        feature_matrix, timings = measure(lambda: build_feature_matrix(df_all, selection), args.repeats)
+        stages['features: matriz float32'] = summary(timings, len(selection), len(feature_matrix))
+        prepared, timings = measure(
+            lambda: prepare_tsne_input(df_all, args.sample_size, positions=selection, strategy=args.sampling,
+                                       feature_matrix=feature_matrix),
+            args.repeats
+        )
+        stages['features: prepare_tsne_input'] = summary(timings, len(feature_matrix), len(prepared['features']))
+
+        for method in args.methods:
+            (tsne_df, _), timings = measure(
+                lambda: run_tsne(df_all, args.sample_size, positions=selection, method=method,
+                                 strategy=args.sampling),
+                args.repeats
+            )
+            stages[f'run_tsne: {method}'] = summary(timings, len(selection), len(tsne_df))
+
+        fig, timings = measure(lambda: create_tsne_plot(tsne_df), args.repeats)
+        stages['create_tsne_plot'] = summary(timings, len(tsne_df))
+        payload, timings = measure(fig.to_json, args.repeats)
+        stages['create_tsne_plot: to_json'] = {**summary(timings, len(tsne_df)), 'bytes': len(payload)}
+        raster, timings = measure(lambda: create_tsne_raster(tsne_df), args.repeats)
+        stages['create_tsne_raster'] = summary(timings, len(tsne_df))
+        payload, timings = measure(raster.to_json, args.repeats)
+        stages['create_tsne_raster: to_json'] = {**summary(timings, len(tsne_df)), 'bytes': len(payload)}
+
+        if args.fleet_clusters:
+            def fleet_map():
+                prepared = prepare_fleet_input(df_all, selection)
+                fleet = hierarchical_embedding(prepared['features'], args.fleet_clusters, args.methods[0])
+                clusters = cluster_summary(df_all, prepared['positions'], fleet['labels'], len(fleet['sizes']))
+                return fleet, clusters
+
+            (fleet, clusters), timings = measure(fleet_map, args.repeats)
+            stages[f'fleet_map: {args.methods[0]}'] = summary(timings, len(selection), len(fleet['embedding']))
+            fig, timings = measure(
+                lambda: create_fleet_map(fleet['embedding'], fleet['centroid_embedding'], clusters), args.repeats
+            )
+            stages['create_fleet_map'] = summary(timings, len(fleet['embedding']))
+        return stages
+    finally:
+        shutil.rmtree(workdir)
+
+
+def print_results(results):
+    for scale, stages in results.items():
+        print(f"\n📏 {int(scale):,} viagens")
+        for name, stats in stages.items():
+            rows = f"{stats['rows_in']:,} → {stats['rows_out']:,}" if stats.get('rows_out') is not None else ''
+            if 'bytes' in stats:
+                rows = f"{stats['bytes'] / 1024:,.0f} KB"
+            print(f"  {name:<30} mediana {stats['median_ms']:9.1f} ms  "
+                  f"(min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f})  {rows}")
+
+
+def compare(baseline_path, candidate_path, threshold, min_delta_ms):
+    """Razão candidato/base da mediana por estágio; retorna o número de regressões
+
+    Estágios abaixo de um milissegundo variam muito em termos relativos: só conta
+    como regressão (ou melhora) a diferença acima de min_delta_ms.
+    """
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    with open(candidate_path, encoding='utf-8') as handle:
+        candidate = json.load(handle)
+
+    print(f"Base:      {baseline['git']['commit']} ({baseline['created_at']})")
+    print(f"Candidato: {candidate['git']['commit']} ({candidate['created_at']})")
+    regressions = 0
+    for scale, stages in candidate['results'].items():
+        print(f"\n📏 {int(scale):,} viagens")
+        for name, stats in stages.items():
+            before = baseline['results'].get(scale, {}).get(name)
+            if before is None:
+                print(f"  {name:<30} {stats['median_ms']:9.1f} ms  (novo)")
+                continue
+            ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+            flag = ''
+            if abs(stats['median_ms'] - before['median_ms']) < min_delta_ms:
+                pass
+            elif ratio > 1 + threshold:
+                flag = '⚠️ regressão'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                flag = '✅ melhora'
+            print(f"  {name:<30} {before['median_ms']:9.1f} → {stats['median_ms']:9.1f} ms  x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def latest_results(n):
+    return sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), key=os.path.getmtime)[-n:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--methods', nargs='+', default=['pca'])
+    parser.add_argument('--sample-size', type=int, default=5000)
+    parser.add_argument('--fleet-clusters', type=int, default=0,
+                        help='mede também o mapa da frota com N micro-clusters (0 desativa)')
+    parser.add_argument('--sampling', default=DEFAULT_SAMPLING_STRATEGY, choices=list(SAMPLING_STRATEGIES))
+    parser.add_argument('--operation', default=DEFAULT_OPERATION)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='arquivo JSON (padrão: benchmarks/results/<data>_<commit>.json)')
+    parser.add_argument('--compare', nargs='*', metavar='JSON',
+                        help='compara dois resultados (ou o informado com o mais recente; sem arquivos, os dois últimos)')
+    parser.add_argument('--threshold', type=float, default=0.10, help='variação relativa tolerada na comparação')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='diferença absoluta mínima para marcar')
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        paths = args.compare
+        if len(paths) < 2:
+            paths = (paths + latest_results(2 - len(paths)))[:2]
+        if len(paths) < 2:
+            parser.error('são necessários dois arquivos de resultado para comparar')
+        sys.exit(1 if compare(paths[0], paths[1], args.threshold, args.min_delta_ms) else 0)
+
+    git = git_state()
+    results = {}
+    for n_rows in args.rows:
+        print(f"⏱️ Medindo {n_rows:,} viagens...", flush=True)
+        results[str(n_rows)] = run_scale(n_rows, args)
+    print_results(results)
+
+    created_at = datetime.now().astimezone()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{created_at:%Y%m%d-%H%M%S}_{git['commit'] or 'sem-git'}{'-dirty' if git['dirty'] else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'created_at': created_at.isoformat(timespec='seconds'),
+            'git': git,
+            'environment': environment(),
+            'params': {
+                'rows': args.rows, 'repeats': args.repeats, 'methods': args.methods,
+                'sample_size': args.sample_size, 'sampling': args.sampling,
+                'fleet_clusters': args.fleet_clusters, 'operation': args.operation, 'seed': args.seed
+            },
+            'results': results
+        }, handle, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados salvos em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Gerador de telemetria sintética com o esquema das bases processadas.
+
+Gera viagens com as colunas que o app lê (placa, motorista, início/fim,
+distância, consumo, tempos e distâncias por faixa de rotação e terreno,
+velocidades, RPM, eventos event_* e flag de percurso com evento), nos
+mesmos tipos do Parquet processado (int32, float32 e texto). As placas da
+operação escolhida convivem com placas de fora do top 10, para o filtro de
+placas do loader ter o que descartar.
+
+Usado pelos benchmarks; não depende do Streamlit nem das bases reais.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from smartdrive.enrichment import CRITICAL_EVENT_COLUMNS  # noqa: E402
+from smartdrive.mappings import plate_to_model_by_operation, plate_to_vehicle_info  # noqa: E402
+from smartdrive.pipeline import derive_columns  # noqa: E402
+
+DEFAULT_OPERATION = 'BRF Secundaria'
+
+# Faixas de rotação com colunas de tempo e distância por terreno (como nas bases reais)
+RANGE_COLORS = ['extraGreen', 'green', 'yellow', 'transition', 'danger', 'slowGear']
+TERRAINS = ['Ascending', 'Descending', 'Flat']
+
+# Eventos além dos críticos (presentes nas bases reais)
+OTHER_EVENT_COLUMNS = [
+    'event_TEMPO PARADO',
+    'event_EXCESSO VELOCIDADE TRECHO RODOVIARIO SECO',
+    'event_PRÉ-INFRAÇÃO DE EXCESSO DE VELOCIDADE SECO'
+]
+
+START_DATE = np.datetime64('2025-08-01T00:00:00', 's')
+
+
+def _split(rng, total, parts):
+    """Divide cada valor de total em `parts` pedaços aleatórios que somam o total"""
+    weights = rng.dirichlet(np.ones(parts), size=len(total))
+    return weights * total[:, None]
+
+
+def _iso(seconds):
+    """Horários como texto ISO em UTC, no formato do JSON de origem"""
+    stamps = np.datetime_as_string(START_DATE + seconds.astype('timedelta64[s]'), unit='s')
+    return pd.array(np.char.add(stamps, '.000Z'), dtype='string')
+
+
+def make_trips(n_rows, operation=DEFAULT_OPERATION, seed=0, other_plates=20, top_share=0.6, days=31,
+               invalid_efficiency_share=0.02):
+    """Viagens brutas (como saem do Parquet processado) em ordem de chegada
+
+    top_share é a fração das viagens das placas do top 10 da operação; o restante
+    fica com `other_plates` placas fora do mapeamento (tipo Desconhecido).
+    invalid_efficiency_share das viagens tem km_litro nulo ou zero.
+    """
+    rng = np.random.default_rng(seed)
+    top_plates = list(plate_to_model_by_operation[operation].keys())
+    extra_plates = [f"SYN{i:04d}" for i in range(other_plates)]
+    plates = np.array(top_plates + extra_plates, dtype=object)
+
+    if extra_plates:
+        is_top = rng.random(n_rows) < top_share
+        plate_codes = np.where(
+            is_top,
+            rng.integers(0, len(top_plates), n_rows),
+            len(top_plates) + rng.integers(0, len(extra_plates), n_rows)
+        )
+    else:
+        plate_codes = rng.integers(0, len(top_plates), n_rows)
+
+    # Cada veículo roda com poucos motoristas
+    driver_id = (1_000_000 + plate_codes * 3 + rng.integers(0, 3, n_rows)).astype(np.int32)
+
+    # Horários: viagens espalhadas pelo período, chegando em ordem de fim
+    total_time = rng.gamma(2.0, 1800.0, n_rows).astype(np.int64) + 60
+    end_seconds = np.sort(rng.integers(0, days * 86400, n_rows))
+    start_seconds = end_seconds - total_time
+
+    total_distance = np.round(rng.gamma(1.5, 15.0, n_rows), 1).astype(np.float32) + np.float32(0.1)
+    stopped_time = (total_time * rng.beta(2.0, 5.0, n_rows)).astype(np.int64)
+    movement_time = total_time - stopped_time
+
+    # Consumo em torno do esperado de cada placa (placas de fora: 3 km/L)
+    expected = np.array([
+        plate_to_vehicle_info.get(plate, {}).get('consumo_esperado') or 3.0 for plate in plates
+    ], dtype=np.float32)[plate_codes]
+    km_litro = (expected * rng.normal(1.0, 0.2, n_rows).clip(0.3, 2.0)).astype(np.float32)
+    fuel_consumption = (total_distance / km_litro).astype(np.float32)
+    invalid = rng.random(n_rows) < invalid_efficiency_share
+    km_litro[invalid & (rng.random(n_rows) < 0.5)] = 0.0
+    km_litro[invalid & (km_litro != 0.0)] = np.nan
+
+    data = {
+        'delta_id': np.arange(n_rows, dtype=np.int32),
+        'plate': pd.array(plates[plate_codes], dtype='string'),
+        'driverId': driver_id,
+        'type': np.full(n_rows, 254, dtype=np.int32),
+        'startTime': _iso(start_seconds),
+        'endTime': _iso(end_seconds),
+        'totalTime': total_time.astype(np.int32),
+        'movementTime': movement_time.astype(np.int32),
+        'stoppedTime': stopped_time.astype(np.int32),
+        'totalDistance': total_distance,
+        'fuelConsumption': fuel_consumption,
+        'km_litro': km_litro,
+        'L_por_100km': np.where(km_litro > 0, 100.0 / np.where(km_litro > 0, km_litro, 1.0), np.nan).astype(np.float32),
+    }
+
+    # Tempo e distância por terreno e, dentro de cada terreno, por faixa de rotação
+    terrain_time = _split(rng, movement_time.astype(np.float64), len(TERRAINS))
+    terrain_distance = _split(rng, total_distance.astype(np.float64), len(TERRAINS))
+    for t, terrain in enumerate(TERRAINS):
+        data[f'{terrain.lower()}Time'] = terrain_time[:, t].astype(np.int32)
+        data[f'{terrain.lower()}Distance'] = terrain_distance[:, t].astype(np.float32)
+        range_time = _split(rng, terrain_time[:, t], len(RANGE_COLORS) + 1)
+        range_distance = _split(rng, terrain_distance[:, t], len(RANGE_COLORS) + 1)
+        for c, color in enumerate(RANGE_COLORS):
+            data[f'{color}Range{terrain}Time'] = range_time[:, c].astype(np.int32)
+            data[f'{color}Range{terrain}Distance'] = range_distance[:, c].astype(np.float32)
+
+    hours = np.maximum(movement_time, 1) / 3600.0
+    average_speed = np.minimum(total_distance / hours, 110.0)
+    data['averageSpeed'] = average_speed.astype(np.int32)
+    data['maxSpeed'] = (average_speed * rng.uniform(1.1, 1.8, n_rows)).clip(max=130).astype(np.int32)
+    data['averageRPM'] = rng.normal(1300, 150, n_rows).astype(np.int32)
+    data['maxRPM'] = (data['averageRPM'] * rng.uniform(1.2, 1.8, n_rows)).astype(np.int32)
+    data['engineRotationTime'] = (total_time * rng.uniform(0.85, 1.0, n_rows)).astype(np.int32)
+    data['motorBreakTime'] = (movement_time * rng.beta(1.0, 20.0, n_rows)).astype(np.int32)
+    data['clutchPedalUsageKM'] = rng.poisson(2.0, n_rows).astype(np.int32)
+    data['brakePedalUsageKM'] = rng.poisson(3.0, n_rows).astype(np.int32)
+
+    # Eventos esparsos; percurso_com_evento marca viagens com qualquer evento
+    any_event = np.zeros(n_rows, dtype=bool)
+    for column in CRITICAL_EVENT_COLUMNS + OTHER_EVENT_COLUMNS:
+        counts = rng.poisson(0.05, n_rows).astype(np.int32)
+        data[column] = counts
+        any_event |= counts > 0
+    data['percurso_com_evento'] = any_event
+
+    return pd.DataFrame(data)
+
+
+def make_app_frame(n_rows, operation=DEFAULT_OPERATION, seed=0, **kwargs):
+    """Viagens das top placas já enriquecidas, como o app mantém em memória"""
+    plate_model_map = plate_to_model_by_operation[operation]
+    trips = make_trips(n_rows, operation=operation, seed=seed, other_plates=0, **kwargs)
+    trips['plate'] = trips['plate'].astype('category')
+    return derive_columns(trips, plate_model_map)
+
+
+def write_dataset(trips, folder, row_group_rows=None):
+    """Grava as viagens em folder no layout do preprocess_data.py (ordenado, com _metadata)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from preprocess_data import ROW_GROUP_ROWS, write_sorted_dataset
+
+    table = pa.Table.from_pandas(trips, preserve_index=False)
+    table = table.cast(pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_large_string(field.type) else field
+        for field in table.schema
+    ]))
+    plate_counts = {item['values']: item['counts'] for item in pc.value_counts(table.column('plate')).to_pylist()}
+    return write_sorted_dataset(
+        table.to_batches(), table.schema, plate_counts, folder,
+        row_group_rows=row_group_rows or ROW_GROUP_ROWS
+    )
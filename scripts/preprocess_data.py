@@ -1,8 +1,19 @@
-import pandas as pd
-import numpy as np
-import gdown
+import argparse
+import hashlib
+import json
 import os
+import resource
 import shutil
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.json as pj
+import pyarrow.parquet as pq
 
 # --- CONFIGURAÇÃO ---
 # Seus IDs do Drive
@@ -18,92 +29,693 @@ DATASETS = {
 OUTPUT_DIR = "data/processed"
 TEMP_DIR = "temp_raw_data"
 
-def optimize_dataframe(df):
+# Leitura em blocos: a memória fica limitada pelo bloco, não pelo arquivo
+BLOCK_SIZE_MB = 32
+# Row groups pequenos o bastante para uma placa ocupar poucos deles
+# (ver benchmarks/bench_layout.py)
+ROW_GROUP_ROWS = 16_384
+# Cada parte fica abaixo do limite de 100MB do GitHub
+MAX_PART_MB = 90
+
+# Ordenação das linhas: consultas por placa e por período leem poucos row groups.
+# As colunas de ordenação ficam como texto no Parquet (com dictionary encoding nas
+# páginas): o pyarrow não usa as estatísticas min/max de colunas dictionary para
+# pular row groups.
+SORT_COLUMNS = ['plate', 'endTime']
+# Linhas ordenadas em memória de uma vez (faixas de placas com até esse total)
+SORT_BUFFER_ROWS = 500_000
+
+# Texto vira categoria se tiver menos de 50% de valores únicos (mesma regra de antes).
+# Acima deste número de valores distintos a contagem para: não vale categoria.
+CATEGORY_UNIQUE_RATIO = 0.5
+CATEGORY_MAX_TRACKED = 1_000_000
+
+INT32_MIN, INT32_MAX = -2147483648, 2147483647
+
+# Ingestão incremental: o manifesto registra cada JSON já ingerido (hash e faixa
+# de endTime). O "version" dele é o token que o app usa para invalidar o cache.
+MANIFEST_FILE = "_manifest.json"
+# Partes menores que isso são juntadas quando houver pelo menos COMPACT_MIN_PARTS delas
+COMPACT_PART_MB = 8
+COMPACT_MIN_PARTS = 8
+
+
+def iter_json_blocks(raw_path, block_size):
+    """Lê o JSON lines em blocos de ~block_size bytes, sempre terminando numa linha completa"""
+    with open(raw_path, 'rb') as handle:
+        remainder = b''
+        while True:
+            chunk = handle.read(block_size)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            cut = chunk.rfind(b'\n') + 1
+            if cut == 0:
+                # Linha maior que o bloco: continua acumulando
+                remainder = chunk
+                continue
+            remainder = chunk[cut:]
+            yield chunk[:cut]
+        if remainder.strip():
+            yield remainder
+
+
+class ColumnStats:
+    """Estatísticas de uma coluna acumuladas ao longo dos blocos"""
+
+    def __init__(self):
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.counts = {}
+        self.too_many_uniques = False
+
+    def update(self, column):
+        self.nulls += column.null_count
+        if pa.types.is_integer(column.type) or pa.types.is_string(column.type):
+            bounds = pc.min_max(column).as_py()
+            if bounds['min'] is not None:
+                self.min = bounds['min'] if self.min is None else min(self.min, bounds['min'])
+                self.max = bounds['max'] if self.max is None else max(self.max, bounds['max'])
+        if pa.types.is_string(column.type) and not self.too_many_uniques:
+            for item in pc.value_counts(column).to_pylist():
+                self.counts[item['values']] = self.counts.get(item['values'], 0) + item['counts']
+            if len(self.counts) > CATEGORY_MAX_TRACKED:
+                self.too_many_uniques = True
+                self.counts = {}
+
+
+def scan_schema(raw_path, block_size):
+    """1ª passada: tipos de origem unificados entre blocos + estatísticas por coluna"""
+    schema = None
+    stats = {}
+    n_rows = 0
+    for block in iter_json_blocks(raw_path, block_size):
+        table = pj.read_json(pa.BufferReader(block))
+        n_rows += table.num_rows
+
+        # Datas ISO continuam texto (o app fatia endTime como string)
+        block_schema = pa.schema([
+            pa.field(f.name, pa.string()) if pa.types.is_timestamp(f.type) else f
+            for f in table.schema
+        ])
+        table = table.cast(block_schema)
+        schema = block_schema if schema is None else pa.unify_schemas(
+            [schema, block_schema], promote_options='permissive'
+        )
+
+        for name in table.column_names:
+            stats.setdefault(name, ColumnStats()).update(table.column(name))
+
+    return schema, stats, n_rows
+
+
+def downcast_field(field, column_stats, n_rows):
+    """Tipo de destino de uma coluna (mesmas regras do optimize_dataframe anterior)"""
+    source = field.type
+    if pa.types.is_floating(source):
+        return pa.field(field.name, pa.float32())
+
+    if pa.types.is_integer(source):
+        # Inteiros com nulos viravam float no pandas
+        if column_stats.nulls > 0:
+            return pa.field(field.name, pa.float32())
+        if column_stats.min is not None and INT32_MIN < column_stats.min and column_stats.max < INT32_MAX:
+            return pa.field(field.name, pa.int32())
+        return field
+
+    if pa.types.is_string(source) and field.name not in SORT_COLUMNS and not column_stats.too_many_uniques:
+        num_unique = len(column_stats.counts)
+        if n_rows > 0 and num_unique / n_rows < CATEGORY_UNIQUE_RATIO:
+            index_type = pa.int16() if num_unique < 2**15 else pa.int32()
+            return pa.field(field.name, pa.dictionary(index_type, pa.string()))
+
+    return field
+
+
+def target_schema(source_schema, stats, n_rows):
+    """Esquema final, estável para todas as partes do dataset"""
+    return pa.schema([downcast_field(f, stats[f.name], n_rows) for f in source_schema])
+
+
+def iter_batches(raw_path, source_schema, block_size):
+    """2ª passada: blocos lidos com o esquema de origem fixo
+
+    Usa os mesmos blocos da 1ª passada em vez de pyarrow.json.open_json, cuja
+    memória cresce com o tamanho do arquivo.
     """
-    Reduz o uso de memória convertendo tipos de dados.
+    parse_options = pj.ParseOptions(explicit_schema=source_schema, unexpected_field_behavior='ignore')
+    for block in iter_json_blocks(raw_path, block_size):
+        table = pj.read_json(pa.BufferReader(block), parse_options=parse_options)
+        yield from table.to_batches()
+
+
+class PartWriter:
+    """Escreve row groups de tamanho fixo em partes Parquet, abrindo uma nova parte ao atingir o limite de tamanho"""
+
+    def __init__(self, folder, schema, max_part_bytes, row_group_rows, first_part=0):
+        self.folder = folder
+        self.schema = schema
+        self.max_part_bytes = max_part_bytes
+        self.row_group_rows = row_group_rows
+        self.first_part = first_part
+        self.parts = []
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def _open(self):
+        path = os.path.join(self.folder, f"part_{self.first_part + len(self.parts)}.parquet")
+        self.parts.append(path)
+        sorting = [
+            pq.SortingColumn(self.schema.get_field_index(col))
+            for col in SORT_COLUMNS if col in self.schema.names
+        ]
+        # compression='zstd' (ótimo equilíbrio de tamanho/velocidade); estatísticas
+        # min/max e dictionary encoding das páginas ficam ligados (padrão do pyarrow)
+        self._writer = pq.ParquetWriter(
+            path, self.schema, compression='zstd', sorting_columns=sorting or None
+        )
+
+    def _flush(self, final=False):
+        if not self._pending:
+            return
+        table = pa.Table.from_batches(self._pending, schema=self.schema)
+        # Só grava row groups completos; o resto espera o próximo lote
+        n_write = table.num_rows if final else table.num_rows - table.num_rows % self.row_group_rows
+        if n_write == 0:
+            return
+
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(table.slice(0, n_write), row_group_size=self.row_group_rows)
+        rest = table.slice(n_write)
+        self._pending = rest.to_batches() if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+        if os.path.getsize(self.parts[-1]) >= self.max_part_bytes:
+            self._writer.close()
+            self._writer = None
+
+    def write(self, batch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush()
+
+    def close(self):
+        self._flush(final=True)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def part_files(folder):
+    """Partes part_<n>.parquet da pasta, em ordem numérica"""
+    parts = [name for name in os.listdir(folder) if name.startswith('part_') and name.endswith('.parquet')]
+    return sorted(parts, key=lambda name: int(name[len('part_'):-len('.parquet')]))
+
+
+def next_part_index(folder):
+    """Número da próxima parte a gravar na pasta"""
+    parts = part_files(folder)
+    return int(parts[-1][len('part_'):-len('.parquet')]) + 1 if parts else 0
+
+
+def write_dataset_metadata(folder, parts=None):
+    """Grava _common_metadata (esquema) e _metadata (row groups e estatísticas das partes)
+
+    Com o _metadata o app planeja a leitura sem abrir o rodapé de cada parte.
+    Só as partes listadas no _metadata são lidas pelo app.
+    """
+    combined = None
+    for name in (part_files(folder) if parts is None else parts):
+        metadata = pq.read_metadata(os.path.join(folder, name))
+        metadata.set_file_path(name)
+        if combined is None:
+            combined = metadata
+        else:
+            combined.append_row_groups(metadata)
+    if combined is None:
+        return
+    # Troca atômica: o app lê o _metadata antigo ou o novo, nunca um pela metade
+    pq.write_metadata(combined.schema.to_arrow_schema(), os.path.join(folder, '_common_metadata.tmp'))
+    os.replace(os.path.join(folder, '_common_metadata.tmp'), os.path.join(folder, '_common_metadata'))
+    combined.write_metadata_file(os.path.join(folder, '_metadata.tmp'))
+    os.replace(os.path.join(folder, '_metadata.tmp'), os.path.join(folder, '_metadata'))
+
+
+def plate_buckets(plate_counts, max_rows):
+    """Divide as placas (em ordem) em faixas contíguas com até max_rows linhas cada"""
+    plates = sorted(plate for plate in plate_counts if plate is not None)
+    buckets = []
+    current = 0
+    bucket = 0
+    for plate in plates:
+        if current and current + plate_counts[plate] > max_rows:
+            bucket += 1
+            current = 0
+        buckets.append(bucket)
+        current += plate_counts[plate]
+    return plates, np.array(buckets, dtype=np.int32), bucket + 1
+
+
+def spill_to_buckets(batches, schema, plate_counts, spill_folder, max_rows):
+    """Separa as linhas em arquivos Arrow por faixa de placas (ordenação externa)"""
+    os.makedirs(spill_folder, exist_ok=True)
+    plates, bucket_of_plate, n_buckets = plate_buckets(plate_counts, max_rows)
+    # Placa nula vai para a última faixa (fica no fim da ordenação)
+    bucket_of_plate = np.append(bucket_of_plate, n_buckets - 1)
+    plate_values = pa.array(plates, type=pa.string())
+
+    paths = [os.path.join(spill_folder, f"bucket_{i}.arrow") for i in range(n_buckets)]
+    writers = [None] * n_buckets
+    try:
+        for batch in batches:
+            if 'plate' in schema.names and n_buckets > 1:
+                position = pc.index_in(batch.column('plate'), value_set=plate_values)
+                position = position.fill_null(len(plates)).to_numpy(zero_copy_only=False)
+                bucket = bucket_of_plate[position]
+            else:
+                bucket = np.zeros(batch.num_rows, dtype=np.int32)
+
+            for i in np.unique(bucket):
+                if writers[i] is None:
+                    # Formato stream: aceita dicionários diferentes a cada lote
+                    writers[i] = pa.ipc.new_stream(paths[i], schema)
+                writers[i].write_batch(batch.filter(pa.array(bucket == i)))
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+
+    return [path for path, writer in zip(paths, writers) if writer is not None]
+
+
+def sort_table(table):
+    """Ordena por placa e horário de fim (nulos no fim)"""
+    keys = [(col, 'ascending') for col in SORT_COLUMNS if col in table.column_names]
+    if not keys:
+        return table
+    key_table = pa.table({
+        col: table.column(col).cast(pa.string()) if pa.types.is_dictionary(table.schema.field(col).type)
+        else table.column(col)
+        for col, _ in keys
+    })
+    return table.take(pc.sort_indices(key_table, sort_keys=keys))
+
+
+def write_sorted_parts(batches, schema, plate_counts, folder, first_part=0, max_part_mb=MAX_PART_MB,
+                       row_group_rows=ROW_GROUP_ROWS, sort_buffer_rows=SORT_BUFFER_ROWS):
+    """Grava as linhas ordenadas por (plate, endTime) em novas partes, a partir de part_<first_part>"""
+    spill_folder = os.path.join(folder, '_spill')
+    bucket_paths = spill_to_buckets(batches, schema, plate_counts, spill_folder, sort_buffer_rows)
+
+    writer = PartWriter(folder, schema, max_part_mb * 1024**2, row_group_rows, first_part=first_part)
+    for path in bucket_paths:
+        with pa.memory_map(path) as source:
+            table = sort_table(pa.ipc.open_stream(source).read_all())
+        for batch in table.to_batches(max_chunksize=row_group_rows):
+            writer.write(batch)
+        del table
+    writer.close()
+    shutil.rmtree(spill_folder)
+    return writer.parts
+
+
+def write_sorted_dataset(batches, schema, plate_counts, dataset_folder, max_part_mb=MAX_PART_MB,
+                         row_group_rows=ROW_GROUP_ROWS, sort_buffer_rows=SORT_BUFFER_ROWS, manifest=None):
+    """Grava o dataset ordenado por (plate, endTime), com row groups de tamanho fixo e _metadata
+
+    Escreve numa pasta temporária e troca no fim: o app nunca vê uma versão pela metade.
     """
-    # 1. Converter Floats de 64 bits para 32 bits
-    for col in df.select_dtypes(include=['float64']).columns:
-        df[col] = df[col].astype('float32')
-    
-    # 2. Converter Ints de 64 bits para 32 bits (se couber)
-    for col in df.select_dtypes(include=['int64']).columns:
-        if df[col].max() < 2147483647 and df[col].min() > -2147483648:
-            df[col] = df[col].astype('int32')
-
-    # 3. Converter Strings repetitivas em Categorias
-    # Se uma coluna de texto tem menos de 50% de valores únicos, vale a pena virar Categoria
-    for col in df.select_dtypes(include=['object']).columns:
-        num_unique_values = len(df[col].unique())
-        num_total_values = len(df[col])
-        if num_unique_values / num_total_values < 0.5:
-            df[col] = df[col].astype('category')
-            
-    return df
-
-def process_datasets():
+    staging_folder = dataset_folder + ".tmp"
+    if os.path.exists(staging_folder):
+        shutil.rmtree(staging_folder)
+    os.makedirs(staging_folder)
+
+    parts = write_sorted_parts(
+        batches, schema, plate_counts, staging_folder,
+        max_part_mb=max_part_mb, row_group_rows=row_group_rows, sort_buffer_rows=sort_buffer_rows
+    )
+    write_dataset_metadata(staging_folder)
+    if manifest is not None:
+        save_manifest(staging_folder, manifest)
+
+    if os.path.exists(dataset_folder):
+        shutil.rmtree(dataset_folder)  # Limpa versão anterior
+    os.rename(staging_folder, dataset_folder)
+    return [os.path.join(dataset_folder, os.path.basename(path)) for path in parts]
+
+
+def file_sha256(path, chunk_size=8 * 1024**2):
+    """Hash do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(folder):
+    """Manifesto da ingestão do dataset (None se a pasta não tiver um)"""
+    path = os.path.join(folder, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_manifest(folder, manifest):
+    """Grava o manifesto (escrita atômica)"""
+    path = os.path.join(folder, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as handle:
+        json.dump(manifest, handle, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def next_manifest(previous, source=None, rows=None, max_end_time=None):
+    """Nova versão do manifesto, com a fonte ingerida (se houver) registrada"""
+    manifest = dict(previous) if previous else {'version': 0, 'rows': 0, 'max_end_time': None, 'sources': []}
+    manifest['version'] += 1
+    manifest['updated_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    if rows is not None:
+        manifest['rows'] = rows
+    if max_end_time is not None:
+        manifest['max_end_time'] = max(filter(None, [manifest['max_end_time'], max_end_time]))
+    if source is not None:
+        manifest['sources'] = manifest['sources'] + [source]
+    return manifest
+
+
+def source_entry(raw_path, sha256, rows, min_end_time, max_end_time):
+    """Registro de um JSON ingerido: hash e faixa de endTime das linhas gravadas"""
+    return {
+        'file': os.path.basename(raw_path),
+        'sha256': sha256,
+        'bytes': os.path.getsize(raw_path),
+        'rows': rows,
+        'min_end_time': min_end_time,
+        'max_end_time': max_end_time,
+        'ingested_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+    }
+
+
+def peak_memory_mb():
+    """Pico de memória residente do processo (ru_maxrss é em KB no Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def download_dataset(name, file_id, raw_path, refresh=False):
+    """Baixa o JSON do Drive, se ainda não estiver em cache (ou sempre, com refresh)"""
+    if os.path.exists(raw_path) and not refresh:
+        print(f"📂 [{name}] Arquivo já existe em cache: {raw_path}")
+        return
+
+    import gdown
+
+    print(f"📥 [{name}] Baixando do Drive (ID: {file_id})...")
+    url = f'https://drive.google.com/uc?id={file_id}'
+    gdown.download(url, raw_path, quiet=True, fuzzy=True)
+
+
+def convert_dataset(name, raw_path, output_dir=OUTPUT_DIR, block_size_mb=BLOCK_SIZE_MB,
+                    max_part_mb=MAX_PART_MB, row_group_rows=ROW_GROUP_ROWS):
+    """Converte um JSON lines em Parquet particionado, em streaming"""
+    start = time.perf_counter()
+    block_size = int(block_size_mb * 1024**2)
+
+    print(f"📖 [{name}] 1ª passada: inferindo o esquema...")
+    source_schema, stats, n_rows = scan_schema(raw_path, block_size)
+    schema = target_schema(source_schema, stats, n_rows)
+    categories = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+    print(f"   [{name}] {n_rows:,} linhas, {len(schema)} colunas, categorias: {categories}")
+
+    dataset_folder = os.path.join(output_dir, name)
+    # Conversão completa substitui o histórico; a versão continua subindo (token do app)
+    previous = load_manifest(dataset_folder)
+    end_time = stats.get('endTime', ColumnStats())
+    manifest = next_manifest(
+        {'version': previous['version'] if previous else 0, 'rows': 0, 'max_end_time': None, 'sources': []},
+        source=source_entry(raw_path, file_sha256(raw_path), n_rows, end_time.min, end_time.max),
+        rows=n_rows, max_end_time=end_time.max
+    )
+
+    print(f"💾 [{name}] 2ª passada: gravando Parquet ordenado em {dataset_folder}/")
+    parts = write_sorted_dataset(
+        (batch.cast(schema) for batch in iter_batches(raw_path, source_schema, block_size)),
+        schema, stats['plate'].counts if 'plate' in stats else {}, dataset_folder,
+        max_part_mb=max_part_mb, row_group_rows=row_group_rows, manifest=manifest
+    )
+
+    return conversion_report(name, n_rows, start, os.path.getsize(raw_path), parts)
+
+
+def relayout_dataset(name, output_dir=OUTPUT_DIR, max_part_mb=MAX_PART_MB, row_group_rows=ROW_GROUP_ROWS):
+    """Reorganiza um dataset já processado no layout ordenado (sem baixar o JSON)"""
+    start = time.perf_counter()
+    dataset_folder = os.path.join(output_dir, name)
+    source = ds.dataset(dataset_folder, format='parquet')
+    schema = pa.schema([
+        pa.field(f.name, pa.string()) if f.name in SORT_COLUMNS and pa.types.is_dictionary(f.type) else f
+        for f in source.schema
+    ])
+
+    plate_counts = {}
+    if 'plate' in schema.names:
+        plates = source.to_table(columns=['plate']).column('plate').cast(pa.string())
+        plate_counts = {item['values']: item['counts'] for item in pc.value_counts(plates).to_pylist()}
+    input_bytes = sum(os.path.getsize(path) for path in source.files)
+    n_rows = source.count_rows()
+
+    # Mantém o histórico de ingestão; sem manifesto, a marca d'água vem dos dados
+    max_end_time = None
+    if 'endTime' in schema.names:
+        max_end_time = pc.max(source.to_table(columns=['endTime']).column('endTime').cast(pa.string())).as_py()
+    manifest = next_manifest(load_manifest(dataset_folder), rows=n_rows, max_end_time=max_end_time)
+
+    print(f"💾 [{name}] Reorganizando {n_rows:,} linhas em {dataset_folder}/")
+    parts = write_sorted_dataset(
+        (batch.cast(schema) for batch in source.to_batches()),
+        schema, plate_counts, dataset_folder,
+        max_part_mb=max_part_mb, row_group_rows=row_group_rows, manifest=manifest
+    )
+    return conversion_report(name, n_rows, start, input_bytes, parts)
+
+
+def parse_schema_for(schema):
+    """Esquema de leitura do JSON equivalente ao esquema gravado (tipos antes do downcast)"""
+    fields = []
+    for field in schema:
+        field_type = field.type
+        if pa.types.is_dictionary(field_type):
+            field_type = field_type.value_type
+        elif pa.types.is_floating(field_type):
+            field_type = pa.float64()
+        elif pa.types.is_integer(field_type):
+            field_type = pa.int64()
+        fields.append(pa.field(field.name, field_type))
+    return pa.schema(fields)
+
+
+def iter_new_rows(raw_path, parse_schema, watermark, block_size):
+    """Lotes só com as linhas de endTime posterior à marca d'água (linhas sem endTime ficam de fora)"""
+    for batch in iter_batches(raw_path, parse_schema, block_size):
+        end_time = batch.column('endTime')
+        keep = pc.is_valid(end_time) if watermark is None else pc.greater(end_time, watermark)
+        batch = batch.filter(keep.fill_null(False))
+        if batch.num_rows:
+            yield batch
+
+
+def compact_parts(folder, schema, max_part_mb=MAX_PART_MB, row_group_rows=ROW_GROUP_ROWS):
+    """Junta as partes pequenas (deixadas pelas ingestões incrementais) em partes ordenadas"""
+    small = [name for name in part_files(folder)
+             if os.path.getsize(os.path.join(folder, name)) < COMPACT_PART_MB * 1024**2]
+    if len(small) < 2:
+        return []
+
+    source = ds.dataset([os.path.join(folder, name) for name in small], schema=schema, format='parquet')
+    plate_counts = {}
+    if 'plate' in schema.names:
+        plates = source.to_table(columns=['plate']).column('plate')
+        plate_counts = {item['values']: item['counts'] for item in pc.value_counts(plates).to_pylist()}
+
+    new_parts = write_sorted_parts(
+        source.to_batches(), schema, plate_counts, folder, first_part=next_part_index(folder),
+        max_part_mb=max_part_mb, row_group_rows=row_group_rows
+    )
+    # O _metadata passa a apontar para as partes novas antes de apagar as antigas
+    keep = [name for name in part_files(folder) if name not in small]
+    write_dataset_metadata(folder, keep)
+    for name in small:
+        os.remove(os.path.join(folder, name))
+    return new_parts
+
+
+def append_dataset(name, raw_path, output_dir=OUTPUT_DIR, block_size_mb=BLOCK_SIZE_MB, compact=False,
+                   max_part_mb=MAX_PART_MB, row_group_rows=ROW_GROUP_ROWS):
+    """Ingestão incremental: grava em partes novas só as viagens ainda não ingeridas"""
+    start = time.perf_counter()
+    block_size = int(block_size_mb * 1024**2)
+    dataset_folder = os.path.join(output_dir, name)
+
+    manifest = load_manifest(dataset_folder)
+    if manifest is None:
+        print(f"🆕 [{name}] Sem manifesto de ingestão: conversão completa")
+        return convert_dataset(name, raw_path, output_dir, block_size_mb, max_part_mb, row_group_rows)
+
+    sha256 = file_sha256(raw_path)
+    schema = pq.read_schema(os.path.join(dataset_folder, '_common_metadata'))
+    parts = []
+    n_new = 0
+    if any(source['sha256'] == sha256 for source in manifest['sources']):
+        print(f"⏭️ [{name}] Arquivo já ingerido (sha256 {sha256[:12]}), nada novo")
+        source = None
+    else:
+        watermark = manifest['max_end_time']
+        parse_schema = parse_schema_for(schema)
+        print(f"📖 [{name}] Procurando viagens com endTime > {watermark}...")
+
+        plate_counts = {}
+        min_end_time = max_end_time = None
+        for batch in iter_new_rows(raw_path, parse_schema, watermark, block_size):
+            n_new += batch.num_rows
+            for item in pc.value_counts(batch.column('plate')).to_pylist():
+                plate_counts[item['values']] = plate_counts.get(item['values'], 0) + item['counts']
+            bounds = pc.min_max(batch.column('endTime')).as_py()
+            min_end_time = min(filter(None, [min_end_time, bounds['min']]))
+            max_end_time = max(filter(None, [max_end_time, bounds['max']]))
+
+        if n_new:
+            print(f"💾 [{name}] Gravando {n_new:,} viagens novas em {dataset_folder}/")
+            parts = write_sorted_parts(
+                (batch.cast(schema) for batch in iter_new_rows(raw_path, parse_schema, watermark, block_size)),
+                schema, plate_counts, dataset_folder, first_part=next_part_index(dataset_folder),
+                max_part_mb=max_part_mb, row_group_rows=row_group_rows
+            )
+            write_dataset_metadata(dataset_folder)
+        else:
+            print(f"⏭️ [{name}] Nenhuma viagem depois de {watermark}")
+        source = source_entry(raw_path, sha256, n_new, min_end_time, max_end_time)
+
+    small_parts = [name for name in part_files(dataset_folder)
+                   if os.path.getsize(os.path.join(dataset_folder, name)) < COMPACT_PART_MB * 1024**2]
+    if compact or len(small_parts) >= COMPACT_MIN_PARTS:
+        print(f"🗜️ [{name}] Compactando {len(small_parts)} partes pequenas...")
+        compacted = compact_parts(dataset_folder, schema, max_part_mb, row_group_rows)
+        parts = [path for path in parts if os.path.exists(path)] + compacted
+
+    if source is not None or parts:
+        save_manifest(dataset_folder, next_manifest(
+            manifest, source=source, rows=manifest['rows'] + n_new,
+            max_end_time=source['max_end_time'] if source else None
+        ))
+    return conversion_report(name, n_new, start, os.path.getsize(raw_path), parts)
+
+
+def conversion_report(name, n_rows, start, input_bytes, parts):
+    """Loga as partes gravadas e devolve as métricas da conversão"""
+    elapsed = time.perf_counter() - start
+    part_sizes = [os.path.getsize(path) / 1024**2 for path in parts]
+    for path, size_mb in zip(parts, part_sizes):
+        print(f"   -> [{name}] {os.path.basename(path)}: {size_mb:.2f} MB")
+
+    return {
+        'name': name,
+        'rows': n_rows,
+        'seconds': elapsed,
+        'rows_per_second': n_rows / elapsed if elapsed > 0 else 0.0,
+        'raw_mb': input_bytes / 1024**2,
+        'parquet_mb': sum(part_sizes),
+        'parts': len(part_sizes),
+        'peak_memory_mb': peak_memory_mb()
+    }
+
+
+def process_dataset(name, file_id, block_size_mb=BLOCK_SIZE_MB, mode='full', compact=False):
+    """Download + conversão de um dataset (roda num processo do pool)"""
+    if mode == 'relayout':
+        return relayout_dataset(name)
+
+    raw_path = os.path.join(TEMP_DIR, f"{name}.json")
+    if mode == 'incremental':
+        # Telemetria nova chega todo dia: baixa sempre e deixa o manifesto decidir
+        download_dataset(name, file_id, raw_path, refresh=True)
+        return append_dataset(name, raw_path, block_size_mb=block_size_mb, compact=compact)
+
+    download_dataset(name, file_id, raw_path)
+    return convert_dataset(name, raw_path, block_size_mb=block_size_mb)
+
+
+def process_datasets(names=None, workers=None, block_size_mb=BLOCK_SIZE_MB, keep_raw=False, mode='full',
+                     compact=False):
     # Cria diretórios necessários
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(TEMP_DIR, exist_ok=True)
 
-    print(f"🚀 Iniciando processamento de {len(DATASETS)} datasets...")
-
-    for name, file_id in DATASETS.items():
-        print(f"\n--- Processando: {name} ---")
-        
-        # 1. Download
-        raw_path = os.path.join(TEMP_DIR, f"{name}.json")
-        if not os.path.exists(raw_path):
-            print(f"📥 Baixando do Drive (ID: {file_id})...")
-            url = f'https://drive.google.com/uc?id={file_id}'
-            gdown.download(url, raw_path, quiet=False, fuzzy=True)
-        else:
-            print(f"📂 Arquivo já existe em cache: {raw_path}")
-
-        # 2. Leitura
-        print("📖 Lendo JSON...")
-        try:
-            df = pd.read_json(raw_path, lines=True)
-        except ValueError as e:
-            print(f"❌ Erro ao ler {name}: {e}")
-            continue
-
-        # 3. Otimização
-        mem_before = df.memory_usage(deep=True).sum() / 1024**2
-        print(f"💾 Memória antes: {mem_before:.2f} MB")
-        
-        df = optimize_dataframe(df)
-        
-        mem_after = df.memory_usage(deep=True).sum() / 1024**2
-        print(f"📉 Memória depois: {mem_after:.2f} MB (Redução de {100-(mem_after/mem_before*100):.1f}%)")
-
-        # 4. Salvamento Particionado (Safety Split)
-        # Vamos dividir em 4 partes para garantir que nada passe de 100MB no GitHub
-        dataset_folder = os.path.join(OUTPUT_DIR, name)
-        if os.path.exists(dataset_folder):
-            shutil.rmtree(dataset_folder) # Limpa versão anterior
-        os.makedirs(dataset_folder)
-
-        print(f"💾 Salvando em Parquet particionado em: {dataset_folder}/")
-        
-        # Divide o dataframe em 4 pedaços iguais
-        chunks = np.array_split(df, 4)
-        
-        for i, chunk in enumerate(chunks):
-            save_path = os.path.join(dataset_folder, f"part_{i}.parquet")
-            # engine='pyarrow' e compression='zstd' (ótimo equilíbrio de tamanho/velocidade)
-            chunk.to_parquet(save_path, engine='pyarrow', compression='zstd')
-            
-            # Check de tamanho
-            size_mb = os.path.getsize(save_path) / (1024*1024)
-            print(f"   -> Parte {i}: {size_mb:.2f} MB")
-            if size_mb > 95:
-                print("   ⚠️ ALERTA: Parte próxima do limite de 100MB do GitHub!")
+    selected = {name: DATASETS[name] for name in (names or DATASETS)}
+    if mode == 'relayout':
+        # Só os datasets que já existem em Parquet
+        selected = {name: file_id for name, file_id in selected.items()
+                    if os.path.isdir(os.path.join(OUTPUT_DIR, name))}
+    workers = workers or min(len(selected), os.cpu_count() or 1)
+    print(f"🚀 Iniciando processamento de {len(selected)} datasets com {workers} processo(s)...")
+
+    results = []
+    # Um processo novo por dataset: o pico de memória medido é só daquele dataset
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = {
+            pool.submit(process_dataset, name, file_id, block_size_mb, mode, compact): name
+            for name, file_id in selected.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Erro ao processar {name}: {e}")
+                continue
+            results.append(result)
+            print(
+                f"✅ [{name}] {result['rows']:,} linhas em {result['seconds']:.1f}s "
+                f"({result['rows_per_second']:,.0f} linhas/s), pico de memória {result['peak_memory_mb']:.0f} MB"
+            )
+
+    if results:
+        print("\n📊 Resumo:")
+        print(f"{'dataset':<24}{'linhas':>12}{'linhas/s':>12}{'origem MB':>10}{'Parquet MB':>12}{'pico MB':>10}")
+        for r in sorted(results, key=lambda r: r['name']):
+            print(
+                f"{r['name']:<24}{r['rows']:>12,}{r['rows_per_second']:>12,.0f}"
+                f"{r['raw_mb']:>10.1f}{r['parquet_mb']:>12.1f}{r['peak_memory_mb']:>10.0f}"
+            )
 
     # Limpeza final
-    print("\n🧹 Limpando arquivos temporários...")
-    shutil.rmtree(TEMP_DIR)
+    if not keep_raw and os.path.isdir(TEMP_DIR):
+        print("\n🧹 Limpando arquivos temporários...")
+        shutil.rmtree(TEMP_DIR)
     print("✅ Processamento concluído com sucesso!")
+    return results
+
 
 if __name__ == "__main__":
-    process_datasets()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Converte os JSON lines de telemetria em Parquet particionado")
+    parser.add_argument("datasets", nargs="*", help=f"Datasets a processar (padrão: todos): {', '.join(DATASETS)}")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument("--block-mb", type=float, default=BLOCK_SIZE_MB, help="Tamanho do bloco de leitura do JSON")
+    parser.add_argument("--keep-raw", action="store_true", help=f"Mantém os JSON baixados em {TEMP_DIR}/")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--incremental", action="store_true",
+                       help="Grava só as viagens novas (pelo manifesto de ingestão) em vez de reconstruir tudo")
+    modes.add_argument("--relayout", action="store_true",
+                       help=f"Só reorganiza os Parquet existentes em {OUTPUT_DIR}/ no layout ordenado")
+    parser.add_argument("--compact", action="store_true",
+                        help="Com --incremental, junta as partes pequenas mesmo abaixo do limite automático")
+    args = parser.parse_args()
+    unknown = [name for name in args.datasets if name not in DATASETS]
+    if unknown:
+        parser.error(f"datasets desconhecidos: {unknown}")
+
+    mode = 'incremental' if args.incremental else 'relayout' if args.relayout else 'full'
+    process_datasets(args.datasets, args.workers, args.block_mb, args.keep_raw, mode, args.compact)
@@ -0,0 +1 @@
+"""Núcleo de processamento do app SmartDrive."""
@@ -0,0 +1,155 @@
+"""Comparação de operações: várias bases carregadas e resumidas em paralelo.
+
+A carga de cada base (leitura do Parquet pelo pyarrow, que libera o GIL, e o
+enriquecimento colunar em numpy) roda numa thread do pool, então o tempo total
+se aproxima do da base mais lenta e não da soma. Threads, e não processos: o
+DataFrame enriquecido volta sem pickle e fica no mesmo cache de recursos da
+visão de uma base só.
+
+O embedding conjunto sorteia a mesma cota de viagens de cada operação e
+normaliza as features de todas juntas, para que as operações fiquem no mesmo
+espaço e a maior não domine o mapa.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from smartdrive.cube import consumption_comparison, summary_metrics
+from smartdrive.features import FeatureMatrix, non_constant_columns
+from smartdrive.instrumentation import instrumented
+from smartdrive.sampling import DEFAULT_SAMPLING_STRATEGY, draw_sample, feature_columns_for
+
+# Classes de eficiência na ordem das colunas da tabela comparativa
+EFFICIENCY_CLASSES = ['Alta Eficiência', 'Média Eficiência', 'Baixa Eficiência']
+
+
+def run_parallel(func, items, max_workers=None, initializer=None):
+    """Aplica func a cada item num pool de threads; retorna {item: resultado} na ordem dos itens
+
+    Uma exceção em qualquer item é relançada aqui, depois que todos terminam.
+    """
+    items = list(items)
+    if not items:
+        return {}
+    # Carga é I/O + numpy (GIL liberado): vale ter mais threads que núcleos
+    max_workers = max_workers or min(len(items), (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer,
+                            thread_name_prefix='smartdrive-comparacao') as pool:
+        results = list(pool.map(func, items))
+    return dict(zip(items, results))
+
+
+def operation_summary(operation, cells, total_rows):
+    """Linha da tabela comparativa: viagens, placas, motoristas, eficiência e eventos"""
+    summary = summary_metrics(cells)
+    with_events = cells['percurso_com_evento'].sum() if 'percurso_com_evento' in cells.columns else np.nan
+    return {
+        'Operação': operation,
+        'Total Original': total_rows,
+        'Após Filtros': summary['trips'],
+        'Placas': summary['plates'],
+        'Motoristas': summary['drivers'],
+        'Efic. Média (km/L)': round(summary['mean_efficiency'], 2),
+        '% com Eventos': round(100 * with_events / summary['trips'], 1) if summary['trips'] else np.nan
+    }
+
+
+def efficiency_class_shares(cells):
+    """% das viagens (com eficiência válida) em cada classe de eficiência"""
+    counts = cells.groupby('efficiency_class', observed=True)['eff_n'].sum()
+    counts = counts.reindex(EFFICIENCY_CLASSES, fill_value=0)
+    total = counts.sum()
+    return (100 * counts / total).round(1) if total > 0 else counts.astype(float) * np.nan
+
+
+def comparison_tables(results):
+    """Tabelas comparativas a partir de {operação: resultado de summarize_operation}
+
+    Retorna (resumo por operação, % por classe de eficiência, consumo por placa).
+    """
+    summary = pd.DataFrame([result['summary'] for result in results.values()]).set_index('Operação')
+    shares = pd.DataFrame(
+        {operation: result['efficiency_shares'] for operation, result in results.items()}
+    ).T.rename_axis(index='Operação', columns=None)
+    plates = pd.concat(
+        [result['consumption'].assign(**{'Operação': operation}) for operation, result in results.items()],
+        ignore_index=True
+    )
+    plates = plates[['Operação'] + [col for col in plates.columns if col != 'Operação']]
+    return summary, shares, plates
+
+
+def summarize_operation(operation, cells, total_rows):
+    """Resumo, classes de eficiência e consumo por placa de uma operação (roda na thread da base)"""
+    return {
+        'summary': operation_summary(operation, cells, total_rows),
+        'efficiency_shares': efficiency_class_shares(cells),
+        'consumption': consumption_comparison(cells)
+    }
+
+
+@instrumented('Comparação: preparação conjunta')
+def prepare_joint_input(frames, sample_size=5000, random_state=42, strategy=DEFAULT_SAMPLING_STRATEGY):
+    """Amostra de cada operação num só espaço de features, no formato de ``prepare_tsne_input``
+
+    frames é {operação: (df, posições filtradas)}; cada operação contribui com até
+    sample_size // len(frames) viagens. working_df ganha a coluna 'operation'.
+    """
+    frames = {operation: item for operation, item in frames.items() if item[0] is not None and len(item[1])}
+    if not frames:
+        return None
+
+    # Só as features presentes em todas as bases
+    feature_columns = None
+    for df, _ in frames.values():
+        columns = feature_columns_for(df)
+        feature_columns = columns if feature_columns is None else [col for col in feature_columns if col in columns]
+    if not feature_columns:
+        return None
+
+    quota = max(1, sample_size // len(frames))
+    parts = []
+    values = []
+    valid_rows = 0
+    for operation, (df, positions) in frames.items():
+        feature_matrix = FeatureMatrix(df, positions, feature_columns)
+        if len(feature_matrix) == 0:
+            continue
+        valid_rows += len(feature_matrix)
+        sampled, weights = draw_sample(
+            df, feature_matrix.positions, quota, random_state, strategy, feature_columns, feature_matrix
+        )
+        part = df.take(sampled)
+        part['sample_weight'] = weights
+        part['operation'] = operation
+        parts.append(part)
+        values.append(feature_matrix.rows(sampled))
+    if not parts:
+        return None
+
+    # Placas e categorias diferem entre bases: o concat volta para texto
+    working_df = pd.concat(parts, ignore_index=True)
+    values = np.concatenate(values)
+    keep = non_constant_columns(values)
+    n_samples = len(working_df)
+    if not keep.any() or n_samples < 3:
+        return None
+
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler(copy=False)
+    scaled_features = np.ascontiguousarray(scaler.fit_transform(values[:, keep]))
+
+    perplexity = max(1, min(30, max(5, n_samples // 3), n_samples - 1))
+
+    return {
+        'working_df': working_df,
+        'features': scaled_features,
+        'feature_names': [col for col, kept in zip(feature_columns, keep) if kept],
+        'perplexity': perplexity,
+        'scaler': scaler,
+        'strategy': strategy,
+        'valid_rows': valid_rows
+    }
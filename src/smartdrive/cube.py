@@ -0,0 +1,173 @@
+"""Cubo de agregados para os painéis do dashboard.
+
+O cubo é montado uma vez por carga da base: uma linha por combinação
+observada de placa, motorista, dia, tipo de veículo, classe de eficiência e
+faixa de distância de 1 km, com contagens, somas e somas de quadrados. Os
+painéis respondem às mudanças de filtro somando células em vez de varrer
+as viagens.
+
+A faixa de distância guarda ``floor(totalDistance)`` e se o valor é inteiro
+(``dist_on_edge``), o que torna exatos os limites inteiros do filtro de
+distância. Limites fracionários cortam uma faixa ao meio; nesse caso
+``select_cells`` devolve None e o chamador agrega as viagens filtradas.
+"""
+import numpy as np
+import pandas as pd
+
+from smartdrive.instrumentation import instrumented
+
+CUBE_DIMENSIONS = [
+    'plate', 'driverId', 'day_of_month', 'vehicle_type', 'efficiency_class',
+    'dist_bucket', 'dist_on_edge',
+    # Dependem só da placa: não aumentam o número de células
+    'vehicle_model', 'expected_consumption'
+]
+
+CRITICAL_EVENTS_FOR_RANKING = ['event_FREADA BRUSCA', 'event_ARRANCADA BRUSCA', 'event_EXCESSO DE ROTAÇÃO']
+
+
+def event_columns(columns):
+    """Colunas event_* presentes, na ordem original"""
+    return [col for col in columns if col.startswith('event_')]
+
+
+@instrumented('Cubo: agregação')
+def build_cube(df):
+    """Agrega as viagens nas células do cubo"""
+    efficiency = df['fuel_efficiency'].to_numpy(dtype=float, na_value=np.nan)
+    distance = df['totalDistance'].to_numpy(dtype=float, na_value=np.nan)
+    dist_bucket = np.floor(distance)
+    efficiency_valid = ~np.isnan(efficiency)
+
+    measures = {
+        'n': np.ones(len(df), dtype=np.int64),
+        'eff_n': efficiency_valid.astype(np.int64),
+        'eff_sum': np.where(efficiency_valid, efficiency, 0.0),
+        'eff_sumsq': np.where(efficiency_valid, efficiency ** 2, 0.0),
+        'dist_sum': np.nan_to_num(distance),
+        'dist_sumsq': np.nan_to_num(distance) ** 2
+    }
+    if 'percurso_com_evento' in df.columns:
+        measures['percurso_com_evento'] = df['percurso_com_evento'].to_numpy(dtype=np.int64)
+    for column in event_columns(df.columns):
+        measures[column] = df[column].fillna(0).to_numpy(dtype=np.int64)
+
+    keys = {
+        column: df[column].to_numpy() for column in CUBE_DIMENSIONS
+        if column in df.columns
+    }
+    keys['dist_bucket'] = dist_bucket
+    keys['dist_on_edge'] = dist_bucket == distance
+
+    frame = pd.DataFrame({**keys, **measures})
+    dimensions = list(keys.keys())
+    return frame.groupby(dimensions, dropna=False, observed=True, sort=False).sum().reset_index()
+
+
+@instrumented('Cubo: seleção')
+def select_cells(cube, vehicle_types, efficiency_class, dist_min, dist_max, day_min, day_max):
+    """Células que atendem aos filtros (mesma semântica de apply_filters)
+
+    Retorna None se algum limite de distância não for inteiro (corta uma faixa).
+    """
+    if not (float(dist_min).is_integer() and float(dist_max).is_integer()):
+        return None
+
+    mask = np.ones(len(cube), dtype=bool)
+
+    if vehicle_types and len(vehicle_types) > 0:
+        mask &= cube['vehicle_type'].isin(vehicle_types).to_numpy()
+
+    if efficiency_class != 'Todos':
+        mask &= (cube['efficiency_class'] == efficiency_class).to_numpy()
+
+    bucket = cube['dist_bucket'].to_numpy()
+    mask &= (
+        ((bucket >= dist_min) & (bucket < dist_max))
+        | ((bucket == dist_max) & cube['dist_on_edge'].to_numpy())
+    )
+
+    day = cube['day_of_month'].to_numpy(dtype=float, na_value=np.nan)
+    mask &= (day >= day_min) & (day <= day_max)
+
+    return cube[mask]
+
+
+def _mean(sums, counts):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sums / counts.where(counts > 0)
+
+
+def summary_metrics(cells):
+    """Totais do topo da página: viagens, placas, motoristas e eficiência média"""
+    eff_n = cells['eff_n'].sum()
+    return {
+        'trips': int(cells['n'].sum()),
+        'plates': cells['plate'].nunique(),
+        'drivers': cells['driverId'].nunique(),
+        'mean_efficiency': cells['eff_sum'].sum() / eff_n if eff_n > 0 else np.nan
+    }
+
+
+def type_distribution(cells):
+    """Quantidade e eficiência média por tipo de veículo e classe de eficiência"""
+    grouped = cells.groupby(['vehicle_type', 'efficiency_class'], observed=True)[['n', 'eff_sum', 'eff_n']].sum()
+    table = pd.DataFrame({
+        'Quantidade': grouped['n'],
+        'Eficiência Média (km/L)': _mean(grouped['eff_sum'], grouped['eff_n'])
+    })
+    return table.round(2)
+
+
+def consumption_comparison(cells):
+    """Consumo esperado vs. real médio por placa"""
+    grouped = cells.groupby(
+        ['plate', 'vehicle_type', 'expected_consumption'], observed=True
+    )[['eff_sum', 'eff_n']].sum()
+    table = _mean(grouped['eff_sum'], grouped['eff_n']).rename('fuel_efficiency').reset_index().round(2)
+    table.columns = ['Placa', 'Tipo', 'Consumo Esperado (km/L)', 'Consumo Real Médio (km/L)']
+    table['% do Esperado'] = (
+        (table['Consumo Real Médio (km/L)'] / table['Consumo Esperado (km/L)']) * 100
+    ).round(1)
+    return table.sort_values('% do Esperado', ascending=False)
+
+
+def high_efficiency_analysis(cells, top_n=10):
+    """Top placas e distribuição por tipo entre as viagens de alta eficiência"""
+    high = cells[cells['efficiency_class'] == 'Alta Eficiência']
+    if high.empty:
+        return None, None
+
+    by_plate = high.groupby(['plate', 'vehicle_model', 'vehicle_type'], observed=True)[['eff_sum', 'eff_n']].sum()
+    top_efficient = _mean(by_plate['eff_sum'], by_plate['eff_n']).sort_values(ascending=False).head(top_n)
+
+    by_type = high.groupby('vehicle_type', observed=True)[['eff_sum', 'eff_n']].sum()
+    eff_by_type = pd.DataFrame({
+        'Quantidade': by_type['eff_n'],
+        'Eficiência Média': _mean(by_type['eff_sum'], by_type['eff_n'])
+    }).round(2)
+
+    return top_efficient, eff_by_type
+
+
+def event_analysis(cells, top_n=10):
+    """Totais de eventos, percursos com evento e placas com mais eventos críticos"""
+    totals = cells[event_columns(cells.columns)].sum()
+    totals = totals[totals > 0]
+    event_df = pd.DataFrame({
+        'Evento': [name.replace('event_', '') for name in totals.index],
+        'Total': totals.to_numpy()
+    }).sort_values('Total', ascending=False).head(top_n)
+
+    available_critical = [col for col in CRITICAL_EVENTS_FOR_RANKING if col in cells.columns]
+    top_critical = None
+    if available_critical:
+        per_plate = cells.groupby('plate', observed=True)[available_critical].sum().sum(axis=1)
+        top_critical = per_plate.sort_values(ascending=False).head(top_n)
+
+    return {
+        'trips': int(cells['n'].sum()),
+        'trips_with_events': int(cells['percurso_com_evento'].sum()) if 'percurso_com_evento' in cells.columns else 0,
+        'event_totals': event_df,
+        'top_critical': top_critical
+    }
@@ -0,0 +1,125 @@
+"""Cache de embeddings em dois níveis: LRU em memória e arquivos .npz em disco."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def fingerprint(values):
+    """Hash curto e estável de um valor serializável em JSON"""
+    payload = json.dumps(values, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def array_digest(array):
+    """Hash do conteúdo de um array numpy (formato, tipo e bytes)"""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f"{array.shape}|{array.dtype}".encode('utf-8'))
+    digest.update(array.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+class EmbeddingCache:
+    """Guarda embeddings por chave; compartilhado entre sessões e reinícios do servidor"""
+
+    def __init__(self, cache_dir, max_memory_items=32, max_disk_items=256):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts):
+        """Chave da entrada a partir dos parâmetros que definem o embedding"""
+        return fingerprint(parts)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remember(self, key, embedding):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Retorna o embedding salvo (ou None), promovendo hits de disco para a memória"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with np.load(path) as stored:
+                embedding = stored['embedding']
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+
+        # Atualiza o mtime para a evicção do disco seguir a ordem de uso; outro processo
+        # (fila de jobs, aquecimento) pode ter removido o arquivo depois da leitura
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.stats['disk_hits'] += 1
+            self._remember(key, embedding)
+        return embedding
+
+    def put(self, key, embedding):
+        """Salva o embedding na memória e no disco (escrita atômica)"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, embedding)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez(handle, embedding=embedding)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove os arquivos menos usados além de max_disk_items"""
+        entries = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir) if name.endswith('.npz')
+        ]
+        if len(entries) <= self.max_disk_items:
+            return
+        entries.sort(key=_mtime)
+        for path in entries[:len(entries) - self.max_disk_items]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Esvazia os dois níveis"""
+        with self._lock:
+            self._memory.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,94 @@
+"""Métodos de projeção 2D intercambiáveis (PCA, t-SNE e alternativas escaláveis).
+
+Todos recebem a matriz já normalizada e devolvem um array (n, 2); o restante
+do pipeline (``run_tsne`` e ``create_tsne_plot``) não depende do método.
+openTSNE e umap-learn são opcionais: os métodos só aparecem se o pacote
+estiver instalado.
+"""
+import importlib.util
+
+import numpy as np
+
+from smartdrive.instrumentation import instrumented
+
+
+def _run_pca(features, perplexity, random_state):
+    from sklearn.decomposition import PCA
+
+    return PCA(n_components=2, random_state=random_state).fit_transform(features)
+
+
+def _run_sklearn_tsne(features, perplexity, random_state):
+    from sklearn.manifold import TSNE
+
+    return TSNE(
+        n_components=2,
+        perplexity=perplexity,
+        learning_rate='auto',
+        init='pca',
+        random_state=random_state,
+        n_jobs=-1
+    ).fit_transform(features)
+
+
+def _run_fft_tsne(features, perplexity, random_state):
+    from openTSNE import TSNE
+
+    # Interpolação por FFT no gradiente: escala para 100k+ pontos
+    embedding = TSNE(
+        n_components=2,
+        perplexity=perplexity,
+        initialization='pca',
+        negative_gradient_method='fft',
+        random_state=random_state,
+        n_jobs=-1
+    ).fit(features)
+    return np.asarray(embedding)
+
+
+def _run_umap(features, perplexity, random_state):
+    from umap import UMAP
+
+    # n_neighbors faz o papel da perplexidade no UMAP
+    n_neighbors = int(max(2, min(perplexity, 50, features.shape[0] - 1)))
+    return UMAP(
+        n_components=2,
+        n_neighbors=n_neighbors,
+        min_dist=0.1,
+        random_state=random_state
+    ).fit_transform(features)
+
+
+# Métodos disponíveis: chave -> nome exibido, função e pacote opcional necessário
+EMBEDDING_METHODS = {
+    'pca': {'label': 'PCA (prévia instantânea)', 'run': _run_pca, 'requires': None},
+    'tsne': {'label': 't-SNE (scikit-learn, multi-core)', 'run': _run_sklearn_tsne, 'requires': None},
+    'fft_tsne': {'label': 't-SNE FFT (openTSNE)', 'run': _run_fft_tsne, 'requires': 'openTSNE'},
+    'umap': {'label': 'UMAP (umap-learn)', 'run': _run_umap, 'requires': 'umap'}
+}
+
+DEFAULT_EMBEDDING_METHOD = 'tsne'
+
+
+def is_method_available(method):
+    """Verifica se o pacote opcional do método está instalado"""
+    requires = EMBEDDING_METHODS[method]['requires']
+    return requires is None or importlib.util.find_spec(requires) is not None
+
+
+def available_methods():
+    """Métodos cujo pacote está instalado, na ordem de EMBEDDING_METHODS"""
+    return [method for method in EMBEDDING_METHODS if is_method_available(method)]
+
+
+@instrumented('Embedding')
+def compute_embedding(features, method=DEFAULT_EMBEDDING_METHOD, perplexity=30, random_state=42):
+    """Projeta a matriz normalizada em 2D com o método escolhido"""
+    if method not in EMBEDDING_METHODS:
+        raise ValueError(f"Método de projeção desconhecido: {method}")
+    if not is_method_available(method):
+        raise ImportError(
+            f"O método '{method}' requer o pacote '{EMBEDDING_METHODS[method]['requires']}'"
+        )
+    embedding = EMBEDDING_METHODS[method]['run'](features, perplexity, random_state)
+    return np.asarray(embedding, dtype=np.float32)
@@ -0,0 +1,216 @@
+"""Enriquecimento das viagens (tipo de veículo, eficiência e evento dominante).
+
+As funções linha a linha são a referência semântica; o pipeline do app usa
+``enrich_trips``, que calcula as mesmas colunas de forma colunar.
+"""
+import numpy as np
+import pandas as pd
+
+from smartdrive.instrumentation import instrumented
+from smartdrive.mappings import plate_to_vehicle_info
+
+# Colunas de tempo na ordem de desempate usada por identify_dominant_event
+TIME_EVENT_COLUMNS = {
+    'Movimento': 'movementTime',
+    'Parado': 'stoppedTime',
+    'Subida': 'ascendingTime',
+    'Descida': 'descendingTime',
+    'Plano': 'flatTime'
+}
+
+# Eventos críticos verificados por identify_dominant_event_from_columns
+CRITICAL_EVENT_COLUMNS = [
+    'event_FREADA BRUSCA',
+    'event_ARRANCADA BRUSCA',
+    'event_EXCESSO DE ROTAÇÃO',
+    'event_FORÇA G LATERAL FORTE',
+    'event_FORÇA G LATERAL MÉDIA',
+    'event_FORÇA G LATERAL FRACA'
+]
+
+EFFICIENCY_LABELS = np.array(
+    ['Inválido', 'Desconhecido', 'Baixa Eficiência', 'Média Eficiência', 'Alta Eficiência'],
+    dtype=object
+)
+
+
+# Função para classificar veículos por tipo baseado na placa
+def classify_vehicle_type(plate):
+    """Classifica o tipo de veículo baseado na placa"""
+    if pd.isna(plate):
+        return 'Desconhecido'
+    
+    info = plate_to_vehicle_info.get(plate, {'porte': 'Desconhecido'})
+    return info['porte']
+
+
+def get_expected_consumption(plate):
+    """Retorna o consumo esperado para a placa"""
+    if pd.isna(plate):
+        return None
+    
+    info = plate_to_vehicle_info.get(plate, {'consumo_esperado': None})
+    return info['consumo_esperado']
+
+
+# Função para classificar eficiência de combustível
+def classify_fuel_efficiency(efficiency, expected_consumption):
+    """Classifica a eficiência de combustível baseado no consumo esperado"""
+    if pd.isna(efficiency) or efficiency <= 0:
+        return 'Inválido'
+    
+    # Sem consumo esperado válido (nulo, zero ou negativo) não há referência
+    if pd.isna(expected_consumption) or expected_consumption is None or expected_consumption <= 0:
+        return 'Desconhecido'
+    
+    # Calcular % em relação ao esperado
+    # Baixa: < 80% do esperado
+    # Média: 80% a 100% do esperado
+    # Alta: > 100% do esperado
+    percentage = (efficiency / expected_consumption) * 100
+    
+    if percentage < 80:
+        return 'Baixa Eficiência'
+    elif percentage < 100:
+        return 'Média Eficiência'
+    else:
+        return 'Alta Eficiência'
+
+
+def identify_dominant_event(row):
+    """Identifica o evento dominante baseado nos tempos de viagem"""
+    times = {
+        'Movimento': row.get('movementTime', 0),
+        'Parado': row.get('stoppedTime', 0),
+        'Subida': row.get('ascendingTime', 0),
+        'Descida': row.get('descendingTime', 0),
+        'Plano': row.get('flatTime', 0)
+    }
+    
+    # Remover valores nulos ou negativos
+    times = {k: v for k, v in times.items() if v and v > 0}
+    
+    if not times:
+        return 'Desconhecido'
+    
+    # Retornar o evento com maior tempo
+    return max(times, key=times.get)
+
+
+def identify_dominant_event_from_columns(row):
+    """Identifica o evento de direção mais frequente baseado nas colunas agregadas de eventos"""
+    # Primeiro, tentar usar os tempos de viagem
+    dominant_time = identify_dominant_event(row)
+    
+    # Depois, verificar se há eventos críticos de direção
+    event_counts = {}
+    
+    for event_col in CRITICAL_EVENT_COLUMNS:
+        if event_col in row.index and row[event_col] > 0:
+            event_name = event_col.replace('event_', '')
+            event_counts[event_name] = row[event_col]
+    
+    if event_counts:
+        return max(event_counts, key=event_counts.get)
+    
+    return dominant_time
+
+
+# --- Versões colunares (usadas pelo app) ---
+
+def build_vehicle_lookup(vehicle_info=None):
+    """Converte o dicionário de placas em arrays de consulta (porte e consumo esperado)"""
+    if vehicle_info is None:
+        vehicle_info = plate_to_vehicle_info
+
+    plates = pd.Index(list(vehicle_info.keys()))
+    # A última posição guarda o valor padrão; get_indexer devolve -1 para placas desconhecidas
+    portes = np.array(
+        [info['porte'] for info in vehicle_info.values()] + ['Desconhecido'],
+        dtype=object
+    )
+    expected = np.array(
+        [
+            np.nan if info['consumo_esperado'] is None else info['consumo_esperado']
+            for info in vehicle_info.values()
+        ] + [np.nan],
+        dtype=float
+    )
+    return plates, portes, expected
+
+
+def _plate_codes(plates, lookup_plates):
+    """Posição de cada placa no lookup (-1 para placas ausentes ou nulas)"""
+    if isinstance(plates.dtype, pd.CategoricalDtype):
+        # Resolve só as categorias e depois expande pelos códigos
+        category_codes = np.append(lookup_plates.get_indexer(plates.cat.categories), -1)
+        return category_codes[plates.cat.codes.to_numpy()]
+    return lookup_plates.get_indexer(plates)
+
+
+def classify_fuel_efficiency_array(efficiency, expected_consumption):
+    """Versão colunar de classify_fuel_efficiency"""
+    efficiency = np.asarray(efficiency, dtype=float)
+    expected_consumption = np.asarray(expected_consumption, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = (efficiency / expected_consumption) * 100
+
+    codes = np.select(
+        [
+            np.isnan(efficiency) | (efficiency <= 0),
+            np.isnan(expected_consumption) | (expected_consumption <= 0),
+            percentage < 80,
+            percentage < 100
+        ],
+        [0, 1, 2, 3],
+        default=4
+    )
+    return EFFICIENCY_LABELS[codes]
+
+
+def _running_argmax(df, labels_to_columns):
+    """Índice da coluna com maior valor positivo por linha (-1 se nenhuma)"""
+    n_rows = len(df)
+    best = np.zeros(n_rows, dtype=float)
+    best_idx = np.full(n_rows, -1, dtype=np.int8)
+
+    for idx, column in enumerate(labels_to_columns.values()):
+        if column not in df.columns:
+            continue
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        # Comparação estrita: em empate vence a primeira coluna, como no max() original
+        better = values > best
+        best = np.where(better, values, best)
+        best_idx[better] = idx
+
+    return best_idx
+
+
+def identify_dominant_events(df):
+    """Versão colunar de identify_dominant_event_from_columns"""
+    time_labels = np.array(list(TIME_EVENT_COLUMNS.keys()) + ['Desconhecido'], dtype=object)
+    dominant = time_labels[_running_argmax(df, TIME_EVENT_COLUMNS)]
+
+    event_columns = {col.replace('event_', ''): col for col in CRITICAL_EVENT_COLUMNS}
+    event_labels = np.array(list(event_columns.keys()), dtype=object)
+    event_idx = _running_argmax(df, event_columns)
+    has_event = event_idx >= 0
+    dominant[has_event] = event_labels[event_idx[has_event]]
+
+    return pd.Series(dominant, index=df.index, dtype=object)
+
+
+@instrumented('Enriquecimento')
+def enrich_trips(df, vehicle_info=None):
+    """Adiciona vehicle_type, expected_consumption, efficiency_class e dominant_event"""
+    lookup_plates, portes, expected = build_vehicle_lookup(vehicle_info)
+    codes = _plate_codes(df['plate'], lookup_plates)
+
+    df['vehicle_type'] = portes[codes]
+    df['expected_consumption'] = expected[codes]
+    df['efficiency_class'] = classify_fuel_efficiency_array(
+        df['fuel_efficiency'], df['expected_consumption']
+    )
+    df['dominant_event'] = identify_dominant_events(df)
+    return df
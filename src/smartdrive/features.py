@@ -0,0 +1,181 @@
+"""Features numéricas usadas pelas projeções (t-SNE) e a matriz float32 das viagens válidas.
+
+``FeatureMatrix`` monta, numa passada por bloco de linhas (blocos em paralelo
+numa pool de threads; o numpy libera o GIL nas cópias), a matriz float32
+C-contígua das features de uma seleção, já sem as linhas com NaN/inf e com o
+mínimo e o máximo de cada coluna. A mesma matriz serve a qualquer tamanho de
+amostra: ``rows`` só recorta as linhas sorteadas.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Features candidatas do t-SNE (usadas só as presentes na base)
+TSNE_CANDIDATE_FEATURES = [
+    'totalDistance', 'fuelConsumption', 'averageSpeed', 'maxSpeed',
+    'movementTime', 'stoppedTime', 'ascendingTime', 'descendingTime',
+    'flatTime', 'maxRPM', 'averageRPM', 'clutchPedalUsageKM',
+    'brakePedalUsageKM', 'greenRangeAscendingDistance',
+    'yellowRangeAscendingDistance', 'slowGearRangeAscendingDistance',
+    'greenRangeDescendingDistance', 'yellowRangeFlatDistance',
+    'greenRangeFlatDistance', 'slowGearRangeFlatDistance',
+    'ascendingDistance', 'descendingDistance', 'flatDistance',
+    'greenRangeAscendingTime', 'greenRangeDescendingTime', 'greenRangeFlatTime',
+    'yellowRangeAscendingTime', 'yellowRangeDescendingTime', 'yellowRangeFlatTime',
+    'slowGearRangeAscendingTime', 'slowGearRangeDescendingTime', 'slowGearRangeFlatTime',
+    'motorBreakTime', 'engineRotationTime', 'totalTime',
+    'event_FREADA BRUSCA', 'event_ARRANCADA BRUSCA', 'event_EXCESSO DE ROTAÇÃO',
+    'event_FORÇA G LATERAL FORTE', 'event_FORÇA G LATERAL MÉDIA',
+    'percurso_com_evento', 'L_por_100km', 'km_litro'
+]
+
+# Linhas por bloco da montagem da matriz (cada bloco vai para uma thread)
+FEATURE_CHUNK_ROWS = 32768
+
+
+def _column_values(series):
+    """Valores da coluna sem cópia quando já são numéricos numpy; os demais viram float32 com NaN"""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float32, na_value=np.nan)
+
+
+def _take(values, rows):
+    """values[rows], com fatia (sem gather) quando as posições são contíguas"""
+    if len(rows) and rows[-1] - rows[0] == len(rows) - 1:
+        return values[rows[0]:rows[-1] + 1]
+    return values[rows]
+
+
+def _finite_block(sources, positions, start, stop):
+    """Linhas do bloco com todas as features finitas (só colunas float podem ter NaN/inf)"""
+    rows = positions[start:stop]
+    finite = np.ones(len(rows), dtype=bool)
+    for values in sources:
+        if values.dtype.kind == 'f':
+            finite &= np.isfinite(_take(values, rows))
+    return finite
+
+
+def _fill_block(sources, positions, out, start, stop):
+    """Copia um bloco de linhas (já válidas) para out; retorna (linhas, mínimo, máximo, média, M2)
+
+    O bloco é montado coluna a coluna (cópias contíguas, onde também saem as
+    reduções) e transposto uma vez para as linhas C-contíguas de out. Média e
+    M2 (soma dos quadrados dos desvios) em float64, para combinar os blocos.
+    """
+    rows = positions[start:stop]
+    columns = np.empty((len(sources), stop - start), dtype=np.float32)
+    for j, values in enumerate(sources):
+        columns[j] = _take(values, rows)
+    out[start:stop] = columns.T
+    mean = columns.mean(axis=1, dtype=np.float64)
+    # Soma dos quadrados sem temporário; por bloco a perda de precisão em float64 é desprezível
+    m2 = np.einsum('ij,ij->i', columns, columns, dtype=np.float64) - (stop - start) * mean ** 2
+    return stop - start, columns.min(axis=1), columns.max(axis=1), mean, m2
+
+
+def _combine_moments(blocks):
+    """Média e desvio padrão do conjunto a partir de (n, média, M2) de cada bloco (Chan et al.)"""
+    total, mean, m2 = 0, None, None
+    for n, block_mean, block_m2 in blocks:
+        if mean is None:
+            total, mean, m2 = n, block_mean, block_m2
+            continue
+        delta = block_mean - mean
+        combined = total + n
+        mean = mean + delta * n / combined
+        m2 = m2 + block_m2 + delta ** 2 * total * n / combined
+        total = combined
+    return mean, np.sqrt(m2 / total)
+
+
+def _run_blocks(func, n_rows, chunk_rows, max_workers):
+    """Aplica func(start, stop) a cada bloco de linhas, em threads se houver mais de um núcleo"""
+    blocks = [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+    workers = min(len(blocks), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda block: func(*block), blocks))
+    return [func(*block) for block in blocks]
+
+
+class FeatureMatrix:
+    """Features float32 das viagens válidas de uma seleção, montadas uma vez
+
+    positions (ordem crescente) são as linhas da base com todas as features
+    finitas; values[i] é a linha positions[i]. minimum/maximum por coluna
+    permitem achar constantes (mínimo == máximo) sem nunique; mean/std
+    (float64) normalizam a matriz inteira sem outra passada.
+    """
+
+    def __init__(self, df, positions=None, columns=None, chunk_rows=FEATURE_CHUNK_ROWS, max_workers=None):
+        self.columns = list(columns) if columns is not None else [
+            col for col in TSNE_CANDIDATE_FEATURES if col in df.columns
+        ]
+        positions = np.arange(len(df)) if positions is None else np.sort(np.asarray(positions))
+        sources = [_column_values(df[col]) for col in self.columns]
+
+        # 1ª passada: linhas válidas; 2ª: cópia direto para a matriz final (sem compactar)
+        finite = _run_blocks(
+            lambda start, stop: _finite_block(sources, positions, start, stop),
+            len(positions), chunk_rows, max_workers
+        )
+        if finite and not all(block.all() for block in finite):
+            positions = positions[np.concatenate(finite)]
+        self.positions = positions
+
+        self.values = np.empty((len(positions), len(self.columns)), dtype=np.float32)
+        bounds = _run_blocks(
+            lambda start, stop: _fill_block(sources, positions, self.values, start, stop),
+            len(positions), chunk_rows, max_workers
+        )
+        if bounds:
+            self.minimum = np.min([block[1] for block in bounds], axis=0)
+            self.maximum = np.max([block[2] for block in bounds], axis=0)
+            self.mean, self.std = _combine_moments([(block[0], block[3], block[4]) for block in bounds])
+        else:
+            self.minimum = np.full(len(self.columns), np.nan, dtype=np.float32)
+            self.maximum = self.minimum.copy()
+            self.mean = np.full(len(self.columns), np.nan)
+            self.std = self.mean.copy()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def rows(self, positions):
+        """Linhas da matriz para posições da base (todas precisam estar entre as válidas)"""
+        index = np.searchsorted(self.positions, positions)
+        if len(index) and (index.max() >= len(self.positions) or (self.positions[index] != positions).any()):
+            raise KeyError("Posições fora das linhas válidas da matriz de features")
+        return self.values[index]
+
+    def non_constant(self):
+        """Máscara das colunas que variam entre as linhas válidas"""
+        return self.minimum < self.maximum
+
+    def standardized(self, keep=None):
+        """Cópia float32 padronizada (média 0, desvio 1) das linhas, só com as colunas de keep"""
+        keep = self.non_constant() if keep is None else keep
+        values = self.values[:, keep]
+        values -= self.mean[keep].astype(np.float32)
+        values /= self.std[keep].astype(np.float32)
+        return values
+
+
+def non_constant_columns(values):
+    """Máscara das colunas de uma matriz com mínimo < máximo (uma passada, sem nunique)"""
+    if len(values) == 0:
+        return np.zeros(values.shape[1], dtype=bool)
+    return values.min(axis=0) < values.max(axis=0)
+
+
+def standardize(values):
+    """Padroniza as colunas no lugar (float32; média e desvio acumulados em float64)"""
+    mean = values.mean(axis=0, dtype=np.float64)
+    scale = values.std(axis=0, dtype=np.float64)
+    scale[scale == 0] = 1.0
+    values -= mean.astype(values.dtype)
+    values /= scale.astype(values.dtype)
+    return values, mean, scale
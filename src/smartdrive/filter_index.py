@@ -0,0 +1,89 @@
+"""Índice de filtros: bitmaps por categoria e arrays ordenados por faixa.
+
+Montado uma vez por carga da base. A cada rerun, ``select`` combina os
+bitmaps (compactados com ``np.packbits``, 1 bit por viagem) e as faixas de
+distância/dia (busca binária nos valores ordenados) e devolve as posições
+das viagens selecionadas, sem copiar o DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+from smartdrive.instrumentation import stage
+
+
+def _pack(mask):
+    return np.packbits(mask)
+
+
+class FilterIndex:
+    """Seleciona viagens pelos filtros da barra lateral sem copiar a base"""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.vehicle_type_bitmaps = self._category_bitmaps(df['vehicle_type'])
+        self.efficiency_bitmaps = self._category_bitmaps(df['efficiency_class'])
+        self.distance_order, self.distance_sorted = self._sorted(df['totalDistance'])
+        self.day_order, self.day_sorted = self._sorted(df['day_of_month'])
+
+    def _category_bitmaps(self, series):
+        codes, uniques = pd.factorize(series)
+        return {value: _pack(codes == code) for code, value in enumerate(uniques)}
+
+    @staticmethod
+    def _sorted(series):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        # NaN fica no fim e nunca entra numa faixa (como as comparações do pandas)
+        order = np.argsort(values, kind='stable')
+        return order, values[order]
+
+    def _empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def _full(self):
+        return _pack(np.ones(self.n_rows, dtype=bool))
+
+    def _union(self, bitmaps, values):
+        result = self._empty()
+        for value in values:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def _range(self, order, sorted_values, low, high):
+        start = np.searchsorted(sorted_values, low, side='left')
+        stop = np.searchsorted(sorted_values, high, side='right')
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return _pack(mask)
+
+    def mask(self, vehicle_types, efficiency_class, dist_min, dist_max, day_min, day_max):
+        """Máscara booleana das viagens selecionadas (mesma semântica de apply_filters)"""
+        bitmap = self._full()
+
+        # Lista vazia de tipos não filtra (como no app)
+        if vehicle_types and len(vehicle_types) > 0:
+            bitmap &= self._union(self.vehicle_type_bitmaps, vehicle_types)
+
+        if efficiency_class != 'Todos':
+            bitmap &= self._union(self.efficiency_bitmaps, [efficiency_class])
+
+        bitmap &= self._range(self.distance_order, self.distance_sorted, dist_min, dist_max)
+        bitmap &= self._range(self.day_order, self.day_sorted, day_min, day_max)
+
+        return np.unpackbits(bitmap, count=self.n_rows).view(bool)
+
+    def select(self, vehicle_types, efficiency_class, dist_min, dist_max, day_min, day_max):
+        """Posições (iloc) das viagens selecionadas, em ordem crescente"""
+        with stage('Filtros: seleção', self.n_rows) as record:
+            positions = np.flatnonzero(
+                self.mask(vehicle_types, efficiency_class, dist_min, dist_max, day_min, day_max)
+            )
+            record.rows_out = len(positions)
+        return positions
+
+
+def take_rows(df, positions, columns=None):
+    """Copia só as linhas (e colunas) pedidas da base"""
+    if columns is None:
+        return df.take(positions)
+    return df.iloc[positions, [df.columns.get_loc(col) for col in columns]]
@@ -0,0 +1,125 @@
+"""Embedding em dois níveis para a frota inteira: micro-clusters + projeção dos centróides.
+
+MiniBatchKMeans agrupa todas as viagens filtradas em alguns milhares de
+micro-clusters e só os centróides passam pelo t-SNE (ou outro método). Cada
+viagem é posicionada em volta do seu centróide: o resíduo (viagem − centróide)
+é projetado nos dois eixos principais dos resíduos e escalado para caber na
+metade da distância do centróide ao vizinho mais próximo no mapa.
+
+O custo da projeção deixa de depender do número de viagens; o k-means é
+ajustado numa amostra de até FIT_ROWS_PER_CLUSTER linhas por cluster e só
+a atribuição percorre todas as viagens.
+"""
+import numpy as np
+import pandas as pd
+
+from smartdrive.embeddings import DEFAULT_EMBEDDING_METHOD, compute_embedding
+from smartdrive.instrumentation import instrumented
+
+DEFAULT_MICRO_CLUSTERS = 2000
+
+# Cada micro-cluster precisa de alguns pontos para ter centróide e espalhamento
+MIN_POINTS_PER_CLUSTER = 5
+
+# Linhas usadas no ajuste do k-means, por cluster (a atribuição usa todas)
+FIT_ROWS_PER_CLUSTER = 20
+
+# Fração da distância ao centróide vizinho ocupada pelos membros de um cluster
+MEMBER_SPREAD = 0.5
+
+
+@instrumented('Frota: micro-clusters')
+def fit_micro_clusters(features, n_clusters, random_state=42, batch_size=4096):
+    """MiniBatchKMeans ajustado numa amostra; retorna (centróides, rótulo de cada linha)"""
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        # k-means++ com milhares de clusters custa mais que o ajuste; a inicialização
+        # aleatória perde ~3% de inércia
+        init='random',
+        batch_size=batch_size,
+        n_init=1,
+        max_no_improvement=10,
+        random_state=random_state
+    )
+    fit_rows = n_clusters * FIT_ROWS_PER_CLUSTER
+    if len(features) > fit_rows:
+        rng = np.random.default_rng(random_state)
+        kmeans.fit(features[rng.choice(len(features), size=fit_rows, replace=False)])
+    else:
+        kmeans.fit(features)
+    labels = kmeans.predict(features)
+
+    # Clusters sem membros (o k-means em minibatch pode deixar) saem do mapa
+    used, labels = np.unique(labels, return_inverse=True)
+    return kmeans.cluster_centers_[used].astype(np.float32), labels
+
+
+def place_members(features, labels, centroids, centroid_embedding, spread=MEMBER_SPREAD):
+    """Posição 2D de cada viagem: centróide no mapa + resíduo projetado e escalado"""
+    from sklearn.neighbors import NearestNeighbors
+
+    residuals = features - centroids[labels]
+
+    # Dois eixos principais dos resíduos (SVD de uma amostra basta)
+    sample = residuals[:: max(1, len(residuals) // 20000)]
+    _, _, components = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+    offsets = residuals @ components[:2].T
+
+    # Membro mais distante de cada cluster encosta em spread × distância ao vizinho
+    radius = np.zeros(len(centroids), dtype=np.float32)
+    np.maximum.at(radius, labels, np.linalg.norm(offsets, axis=1))
+    if len(centroids) > 1:
+        distances, _ = NearestNeighbors(n_neighbors=2).fit(centroid_embedding).kneighbors(centroid_embedding)
+        room = distances[:, 1]
+    else:
+        room = np.ones(1)
+    scale = np.divide(spread * room, radius, out=np.zeros_like(room, dtype=np.float64), where=radius > 0)
+
+    return (centroid_embedding[labels] + offsets * scale[labels, None]).astype(np.float32)
+
+
+@instrumented('Frota: embedding em dois níveis')
+def hierarchical_embedding(features, n_clusters=DEFAULT_MICRO_CLUSTERS, method=DEFAULT_EMBEDDING_METHOD,
+                           random_state=42):
+    """Micro-clusters, projeção dos centróides e posição de cada viagem (None se houver poucas linhas)"""
+    n_clusters = min(n_clusters, len(features) // MIN_POINTS_PER_CLUSTER)
+    if n_clusters < 3:
+        return None
+
+    centroids, labels = fit_micro_clusters(features, n_clusters, random_state)
+    perplexity = min(30, max(5, len(centroids) // 3), len(centroids) - 1)
+    centroid_embedding = compute_embedding(centroids, method=method, perplexity=perplexity,
+                                           random_state=random_state)
+
+    return {
+        'embedding': place_members(features, labels, centroids, centroid_embedding),
+        'labels': labels,
+        'centroid_embedding': centroid_embedding,
+        'sizes': np.bincount(labels, minlength=len(centroids)),
+        'perplexity': perplexity
+    }
+
+
+def cluster_summary(df, positions, labels, n_clusters):
+    """Resumo por micro-cluster para o hover: viagens, médias, % com evento, placa e evento mais comuns"""
+    members = pd.DataFrame({'cluster': labels})
+    for column in ['fuel_efficiency', 'totalDistance', 'averageSpeed', 'percurso_com_evento']:
+        if column in df.columns:
+            members[column] = df[column].iloc[positions].to_numpy(dtype=float, na_value=np.nan)
+    for column in ['plate', 'dominant_event']:
+        if column in df.columns:
+            members[column] = df[column].iloc[positions].to_numpy()
+
+    grouped = members.groupby('cluster')
+    summary = grouped.size().rename('trips').to_frame()
+    numeric = [col for col in ['fuel_efficiency', 'totalDistance', 'averageSpeed', 'percurso_com_evento']
+               if col in members.columns]
+    summary = summary.join(grouped[numeric].mean())
+    for column in ['plate', 'dominant_event']:
+        if column in members.columns:
+            summary[column] = members.groupby(['cluster', column], observed=True).size() \
+                .sort_values(ascending=False).reset_index(level=column) \
+                .groupby(level=0)[column].first()
+    return summary.reindex(range(n_clusters))
@@ -0,0 +1,90 @@
+"""Cache quente das bases: frame enriquecido em Arrow IPC sem compressão.
+
+Depois da primeira carga, o frame que o app monta (leitura do Parquet +
+enriquecimento) é salvo em ``<pasta>/<base>-<chave>.arrow``. Nas cargas
+seguintes o arquivo é mapeado em memória e convertido para pandas sem
+descomprimir o Parquet nem refazer o enriquecimento.
+
+A chave combina a versão dos dados (partes Parquet/manifesto), o mapeamento
+de placas e ``HOT_CACHE_FORMAT``; qualquer mudança gera outro arquivo e o
+antigo da mesma base é apagado na próxima escrita.
+"""
+import glob
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+
+from smartdrive.embedding_cache import fingerprint
+from smartdrive.instrumentation import instrumented
+
+# Incrementar quando o enriquecimento mudar (invalida os arquivos existentes)
+HOT_CACHE_FORMAT = 1
+
+METADATA_KEY = b'smartdrive'
+
+
+def hot_cache_path(cache_dir, dataset_folder_name, **parts):
+    """Arquivo do cache quente para a base e os parâmetros que definem o frame"""
+    key = fingerprint({'format': HOT_CACHE_FORMAT, 'dataset': dataset_folder_name, **parts})
+    return os.path.join(cache_dir, f"{dataset_folder_name}-{key[:16]}.arrow")
+
+
+@instrumented('Cache quente: leitura')
+def read_frame(path):
+    """Mapeia o arquivo em memória e devolve (DataFrame, metadados), ou None se não existir"""
+    try:
+        source = pa.memory_map(path, 'r')
+    except (FileNotFoundError, OSError):
+        return None
+
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except (pa.ArrowInvalid, OSError):
+        # Arquivo truncado ou de outra versão: ignora e deixa regravar
+        return None
+
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+    # split_blocks evita consolidar as colunas: numéricas sem nulos apontam
+    # direto para o mapeamento (somente leitura, como o frame compartilhado)
+    return table.to_pandas(split_blocks=True), metadata
+
+
+@instrumented('Cache quente: gravação', rows_arg=1)
+def write_frame(path, df, metadata=None):
+    """Salva o frame em Arrow IPC sem compressão (escrita atômica) e remove versões antigas da base
+
+    Retorna False se o frame não puder ser convertido ou gravado.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        return False
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(metadata or {}).encode('utf-8')
+    table = table.replace_schema_metadata(schema_metadata)
+
+    directory = os.path.dirname(path) or '.'
+    tmp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            with pa.ipc.new_file(handle, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    dataset_prefix = os.path.basename(path).rsplit('-', 1)[0]
+    for stale in glob.glob(os.path.join(directory, f"{glob.escape(dataset_prefix)}-*.arrow")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return True
@@ -0,0 +1,186 @@
+"""Instrumentação leve dos estágios de um rerun: tempo, linhas e memória.
+
+Cada rerun com o painel de performance ligado abre um ``Trace`` na thread do
+script. ``stage`` e ``instrumented`` registram o tempo de parede, as linhas de
+entrada e saída e a variação de RSS do processo em cada estágio. Sem trace
+ativo, o custo é uma consulta a um atributo thread-local por chamada.
+
+O RSS vem de /proc/self/statm e é do processo inteiro: com várias sessões
+simultâneas, o delta de um estágio inclui o que as outras alocaram no meio.
+"""
+import cProfile
+import functools
+import json
+import marshal
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_mb():
+    """Memória residente do processo em MB (None fora do Linux)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def row_count(value):
+    """Linhas de um DataFrame/array (ou do primeiro item de uma tupla); None se não se aplica"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class StageRecord:
+    """Um estágio medido; o chamador pode preencher rows_out dentro do bloco"""
+
+    __slots__ = ('name', 'depth', 'rows_in', 'rows_out', 'wall_ms', 'rss_delta_mb')
+
+    def __init__(self, name, depth, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_ms = None
+        self.rss_delta_mb = None
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class _NullStage:
+    """Estágio sem trace ativo: aceita rows_out e descarta"""
+
+    __slots__ = ('rows_out',)
+
+
+class Trace:
+    """Estágios de um rerun, na ordem em que começaram (depth indica o aninhamento)"""
+
+    def __init__(self, label, profile=False):
+        self.label = label
+        self.started_at = time.time()
+        self.records = []
+        self.total_ms = None
+        self._depth = 0
+        self._start = time.perf_counter()
+        self.profiler = cProfile.Profile() if profile else None
+        self.profile_stats = None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.create_stats()
+            self.profile_stats = self.profiler.stats
+            self.profiler = None
+
+    def to_jsonl(self):
+        """Uma linha JSON por estágio (com o rótulo e o início do rerun)"""
+        lines = [
+            json.dumps({'rerun': self.label, 'started_at': self.started_at, **record.as_dict()},
+                       ensure_ascii=False)
+            for record in self.records
+        ]
+        lines.append(json.dumps({
+            'rerun': self.label, 'started_at': self.started_at, 'name': 'total', 'depth': 0,
+            'wall_ms': self.total_ms
+        }, ensure_ascii=False))
+        return '\n'.join(lines) + '\n'
+
+    def profile_bytes(self):
+        """Perfil cProfile no formato de pstats.dump_stats (abre com pstats/snakeviz)"""
+        if self.profile_stats is None:
+            return None
+        return marshal.dumps(self.profile_stats)
+
+
+def clear_trace():
+    """Descarta o trace da thread (ex.: rerun anterior interrompido por st.rerun)"""
+    previous = getattr(_local, 'trace', None)
+    if previous is not None and previous.profiler is not None:
+        previous.profiler.disable()
+    _local.trace = None
+
+
+def start_trace(label, profile=False):
+    """Abre um trace para o rerun atual nesta thread"""
+    clear_trace()
+    _local.trace = Trace(label, profile=profile)
+    return _local.trace
+
+
+def finish_trace(append_to=None):
+    """Fecha o trace da thread; com append_to, acrescenta os estágios ao arquivo JSONL"""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.finish()
+    if append_to:
+        directory = os.path.dirname(append_to)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(append_to, 'a', encoding='utf-8') as handle:
+            handle.write(trace.to_jsonl())
+    return trace
+
+
+def current_trace():
+    """Trace aberto nesta thread (ou None)"""
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Mede um bloco como estágio do trace atual (sem trace, não mede nada)"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        yield _NullStage()
+        return
+
+    record = StageRecord(name, trace._depth, rows_in)
+    trace.records.append(record)
+    rss_before = rss_mb()
+    trace._depth += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.wall_ms = (time.perf_counter() - start) * 1000
+        trace._depth -= 1
+        rss_after = rss_mb()
+        if rss_before is not None and rss_after is not None:
+            record.rss_delta_mb = rss_after - rss_before
+
+
+def instrumented(name=None, rows_arg=0):
+    """Decorator: registra a função como estágio (linhas do argumento rows_arg e do retorno)"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'trace', None) is None:
+                return func(*args, **kwargs)
+            rows_in = row_count(args[rows_arg]) if len(args) > rows_arg else None
+            with stage(stage_name, rows_in) as record:
+                result = func(*args, **kwargs)
+                record.rows_out = row_count(result)
+            return result
+
+        return wrapper
+
+    return decorator
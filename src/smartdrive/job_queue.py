@@ -0,0 +1,244 @@
+"""Fila local de jobs de embedding: SQLite + um processo por job.
+
+Cada pedido vira uma linha da tabela ``jobs`` cuja chave é a chave do cache de
+embeddings: pedidos idênticos (de qualquer sessão) caem no mesmo job. As
+features vão para um .npy ao lado do banco. Uma thread despachante tira os
+jobs em ordem de chegada e roda cada um em ``python -m smartdrive.job_queue``,
+com no máximo ``max_workers`` ao mesmo tempo; o processo grava os checkpoints
+na tabela e o resultado no ``EmbeddingCache``. Quem fechou a aba encontra o
+embedding no cache quando voltar.
+
+Processo novo, e não multiprocessing: o Streamlit registra o script do app
+como ``__main__``, e o spawn do multiprocessing o reexecutaria em cada worker.
+
+A fila supõe um servidor por banco: ao abrir, jobs que estavam "rodando" (o
+servidor caiu no meio) voltam para a fila.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from smartdrive.embedding_cache import EmbeddingCache
+from smartdrive.progressive import checkpoint_count, embedding_steps
+
+# Estados de um job
+QUEUED = 'na fila'
+RUNNING = 'rodando'
+DONE = 'pronto'
+FAILED = 'falhou'
+
+# Intervalo máximo entre duas verificações da fila pelo despachante (segundos)
+DISPATCH_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE NOT NULL,
+    state TEXT NOT NULL,
+    method TEXT NOT NULL,
+    perplexity REAL NOT NULL,
+    random_state INTEGER NOT NULL,
+    n_rows INTEGER NOT NULL,
+    checkpoint INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 1,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+def default_workers():
+    """Jobs simultâneos: metade dos núcleos (cada t-SNE já usa várias threads), no mínimo 1"""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def _connect(db_path):
+    connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+@contextmanager
+def _database(db_path):
+    """Conexão em autocommit, fechada ao sair do bloco"""
+    connection = _connect(db_path)
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def _features_path(jobs_dir, key):
+    return os.path.join(jobs_dir, f"{key}.npy")
+
+
+def _package_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_job(db_path, cache_dir, key, n_checkpoints=3):
+    """Executa um job (no processo filho): checkpoints na tabela, resultado no cache"""
+    features_path = _features_path(os.path.dirname(db_path), key)
+    connection = _connect(db_path)
+    try:
+        job = connection.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+        features = np.load(features_path)
+        embedding = None
+        steps = embedding_steps(
+            features, job['method'], job['perplexity'], job['random_state'], int(n_checkpoints)
+        )
+        for embedding in steps:
+            connection.execute("UPDATE jobs SET checkpoint = checkpoint + 1 WHERE key = ?", (key,))
+        EmbeddingCache(cache_dir).put(key, embedding)
+        connection.execute(
+            "UPDATE jobs SET state = ?, finished_at = ? WHERE key = ?", (DONE, time.time(), key)
+        )
+    except Exception as e:
+        connection.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE key = ?",
+            (FAILED, f"{type(e).__name__}: {e}", time.time(), key)
+        )
+    finally:
+        connection.close()
+        try:
+            os.remove(features_path)
+        except OSError:
+            pass
+
+
+class EmbeddingJobQueue:
+    """Fila persistente de embeddings com deduplicação e limite de jobs simultâneos"""
+
+    def __init__(self, jobs_dir, cache_dir, max_workers=None, n_checkpoints=3):
+        self.jobs_dir = jobs_dir
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(jobs_dir, 'jobs.sqlite')
+        self.max_workers = max_workers or default_workers()
+        self.n_checkpoints = n_checkpoints
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        with _database(self.db_path) as connection:
+            connection.execute(_SCHEMA)
+            connection.execute(
+                "UPDATE jobs SET state = ?, checkpoint = 0, started_at = NULL WHERE state = ?", (QUEUED, RUNNING)
+            )
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._running = {}
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True, name='smartdrive-fila')
+        self._dispatcher.start()
+
+    def submit(self, key, features, method, perplexity, random_state, retry=False):
+        """Enfileira o embedding (ou junta o pedido ao job igual já existente); retorna o status
+
+        Um job que falhou só volta para a fila com ``retry=True`` (pedido explícito).
+        """
+        with self._lock, _database(self.db_path) as connection:
+            row = connection.execute("SELECT state FROM jobs WHERE key = ?", (key,)).fetchone()
+            if row is None or row['state'] == DONE or (retry and row['state'] == FAILED):
+                # Novo, refeito porque o resultado saiu do cache, ou nova tentativa
+                self._write_features(key, features)
+                connection.execute("DELETE FROM jobs WHERE key = ?", (key,))
+                connection.execute(
+                    "INSERT INTO jobs (key, state, method, perplexity, random_state, n_rows, total, submitted_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, QUEUED, method, float(perplexity), int(random_state), len(features),
+                     checkpoint_count(method, self.n_checkpoints), time.time())
+                )
+        self._wake.set()
+        return self.status(key)
+
+    def status(self, key):
+        """Estado, posição na fila (1 = próximo), progresso e tempos do job; None se não existir"""
+        with _database(self.db_path) as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            status = dict(row)
+            status['position'] = None
+            if row['state'] == QUEUED:
+                status['position'] = connection.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE state = ? AND seq <= ?", (QUEUED, row['seq'])
+                ).fetchone()[0]
+            counts = dict(connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        status['queued'] = counts.get(QUEUED, 0)
+        status['running'] = counts.get(RUNNING, 0)
+        status['progress'] = 1.0 if row['state'] == DONE else row['checkpoint'] / max(row['total'], 1)
+        return status
+
+    def shutdown(self, wait=False):
+        """Para de despachar; com wait=True espera os jobs em execução"""
+        self._stopped = True
+        self._wake.set()
+        self._dispatcher.join()
+        if wait:
+            for process in self._running.values():
+                process.wait()
+
+    def _write_features(self, key, features):
+        # Escrita atômica: o processo nunca lê um .npy pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=self.jobs_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            np.save(handle, np.ascontiguousarray(features, dtype=np.float32))
+        os.replace(tmp_path, _features_path(self.jobs_dir, key))
+
+    def _claim_next(self, connection):
+        """Marca o job mais antigo da fila como rodando (None se a fila estiver vazia)"""
+        row = connection.execute(
+            "SELECT * FROM jobs WHERE state = ? ORDER BY seq LIMIT 1", (QUEUED,)
+        ).fetchone()
+        if row is None:
+            return None
+        claimed = connection.execute(
+            "UPDATE jobs SET state = ?, started_at = ? WHERE key = ? AND state = ?",
+            (RUNNING, time.time(), row['key'], QUEUED)
+        ).rowcount
+        return row if claimed else None
+
+    def _start(self, key):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [_package_root(), env.get('PYTHONPATH')]))
+        return subprocess.Popen(
+            [sys.executable, '-m', 'smartdrive.job_queue', self.db_path, self.cache_dir, key, str(self.n_checkpoints)],
+            env=env
+        )
+
+    def _dispatch_loop(self):
+        connection = _connect(self.db_path)
+        while not self._stopped:
+            self._wake.wait(DISPATCH_INTERVAL)
+            self._wake.clear()
+            for key, process in list(self._running.items()):
+                if process.poll() is not None:
+                    del self._running[key]
+                    self._finished(connection, key, process.returncode)
+            while len(self._running) < self.max_workers and not self._stopped:
+                with self._lock:
+                    row = self._claim_next(connection)
+                if row is None:
+                    break
+                self._running[row['key']] = self._start(row['key'])
+        connection.close()
+
+    def _finished(self, connection, key, returncode):
+        """Processo morreu sem registrar o fim (ex.: falta de memória): marca como falho"""
+        if returncode != 0:
+            connection.execute(
+                "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE key = ? AND state = ?",
+                (FAILED, f"processo terminou com código {returncode}", time.time(), key, RUNNING)
+            )
+
+
+if __name__ == '__main__':
+    run_job(*sys.argv[1:])
@@ -0,0 +1,139 @@
+"""Leitura dos Parquet processados com projeção de colunas e filtros no pyarrow."""
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from smartdrive.enrichment import CRITICAL_EVENT_COLUMNS, TIME_EVENT_COLUMNS
+from smartdrive.features import TSNE_CANDIDATE_FEATURES
+from smartdrive.instrumentation import instrumented
+
+# Colunas brutas lidas pelo app (enriquecimento, filtros, métricas, gráficos e hover).
+# Todas as colunas event_* também são lidas, pois a análise de eventos percorre todas.
+APP_COLUMNS = [
+    'plate', 'driverId', 'endTime', 'positionDate',
+    'totalDistance', 'fuelConsumption', 'km_litro', 'averageSpeed',
+    'percurso_com_evento',
+    *TIME_EVENT_COLUMNS.values(),
+    *CRITICAL_EVENT_COLUMNS,
+    *TSNE_CANDIDATE_FEATURES
+]
+
+
+# Manifesto da ingestão gravado pelo scripts/preprocess_data.py
+MANIFEST_FILE = '_manifest.json'
+
+# Colunas gravadas como texto no layout ordenado (para pular row groups pelas
+# estatísticas) que o app usa como categoria
+CATEGORY_COLUMNS = ['plate']
+
+
+def open_dataset(folder_path):
+    """Abre a pasta de partes Parquet como um dataset pyarrow (sem ler dados)
+
+    Se a pasta tiver o _metadata gravado pelo preprocess_data.py, os row groups e
+    estatísticas vêm dele, sem abrir o rodapé de cada parte.
+    """
+    metadata_path = os.path.join(folder_path, '_metadata')
+    if os.path.exists(metadata_path):
+        return ds.parquet_dataset(metadata_path)
+    return ds.dataset(folder_path, format='parquet')
+
+
+def dataset_version(folder_path):
+    """Token de versão da base, para invalidar os caches do app quando os dados mudam
+
+    Combina o "version" do _manifest.json (ingestão incremental, compactação ou
+    reconstrução pelo preprocess_data.py) com tamanho e mtime dos arquivos de
+    metadados/partes, o que cobre também pastas sem manifesto. Só faz stat:
+    pode ser chamado a cada rerun.
+    """
+    if not os.path.isdir(folder_path):
+        return None
+
+    version = None
+    manifest_path = os.path.join(folder_path, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as handle:
+            version = json.load(handle).get('version')
+
+    signature = []
+    for name in sorted(os.listdir(folder_path)):
+        if name == '_metadata' or name.endswith('.parquet'):
+            info = os.stat(os.path.join(folder_path, name))
+            signature.append(f"{name}:{info.st_size}:{info.st_mtime_ns}")
+    digest = hashlib.sha1('|'.join(signature).encode()).hexdigest()[:12]
+    return f"v{version}-{digest}" if version is not None else digest
+
+
+def count_rows(folder_path):
+    """Total de linhas da base, lido dos metadados do Parquet"""
+    return open_dataset(folder_path).count_rows()
+
+
+def projected_columns(schema, columns=None):
+    """Colunas do schema que o app realmente usa, na ordem do arquivo"""
+    wanted = set(APP_COLUMNS if columns is None else columns)
+    return [
+        name for name in schema.names
+        if name in wanted or (columns is None and name.startswith('event_'))
+    ]
+
+
+def _day_of_month_expression(schema):
+    """Expressão com o dia do mês de endTime (ou positionDate), se existir"""
+    for column in ['endTime', 'positionDate']:
+        if column not in schema.names:
+            continue
+        field_type = schema.field(column).type
+        if pa.types.is_timestamp(field_type) or pa.types.is_date(field_type):
+            return pc.day(ds.field(column))
+        if pa.types.is_string(field_type) or pa.types.is_large_string(field_type):
+            # Datas ISO 8601 ("2025-08-01T03:04:39.000Z"): o dia está nos caracteres 8-9
+            return pc.utf8_slice_codeunits(ds.field(column), 8, 10).cast(pa.int32())
+    return None
+
+
+def build_filter(schema, plates=None, dist_range=None, day_range=None):
+    """Monta o filtro pyarrow (placas, faixa de distância e faixa de dias)"""
+    expression = None
+
+    def _and(current, new):
+        return new if current is None else current & new
+
+    if plates is not None:
+        expression = _and(expression, ds.field('plate').isin(list(plates)))
+
+    if dist_range is not None:
+        dist_min, dist_max = dist_range
+        expression = _and(
+            expression,
+            (ds.field('totalDistance') >= dist_min) & (ds.field('totalDistance') <= dist_max)
+        )
+
+    if day_range is not None:
+        day = _day_of_month_expression(schema)
+        if day is not None:
+            day_min, day_max = day_range
+            expression = _and(expression, (day >= day_min) & (day <= day_max))
+
+    return expression
+
+
+@instrumented('Parquet: leitura')
+def read_trips(folder_path, plates=None, dist_range=None, day_range=None, columns=None):
+    """Lê só as colunas e linhas necessárias da pasta de partes Parquet"""
+    dataset = open_dataset(folder_path)
+    table = dataset.to_table(
+        columns=projected_columns(dataset.schema, columns),
+        filter=build_filter(dataset.schema, plates, dist_range, day_range)
+    )
+    for column in CATEGORY_COLUMNS:
+        if column in table.column_names and not pa.types.is_dictionary(table.schema.field(column).type):
+            table = table.set_column(
+                table.schema.get_field_index(column), column, pc.dictionary_encode(table.column(column))
+            )
+    return table.to_pandas()
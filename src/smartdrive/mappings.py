@@ -0,0 +1,168 @@
+"""Mapeamentos estáticos de placas da frota."""
+
+# Mapeamento de placas para porte de veículo e consumo esperado
+plate_to_vehicle_info = {
+    # BRF Primaria
+    'TFT7I29': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'MJZ4J84': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'MLP7A90': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'SWC0A01': {'porte': 'Extra Pesado', 'consumo_esperado': 3.5},
+    'TPO8G44': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'SWS3A91': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'TBR7C11': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'RLM1C02': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'RYK9E76': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'RYC6E77': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    # BRF Secundaria
+    'TUU1B96': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'TDU2E15': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'TUB1C36': {'porte': 'Médio', 'consumo_esperado': 7.0},
+    'TJT9F17': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'TTJ2J57': {'porte': 'Médio', 'consumo_esperado': 7.0},
+    'O-222401': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    'TMF9E93': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'STK6E75': {'porte': 'Leve', 'consumo_esperado': 8.0},
+    'TJM6J93': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'TLM3A45': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    # BRF Agro
+    'SXA6B49': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'SXR6E75': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    '6922SBS': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    'RMR4H06': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'SXA6A99': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'SXP4G15': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    '6568SBS': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    'SXU0G93': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'RCB9G35': {'porte': 'Extra Pesado', 'consumo_esperado': 3.5},
+    'RHH4H13': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    # Ecoforest
+    'ECO4D74': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4H11': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4F91': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4C71': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO5J81': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4D13': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4F6': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO4D23': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO6D31': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'ECO5H03': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    # Framento
+    'SSE0G99': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    '5570SCS': {'porte': 'Leve', 'consumo_esperado': 11.0},
+    'SSE0H01': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    '5570SDS': {'porte': 'Leve', 'consumo_esperado': 14.0},
+    'SSE0F46': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'O-171816': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    'SSE7D54': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    'SSE0H10': {'porte': 'Médio', 'consumo_esperado': 6.0},
+    '5566SIS': {'porte': 'Leve', 'consumo_esperado': 15.0},
+    'O-145224': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    # Reiter
+    'JBH8I68': {'porte': 'Extra Pesado', 'consumo_esperado': 3.5},
+    'JCI6G83': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'JBV2I73': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'JBI7E87': {'porte': 'Extra Pesado', 'consumo_esperado': 3.5},
+    'JBS5G57': {'porte': 'Extra Pesado', 'consumo_esperado': 3.5},
+    '5891SHS': {'porte': 'Leve', 'consumo_esperado': 10.0},
+    'JDM1I75': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'RKI4B73': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'JBU1I67': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5},
+    'JBI1F97': {'porte': 'Extra Pesado', 'consumo_esperado': 2.5}
+}
+
+
+# Mapeamento de placas para modelos por operação (TOP 10 de cada)
+plate_to_model_by_operation = {
+    'BRF Primaria': {
+        'TFT7I29': 'SCANIA/R560 A6X4',
+        'MJZ4J84': 'STRALIS 600S44T',
+        'MLP7A90': 'STRALIS 600S44T',
+        'SWC0A01': 'SCANIA/G370 A6X2',
+        'TPO8G44': 'S-WAY 480-6X2',
+        'SWS3A91': 'R450 A6X2',
+        'TBR7C11': 'XF FTS 480 SSC',
+        'RLM1C02': 'STRALIS 600S44T',
+        'RYK9E76': '28.480 MTM 6X2',
+        'RYC6E77': 'STRALIS 600S44T'
+    },
+    'BRF Secundaria': {
+        'TUU1B96': 'ACCELO 1017',
+        'TDU2E15': 'DELIVERY 11.180',
+        'TUB1C36': 'EXPRESS DRF 4X2',
+        'TJT9F17': 'DELIVERY 11.180',
+        'TTJ2J57': 'EXPRESS DRF 4X2',
+        'O-222401': 'SEM INFORMAÇÃO',
+        'TMF9E93': 'DELIVERY 11.180',
+        'STK6E75': 'IVECO/DAILY',
+        'TJM6J93': 'DELIVERY 11.180',
+        'TLM3A45': 'DELIVERY 11.180'
+    },
+    'BRF Agro': {
+        'SXA6B49': '30.320 CRM 8X2',
+        'SXR6E75': '26.260 CRM 6X2',
+        '6922SBS': 'SEM INFORMAÇÃO',
+        'RMR4H06': '30.280 CRM 8X2',
+        'SXA6A99': '30.320 CRM 8X2',
+        'SXP4G15': '26.260 CRM 6X2',
+        '6568SBS': 'SEM INFORMAÇÃO',
+        'SXU0G93': '26.320 CRM 6X2',
+        'RCB9G35': '24.330 CRC 6X2',
+        'RHH4H13': '30.280 CRM 8X2'
+    },
+    'Ecoforest': {
+        'ECO4D74': 'SCANIA/R560 A6X4',
+        'ECO4H11': 'SCANIA/R560 A6X4',
+        'ECO4F91': 'SCANIA/R560 A6X5',
+        'ECO4C71': 'SCANIA/R560 A6X6',
+        'ECO5J81': 'SCANIA/R560 A6X7',
+        'ECO4D13': 'SCANIA/R560 A6X8',
+        'ECO4F6': 'SCANIA/R560 A6X9',
+        'ECO4D23': 'SCANIA/R560 A6X10',
+        'ECO6D31': 'SCANIA/R560 A6X11',
+        'ECO5H03': 'SCANIA/R560 A6X12'
+    },
+    'Framento': {
+        'SSE0G99': 'VW/DELIVERY 11.180',
+        '5570SCS': 'BMW/X1 S20I M SPORT',
+        'SSE0H01': 'VW/DELIVERY 11.180',
+        '5570SDS': 'FIAT/MOBI LIKE',
+        'SSE0F46': 'VW/DELIVERY 11.180',
+        'O-171816': 'SEM INFORMAÇÃO',
+        'SSE7D54': 'VW/DELIVERY 11.180',
+        'SSE0H10': 'VW/DELIVERY 11.180',
+        '5566SIS': 'CHEV/ONIX PLUS 10TAT LTZ',
+        'O-145224': 'SEM INFORMAÇÃO'
+    },
+    'Reiter': {
+        'JBH8I68': 'SCANIA/R410 A4X2C',
+        'JCI6G83': 'SCANIA/R410 A6X2C',
+        'JBV2I73': 'SCANIA/G410 A6X4C XT',
+        'JBI7E87': 'SCANIA/R410 A4X2C',
+        'JBS5G57': 'SCANIA/R410 A4X2C',
+        '5891SHS': 'FIAT/TORO FREED T270 AT6',
+        'JDM1I75': 'VW/26.320 CRM 6X2',
+        'RKI4B73': 'VW/25.420 CTC 6X2',
+        'JBU1I67': 'SCANIA/G410 A6X4C XT',
+        'JBI1F97': 'SCANIA/G410 A6X4C XT'
+    }
+}
+
+# Mapeamento de arquivos para operações
+file_to_operation = {
+    "Delta 1 (BRF Primaria)": "BRF Primaria",
+    "Delta 2 (BRF Secundaria)": "BRF Secundaria",
+    "Delta 3 (BRF Agro)": "BRF Agro",
+    "Ecoforest": "Ecoforest",
+    "Framento": "Framento",
+    "Reiter": "Reiter"
+}
+
+# Mapeamento: Nome Exibido -> Nome da Pasta do Dataset
+file_options = {
+    "Delta 1 (BRF Primaria)": "delta_1_brf_primaria",
+    "Delta 2 (BRF Secundaria)": "delta_2_brf_secundaria",
+    "Delta 3 (BRF Agro)": "delta_3_brf_agro",
+    "Ecoforest": "ecoforest",
+    "Framento": "framento",
+    "Reiter": "reiter"
+}
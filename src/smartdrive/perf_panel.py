@@ -0,0 +1,147 @@
+"""Trace dos reruns do app e painel de performance da barra lateral.
+
+``begin_rerun_trace`` abre o trace no início do script e guarda na sessão se o
+painel está ligado, para que os fragmentos (que não reexecutam a barra lateral)
+abram o próprio trace. ``section_timer`` mede cada seção em ``st.session_state``.
+"""
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from smartdrive.instrumentation import clear_trace, finish_trace, rss_mb, stage, start_trace
+
+# Arquivo JSONL onde cada rerun acrescenta seus estágios (instrumentação sempre ligada se definido)
+PERF_TRACE_PATH = os.environ.get("SMARTDRIVE_PERF_TRACE")
+
+# Traces guardados por sessão para exportação no painel de performance
+PERF_TRACE_HISTORY = 50
+
+
+def begin_rerun_trace(label, show_performance=False, profile=False):
+    """Abre o trace do rerun; sem painel (e sem SMARTDRIVE_PERF_TRACE) os estágios não medem nada"""
+    st.session_state['perf_trace_settings'] = {'label': label, 'show_performance': show_performance}
+    if show_performance or PERF_TRACE_PATH:
+        start_trace(f"{label} {time.strftime('%H:%M:%S')}", profile=show_performance and profile)
+    else:
+        clear_trace()
+
+
+def performance_panel_enabled():
+    """True quando o painel de performance está ligado na barra lateral"""
+    return st.session_state.get('perf_trace_settings', {}).get('show_performance', False)
+
+
+def is_fragment_rerun():
+    """True quando o rerun atual é só de um fragmento (o resto da página não executa)"""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+@contextmanager
+def fragment_trace():
+    """Trace próprio para o rerun de um fragmento (no rerun completo vale o da página)"""
+    fragment_only = is_fragment_rerun()
+    settings = st.session_state.get('perf_trace_settings')
+    if fragment_only and settings is not None and (settings['show_performance'] or PERF_TRACE_PATH):
+        start_trace(f"{settings['label']} {time.strftime('%H:%M:%S')} (fragmento)")
+    try:
+        yield
+    finally:
+        if fragment_only:
+            end_rerun_trace()
+
+
+def record_timing(name, start):
+    """Guarda o tempo desde start em st.session_state para o painel de depuração"""
+    timings = st.session_state.setdefault('section_timings', {})
+    entry = timings.setdefault(name, {'runs': 0})
+    entry['runs'] += 1
+    entry['last_ms'] = (time.perf_counter() - start) * 1000
+    entry['rerun'] = 'fragmento' if is_fragment_rerun() else 'completo'
+    entry['at'] = time.strftime('%H:%M:%S')
+
+
+@contextmanager
+def section_timer(name):
+    """Mede o tempo de uma seção (inclusive quando ela termina com erro)"""
+    start = time.perf_counter()
+    try:
+        with stage(name):
+            yield
+    finally:
+        record_timing(name, start)
+
+
+def end_rerun_trace():
+    """Fecha o trace do rerun (grava no SMARTDRIVE_PERF_TRACE) e guarda no histórico da sessão"""
+    trace = finish_trace(append_to=PERF_TRACE_PATH)
+    if trace is not None:
+        history = st.session_state.setdefault('perf_traces', deque(maxlen=PERF_TRACE_HISTORY))
+        history.append(trace)
+    return trace
+
+
+def show_chart(fig, **kwargs):
+    """st.plotly_chart medido como estágio (serialização da figura para o navegador)"""
+    with stage('Plotly: serialização'):
+        return st.plotly_chart(fig, use_container_width=True, **kwargs)
+
+
+def render_performance_panel(trace, container):
+    """Estágios do último rerun, tempo por seção e exportação (JSONL e cProfile)"""
+    timings = st.session_state.get('section_timings', {})
+    history = st.session_state.get('perf_traces', [])
+    with container.container():
+        if trace is not None:
+            st.markdown(f"**📈 Último rerun: {trace.total_ms:.0f} ms**")
+            stages = pd.DataFrame([
+                {
+                    'Estágio': '↳ ' * record.depth + record.name,
+                    'ms': round(record.wall_ms, 1),
+                    'Linhas (entrada)': record.rows_in,
+                    'Linhas (saída)': record.rows_out,
+                    'ΔRSS (MB)': None if record.rss_delta_mb is None else round(record.rss_delta_mb, 1)
+                }
+                for record in trace.records
+            ])
+            if not stages.empty:
+                st.dataframe(stages, hide_index=True, use_container_width=True)
+
+        current_rss = rss_mb()
+        if current_rss is not None:
+            st.caption(f"RSS do processo: {current_rss:.0f} MB")
+
+        st.markdown("**⏱️ Tempo por seção**")
+        if not timings:
+            st.caption("Nenhuma seção medida ainda.")
+        else:
+            table = pd.DataFrame([
+                {
+                    'Seção': name, 'Último (ms)': round(entry['last_ms'], 1),
+                    'Rerun': entry['rerun'], 'Execuções': entry['runs'], 'Hora': entry['at']
+                }
+                for name, entry in timings.items()
+            ])
+            st.dataframe(table, hide_index=True, use_container_width=True)
+
+        if history:
+            st.download_button(
+                f"⬇️ Trace JSONL ({len(history)} reruns)",
+                data=''.join(item.to_jsonl() for item in history),
+                file_name='smartdrive_trace.jsonl',
+                mime='application/jsonl'
+            )
+        profile = trace.profile_bytes() if trace is not None else None
+        if profile is not None:
+            st.download_button(
+                "⬇️ Perfil cProfile (.prof)",
+                data=profile,
+                file_name='smartdrive_rerun.prof',
+                mime='application/octet-stream',
+                help="Abra com python -m pstats ou snakeviz"
+            )
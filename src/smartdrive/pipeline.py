@@ -0,0 +1,96 @@
+"""Carga das viagens para o app: leitura projetada do Parquet + enriquecimento.
+
+``load_trips`` não depende do Streamlit; ``load_dataset`` a envolve com o
+cache quente, o app envolve ``load_dataset`` com o cache de recursos, e os
+benchmarks e o aquecimento dos caches chamam as duas diretamente.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from smartdrive.enrichment import enrich_trips
+from smartdrive.hot_cache import hot_cache_path, read_frame, write_frame
+from smartdrive.instrumentation import instrumented
+from smartdrive.loader import count_rows, read_trips
+from smartdrive.mappings import plate_to_vehicle_info
+
+
+@instrumented('Carga da base')
+def load_trips(folder_path, top_plates, plate_model_map):
+    """Lê as viagens das top placas e adiciona as colunas derivadas; retorna (df, total de linhas)"""
+    # Lê só as colunas usadas pelo app e só as linhas das top placas
+    # (filtro aplicado pelo pyarrow, antes de decodificar o restante)
+    df = read_trips(folder_path, plates=top_plates)
+
+    # O total original vem dos metadados do Parquet, sem materializar a base
+    total_rows = count_rows(folder_path)
+
+    return derive_columns(df, plate_model_map), total_rows
+
+
+def load_dataset(folder_path, data_version, top_plates, plate_model_map, hot_cache_dir=None):
+    """Base enriquecida, pelo cache quente quando houver; retorna (df, total de linhas)
+
+    Sem hot_cache_dir (ou sem versão dos dados) lê sempre o Parquet.
+    """
+    hot_path = None
+    if hot_cache_dir and data_version is not None:
+        hot_path = hot_cache_path(
+            hot_cache_dir, os.path.basename(os.path.normpath(folder_path)),
+            data_version=data_version, top_plates=top_plates,
+            plate_model_map=plate_model_map, vehicle_info=plate_to_vehicle_info
+        )
+        cached = read_frame(hot_path)
+        if cached is not None:
+            df_cached, metadata = cached
+            return df_cached, metadata.get('total_rows')
+
+    df, total_rows = load_trips(folder_path, top_plates, plate_model_map)
+
+    if hot_path is not None:
+        # Se a escrita falhar a carga continua valendo; só a próxima não acelera
+        write_frame(hot_path, df, {'total_rows': total_rows})
+
+    return df, total_rows
+
+
+def derive_columns(df, plate_model_map):
+    """Modelo, eficiência, enriquecimento, dia do mês e flag de evento sobre as viagens lidas"""
+    # Adicionar coluna de modelo
+    df['vehicle_model'] = df['plate'].map(plate_model_map)
+
+    # Lógica de eficiência (Mantida)
+    if 'km_litro' in df.columns:
+        df['fuel_efficiency'] = df['km_litro']
+    else:
+        df['fuel_efficiency'] = np.where(
+            df['fuelConsumption'] > 0,
+            df['totalDistance'] / df['fuelConsumption'],
+            np.nan
+        )
+
+    # Tipo de veículo, consumo esperado, classe de eficiência e evento dominante
+    # (calculados de forma colunar, sem apply por linha)
+    df = enrich_trips(df)
+
+    # Adicionar dia do mês (Ajustado para datetime já convertido no parquet)
+    if 'endTime' in df.columns:
+        # Como salvamos em parquet, as datas já devem estar como datetime.
+        # Mas por segurança, garantimos a conversão se necessário.
+        if not pd.api.types.is_datetime64_any_dtype(df['endTime']):
+            df['endTime'] = pd.to_datetime(df['endTime'], errors='coerce')
+        df['day_of_month'] = df['endTime'].dt.day
+    elif 'positionDate' in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df['positionDate']):
+            df['positionDate'] = pd.to_datetime(df['positionDate'], errors='coerce')
+        df['day_of_month'] = df['positionDate'].dt.day
+    else:
+        df['day_of_month'] = 1
+
+    # Adicionar flag percurso
+    if 'percurso_com_evento' not in df.columns:
+        event_columns = [col for col in df.columns if col.startswith('event_')]
+        df['percurso_com_evento'] = (df[event_columns].sum(axis=1) > 0).astype(int)
+
+    return df
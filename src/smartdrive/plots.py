@@ -0,0 +1,518 @@
+"""Figuras Plotly do dashboard (distribuições e projeção t-SNE).
+
+Não dependem do Streamlit: recebem DataFrames e devolvem ``go.Figure``; o app
+só exibe o resultado.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from smartdrive.instrumentation import instrumented
+
+
+@instrumented('Plotly: distribuições')
+def create_distribution_plots(df):
+    """Cria gráficos de distribuição (histograma com média das top-10 e boxplot)"""
+    # Só a seção de distribuições usa subplots: fora do início a frio do app
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'Distribuição de Eficiência - Top 10 Placas',
+            'Boxplot por Tipo de Veículo',
+            'Distribuição de Distância Total',
+            'Boxplot de Eficiência por Tipo'
+        ),
+        specs=[[{"type": "histogram"}, {"type": "box"}],
+               [{"type": "histogram"}, {"type": "box"}]]
+    )
+    
+    # Histograma de eficiência com média das top-10
+    fuel_eff_data = df['fuel_efficiency'].dropna()
+    mean_efficiency = fuel_eff_data.mean()
+    
+    fig.add_trace(
+        go.Histogram(
+            x=fuel_eff_data,
+            nbinsx=50,
+            name='Eficiência',
+            marker_color='skyblue',
+            opacity=0.7
+        ),
+        row=1, col=1
+    )
+    
+    # Adicionar linha vertical com a média das top-10
+    fig.add_vline(
+        x=mean_efficiency,
+        line_dash="dash",
+        line_color="red",
+        line_width=2,
+        annotation_text=f"Média: {mean_efficiency:.2f} km/L",
+        annotation_position="top",
+        row=1, col=1
+    )
+    
+    # Boxplot de eficiência por tipo de veículo
+    for vtype in df['vehicle_type'].unique():
+        if vtype != 'Desconhecido':
+            data_subset = df[df['vehicle_type'] == vtype]['fuel_efficiency'].dropna()
+            fig.add_trace(
+                go.Box(y=data_subset, name=vtype),
+                row=1, col=2
+            )
+    
+    # Histograma de distância
+    fig.add_trace(
+        go.Histogram(
+            x=df['totalDistance'].dropna(),
+            nbinsx=50,
+            name='Distância',
+            marker_color='lightgreen'
+        ),
+        row=2, col=1
+    )
+    
+    # Boxplot de eficiência detalhado por tipo
+    for vtype in df['vehicle_type'].unique():
+        if vtype != 'Desconhecido':
+            data_subset = df[df['vehicle_type'] == vtype]['fuel_efficiency'].dropna()
+            fig.add_trace(
+                go.Box(
+                    y=data_subset,
+                    name=vtype,
+                    boxmean='sd'
+                ),
+                row=2, col=2
+            )
+    
+    fig.update_layout(
+        height=800,
+        showlegend=False,
+        template='plotly_white'
+    )
+    
+    fig.update_xaxes(title_text="Eficiência (km/L)", row=1, col=1)
+    fig.update_xaxes(title_text="Tipo de Veículo", row=1, col=2)
+    fig.update_xaxes(title_text="Distância (km)", row=2, col=1)
+    fig.update_xaxes(title_text="Tipo de Veículo", row=2, col=2)
+    
+    fig.update_yaxes(title_text="Frequência", row=1, col=1)
+    fig.update_yaxes(title_text="Eficiência (km/L)", row=1, col=2)
+    fig.update_yaxes(title_text="Frequência", row=2, col=1)
+    fig.update_yaxes(title_text="Eficiência (km/L)", row=2, col=2)
+    
+    return fig
+
+
+def detect_outliers(df, column='fuel_efficiency'):
+    """Detecta outliers usando IQR"""
+    Q1 = df[column].quantile(0.25)
+    Q3 = df[column].quantile(0.75)
+    IQR = Q3 - Q1
+    lower_bound = Q1 - 1.5 * IQR
+    upper_bound = Q3 + 1.5 * IQR
+    
+    df['is_outlier'] = (df[column] < lower_bound) | (df[column] > upper_bound)
+    return df
+
+
+# Códigos de cor do evento dominante
+EVENT_COLOR_CODES = {'Movimento': 0, 'Parado': 1, 'Subida': 2, 'Descida': 3, 'Plano': 4, 'Desconhecido': 5}
+
+
+def tsne_color_spec(tsne_df, color_by):
+    """Valores, título e escala de cor do gráfico t-SNE para a opção color_by"""
+    if color_by == 'Evento Dominante':
+        return tsne_df['dominant_event'].map(EVENT_COLOR_CODES), 'Evento Dominante', 'Plotly3'
+    if color_by == 'Distância Total (km)':
+        return tsne_df['totalDistance'], 'Distância (km)', 'Plasma'
+    # Eficiência (também o fallback)
+    return tsne_df['fuel_efficiency'], 'Eficiência (km/L)', 'Viridis'
+
+
+def marker_sizes(tsne_df, base_size=6):
+    """Tamanho dos pontos pelo peso da amostra (viagens que cada ponto representa)"""
+    sizes = np.full(len(tsne_df), base_size, dtype=float)
+    if 'sample_weight' not in tsne_df.columns:
+        return sizes
+    weights = tsne_df['sample_weight'].to_numpy(dtype=float)
+    # Amostra uniforme: pesos iguais, tamanho fixo
+    if weights.max() <= weights.min() * 1.01:
+        return sizes
+    return 4 + 8 * np.sqrt(weights / weights.max())
+
+
+# Campos numéricos do hover (rótulo, coluna, formato d3), enviados como um array float32
+HOVER_NUMERIC_FIELDS = [
+    ('Eficiência (km/L)', 'fuel_efficiency', '.2f'),
+    ('Distância (km)', 'totalDistance', '.2f'),
+    ('Velocidade Média', 'averageSpeed', '.2f'),
+    ('Dia do Mês', 'day_of_month', '.0f'),
+    ('Freadas Bruscas', 'event_FREADA BRUSCA', '.0f'),
+    ('Arrancadas Bruscas', 'event_ARRANCADA BRUSCA', '.0f'),
+    ('Peso (viagens)', 'sample_weight', '.1f'),
+]
+
+# Campos numéricos do hover dos centróides no mapa da frota (fração de eventos em %)
+FLEET_HOVER_NUMERIC_FIELDS = [
+    ('Viagens', 'trips', '.0f'),
+    ('Eficiência média (km/L)', 'fuel_efficiency', '.2f'),
+    ('Distância média (km)', 'totalDistance', '.2f'),
+    ('Com Eventos', 'percurso_com_evento', '.1%'),
+]
+
+
+def hover_customdata(tsne_df, fields=HOVER_NUMERIC_FIELDS):
+    """Campos numéricos presentes no frame e o array float32 (pontos × campos) do hover"""
+    numeric_fields = [item for item in fields if item[1] in tsne_df.columns]
+    customdata = np.column_stack([
+        tsne_df[column].to_numpy(dtype=np.float32, na_value=0 if column.startswith('event_') else np.nan)
+        for _, column, _ in numeric_fields
+    ])
+    return numeric_fields, customdata
+
+
+# Símbolos do plotly por código (enviados como int8, não como texto)
+CIRCLE_SYMBOL = 0
+DIAMOND_SYMBOL = 2
+
+
+def _hover_template(group, numeric_index, has_events):
+    """Hovertemplate de um grupo: placa, modelo, tipo e consumo esperado vão como texto fixo"""
+    first = group.iloc[0]
+    expected = first['expected_consumption']
+    expected = 0.0 if pd.isna(expected) else float(expected)
+
+    def numeric(label):
+        if label not in numeric_index:
+            return None
+        idx, column_format = numeric_index[label]
+        return f'{label}: %{{customdata[{idx}]:{column_format}}}'
+
+    lines = [
+        f"Placa: {first['plate']}",
+        f"Modelo: {first['vehicle_model']}",
+        f"Tipo: {first['vehicle_type']}",
+        numeric('Eficiência (km/L)'),
+        f'Consumo Esperado (km/L): {expected:.2f}',
+        'Evento Dominante: %{text}',
+        numeric('Distância (km)'),
+        numeric('Velocidade Média'),
+        numeric('Dia do Mês'),
+        None if has_events is None else f"Tem Eventos: {'Sim' if has_events else 'Não'}",
+        numeric('Freadas Bruscas'),
+        numeric('Arrancadas Bruscas'),
+        numeric('Peso (viagens)')
+    ]
+    return '<br>'.join(line for line in lines if line is not None) + '<extra></extra>'
+
+
+@instrumented('Plotly: figura t-SNE')
+def create_tsne_plot(tsne_df, color_by='Eficiência de Combustível (km/L)', show_outliers=False):
+    """Cria o gráfico t-SNE único e geral (None se não houver pontos)
+
+    Hover compacto: um trace por placa (e flag de evento) com os campos categóricos
+    fixos no hovertemplate, numéricos num array float32 (tipado no JSON) e só o
+    evento dominante como texto por ponto. Outliers vêm por arrays de símbolo,
+    tamanho e contorno no mesmo trace; a cor usa um coloraxis compartilhado.
+    """
+    if tsne_df is None or tsne_df.empty:
+        return None
+    
+    # Preparar dados de coloração
+    color_data, color_title, colorscale = tsne_color_spec(tsne_df, color_by)
+    color_values = color_data.to_numpy(dtype=np.float32, na_value=np.nan)
+    
+    numeric_fields, customdata = hover_customdata(tsne_df)
+    numeric_index = {label: (idx, fmt) for idx, (label, _, fmt) in enumerate(numeric_fields)}
+    x = tsne_df['tsne_1'].to_numpy(dtype=np.float32)
+    y = tsne_df['tsne_2'].to_numpy(dtype=np.float32)
+    events = tsne_df['dominant_event'].astype(str).to_numpy()
+    sizes = marker_sizes(tsne_df).astype(np.float32)
+    
+    # Outliers: mesmo trace, destacados por símbolo, tamanho, opacidade e contorno
+    outliers = None
+    if show_outliers:
+        outliers = detect_outliers(tsne_df[['fuel_efficiency']].copy(), 'fuel_efficiency')['is_outlier'].to_numpy()
+        sizes = np.where(outliers, np.float32(10), sizes)
+    
+    group_columns = ['plate']
+    if 'percurso_com_evento' in tsne_df.columns:
+        group_columns.append('percurso_com_evento')
+    groups = tsne_df.reset_index(drop=True).groupby(
+        group_columns, observed=True, sort=False, dropna=False
+    ).indices
+    
+    fig = go.Figure()
+    traces = []
+    for key, rows in groups.items():
+        group = tsne_df.iloc[rows[:1]]
+        has_events = bool(key[1]) if len(group_columns) > 1 and not pd.isna(key[1]) else None
+        marker = dict(
+            size=sizes[rows],
+            opacity=0.7,
+            color=color_values[rows],
+            coloraxis='coloraxis',
+            line=dict(width=0)
+        )
+        if outliers is not None:
+            group_outliers = outliers[rows]
+            marker['symbol'] = np.where(group_outliers, DIAMOND_SYMBOL, CIRCLE_SYMBOL).astype(np.int8)
+            marker['opacity'] = np.where(group_outliers, 1.0, 0.7).astype(np.float32)
+            marker['line'] = dict(width=np.where(group_outliers, 2, 0).astype(np.int8), color='red')
+        traces.append(go.Scattergl(
+            x=x[rows],
+            y=y[rows],
+            mode='markers',
+            marker=marker,
+            customdata=customdata[rows],
+            text=events[rows],
+            hovertemplate=_hover_template(group, numeric_index, has_events),
+            showlegend=False
+        ))
+    fig.add_traces(traces)
+    
+    title = f't-SNE - Colorido por {color_by}'
+    if outliers is not None:
+        title += f' (◆ {int(outliers.sum())} outliers de eficiência)'
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title='t-SNE Dimensão 1',
+        yaxis_title='t-SNE Dimensão 2',
+        height=700,
+        template='plotly_white',
+        hovermode='closest',
+        coloraxis=dict(colorscale=colorscale, colorbar=dict(title=color_title))
+    )
+    
+    return fig
+
+
+@instrumented('Plotly: comparação de operações')
+def create_comparison_plot(tsne_df):
+    """Embedding conjunto das operações: um trace (e uma cor da legenda) por operação"""
+    if tsne_df is None or tsne_df.empty:
+        return None
+    
+    numeric_fields, customdata = hover_customdata(tsne_df)
+    x = tsne_df['tsne_1'].to_numpy(dtype=np.float32)
+    y = tsne_df['tsne_2'].to_numpy(dtype=np.float32)
+    labels = (tsne_df['plate'].astype(str) + ' · ' + tsne_df['vehicle_type'].astype(str)).to_numpy()
+    sizes = marker_sizes(tsne_df).astype(np.float32)
+    numeric_lines = [
+        f'{label}: %{{customdata[{idx}]:{fmt}}}' for idx, (label, _, fmt) in enumerate(numeric_fields)
+    ]
+    
+    fig = go.Figure()
+    for operation, rows in tsne_df.reset_index(drop=True).groupby('operation', sort=False).indices.items():
+        fig.add_trace(go.Scattergl(
+            x=x[rows],
+            y=y[rows],
+            mode='markers',
+            name=operation,
+            marker=dict(size=sizes[rows], opacity=0.7, line=dict(width=0)),
+            customdata=customdata[rows],
+            text=labels[rows],
+            hovertemplate='<br>'.join([f'Operação: {operation}', 'Placa: %{text}'] + numeric_lines)
+                          + '<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        title='t-SNE conjunto - Colorido por Operação',
+        xaxis_title='t-SNE Dimensão 1',
+        yaxis_title='t-SNE Dimensão 2',
+        height=700,
+        template='plotly_white',
+        hovermode='closest',
+        legend_title='Operação'
+    )
+    
+    return fig
+
+
+# Resolução da grade de densidade do mapa da frota
+FLEET_DENSITY_BINS = 200
+
+
+@instrumented('Plotly: mapa da frota')
+def create_fleet_map(embedding, centroid_embedding, clusters, color_by='Eficiência de Combustível (km/L)',
+                     bins=FLEET_DENSITY_BINS):
+    """Mapa da frota: densidade de todas as viagens (agregada no servidor) e centróides por cima
+
+    A densidade vai para o navegador como uma grade bins × bins, não como um ponto
+    por viagem; só os centróides (com hover) são desenhados com Scattergl.
+    """
+    if embedding is None or len(embedding) == 0:
+        return None
+
+    counts, x_edges, y_edges = np.histogram2d(embedding[:, 0], embedding[:, 1], bins=bins)
+    density = np.log1p(counts.T)
+    density[counts.T == 0] = np.nan
+
+    if color_by == 'Evento Dominante':
+        color_data = clusters['dominant_event'].map(EVENT_COLOR_CODES)
+        color_title = 'Evento Dominante'
+        colorscale = 'Plotly3'
+    elif color_by == 'Distância Total (km)':
+        color_data = clusters['totalDistance']
+        color_title = 'Distância média (km)'
+        colorscale = 'Plasma'
+    else:
+        color_data = clusters['fuel_efficiency']
+        color_title = 'Eficiência média (km/L)'
+        colorscale = 'Viridis'
+
+    # Hover compacto: numéricos num array float32, placa e evento como texto por centróide
+    numeric_fields, customdata = hover_customdata(clusters, FLEET_HOVER_NUMERIC_FIELDS)
+    hovertemplate = '<br>'.join(
+        [f'{label}: %{{customdata[{idx}]:{fmt}}}' for idx, (label, _, fmt) in enumerate(numeric_fields)]
+        + ['Placa mais frequente: %{text}', 'Evento Dominante: %{hovertext}']
+    ) + '<extra></extra>'
+
+    sizes = clusters['trips'].to_numpy(dtype=float)
+    sizes = 3 + 9 * np.sqrt(sizes / sizes.max())
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=density,
+        colorscale='Greys',
+        showscale=False,
+        hoverinfo='skip',
+        name='Densidade'
+    ))
+    fig.add_trace(go.Scattergl(
+        x=centroid_embedding[:, 0],
+        y=centroid_embedding[:, 1],
+        mode='markers',
+        marker=dict(
+            size=sizes,
+            opacity=0.8,
+            color=color_data.to_numpy(dtype=np.float32, na_value=np.nan),
+            colorscale=colorscale,
+            colorbar=dict(title=color_title),
+            line=dict(width=0)
+        ),
+        customdata=customdata,
+        text=clusters['plate'].astype(str).to_numpy(),
+        hovertext=clusters['dominant_event'].astype(str).to_numpy(),
+        hovertemplate=hovertemplate,
+        showlegend=False
+    ))
+
+    fig.update_layout(
+        title=f'Mapa da frota ({len(embedding):,} viagens, {len(centroid_embedding):,} micro-clusters) - '
+              f'Colorido por {color_by}',
+        xaxis_title='t-SNE Dimensão 1',
+        yaxis_title='t-SNE Dimensão 2',
+        height=700,
+        template='plotly_white',
+        hovermode='closest'
+    )
+
+    return fig
+
+
+# Resolução da imagem agregada do t-SNE (células por eixo)
+RASTER_BINS = 150
+
+
+def _cell_mode(cells, codes, n_cells):
+    """Código mais frequente por célula (NaN nas células vazias)"""
+    valid = ~np.isnan(codes)
+    codes = codes[valid].astype(np.int64)
+    n_codes = int(codes.max()) + 1 if len(codes) else 1
+    table = np.bincount(cells[valid] * n_codes + codes, minlength=n_cells * n_codes).reshape(n_cells, n_codes)
+    mode = table.argmax(axis=1).astype(float)
+    mode[table.sum(axis=1) == 0] = np.nan
+    return mode
+
+
+@instrumented('Plotly: imagem agregada t-SNE')
+def create_tsne_raster(tsne_df, color_by='Eficiência de Combustível (km/L)', bins=RASTER_BINS,
+                       x_range=None, y_range=None):
+    """Imagem agregada no servidor: cor média (ou evento mais comum) por célula e viagens no hover
+
+    O navegador recebe uma grade bins × bins em vez de um ponto por viagem. Pontos
+    transparentes nos centros das células ocupadas permitem selecionar uma região
+    com a caixa (o app usa a seleção para aproximar).
+    """
+    if tsne_df is None or tsne_df.empty:
+        return None
+
+    x = tsne_df['tsne_1'].to_numpy(dtype=float)
+    y = tsne_df['tsne_2'].to_numpy(dtype=float)
+    x_range = x_range or (x.min(), x.max())
+    y_range = y_range or (y.min(), y.max())
+    x_edges = np.linspace(x_range[0], x_range[1] + 1e-9, bins + 1)
+    y_edges = np.linspace(y_range[0], y_range[1] + 1e-9, bins + 1)
+
+    # Célula de cada ponto (linha = y, coluna = x, como o z do Heatmap)
+    column = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, bins - 1)
+    row = np.clip(np.searchsorted(y_edges, y, side='right') - 1, 0, bins - 1)
+    cells = row * bins + column
+    counts = np.bincount(cells, minlength=bins * bins)
+
+    color_data, color_title, colorscale = tsne_color_spec(tsne_df, color_by)
+    color_values = color_data.to_numpy(dtype=float, na_value=np.nan)
+    if color_by == 'Evento Dominante':
+        z = _cell_mode(cells, color_values, bins * bins)
+        value_label = 'Evento mais comum (código)'
+    else:
+        finite = np.isfinite(color_values)
+        sums = np.bincount(cells[finite], weights=color_values[finite], minlength=bins * bins)
+        valid_counts = np.bincount(cells[finite], minlength=bins * bins)
+        z = np.divide(sums, valid_counts, out=np.full(bins * bins, np.nan), where=valid_counts > 0)
+        value_label = f'{color_title} (média)'
+
+    # float32 nos arrays tipados: metade dos bytes do float64 no JSON da figura
+    x_centers = ((x_edges[:-1] + x_edges[1:]) / 2).astype(np.float32)
+    y_centers = ((y_edges[:-1] + y_edges[1:]) / 2).astype(np.float32)
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=x_centers,
+        y=y_centers,
+        z=z.reshape(bins, bins).astype(np.float32),
+        customdata=counts.reshape(bins, bins),
+        colorscale=colorscale,
+        colorbar=dict(title=color_title),
+        hoverongaps=False,
+        hovertemplate=f'Viagens: %{{customdata}}<br>{value_label}: %{{z:.2f}}<extra></extra>'
+    ))
+
+    occupied = np.flatnonzero(counts)
+    fig.add_trace(go.Scattergl(
+        x=x_centers[occupied % bins],
+        y=y_centers[occupied // bins],
+        mode='markers',
+        marker=dict(size=4, opacity=0),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+
+    fig.update_layout(
+        title=f't-SNE - {len(tsne_df):,} viagens agregadas - Colorido por {color_by}',
+        xaxis_title='t-SNE Dimensão 1',
+        yaxis_title='t-SNE Dimensão 2',
+        height=700,
+        template='plotly_white',
+        hovermode='closest',
+        dragmode='select'
+    )
+
+    return fig
+
+
+def selection_box(event):
+    """Caixa [x0, x1, y0, y1] da última seleção do gráfico (ou None)"""
+    boxes = ((event or {}).get('selection') or {}).get('box') or []
+    if not boxes:
+        return None
+    x0, x1 = sorted(boxes[-1]['x'])
+    y0, y1 = sorted(boxes[-1]['y'])
+    return [x0, x1, y0, y1]
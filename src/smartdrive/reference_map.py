@@ -0,0 +1,150 @@
+"""Mapa de referência: ajusta a projeção uma vez e posiciona novas viagens por kNN.
+
+O scaler e o embedding são ajustados numa amostra de referência e salvos em
+disco. Viagens novas (ou filtradas) são normalizadas com o mesmo scaler e
+colocadas na média ponderada (1/distância) das posições dos k vizinhos mais
+próximos da referência, sem refazer o t-SNE e sem mudar o layout do mapa.
+``project_on_reference_map`` recorta dessas posições a amostra exibida.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from smartdrive.embeddings import DEFAULT_EMBEDDING_METHOD
+from smartdrive.instrumentation import instrumented
+from smartdrive.sampling import DEFAULT_SAMPLING_STRATEGY, draw_sample
+
+
+class ReferenceMap:
+    """Scaler + embedding de referência com projeção kNN de novas linhas"""
+
+    def __init__(self, feature_names, mean, scale, reference_features, reference_embedding,
+                 n_neighbors=10, metadata=None):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.reference_features = np.ascontiguousarray(reference_features, dtype=np.float32)
+        self.reference_embedding = np.asarray(reference_embedding, dtype=np.float32)
+        self.n_neighbors = min(n_neighbors, len(self.reference_features))
+        self.metadata = metadata or {}
+        self._index = None
+
+    @classmethod
+    def from_prepared(cls, prepared, embedding, n_neighbors=10, metadata=None):
+        """Cria o mapa a partir da saída de prepare_tsne_input e do embedding ajustado"""
+        scaler = prepared['scaler']
+        return cls(
+            prepared['feature_names'],
+            scaler.mean_,
+            scaler.scale_,
+            prepared['features'],
+            embedding,
+            n_neighbors=n_neighbors,
+            metadata=metadata
+        )
+
+    @property
+    def index(self):
+        """Índice de vizinhos sobre as features de referência (criado sob demanda)"""
+        if self._index is None:
+            from sklearn.neighbors import NearestNeighbors
+
+            self._index = NearestNeighbors(n_neighbors=self.n_neighbors, n_jobs=-1)
+            self._index.fit(self.reference_features)
+        return self._index
+
+    def transform_features(self, df):
+        """Normaliza as features com o scaler de referência (NaN em linhas inválidas)"""
+        missing = [col for col in self.feature_names if col not in df.columns]
+        if missing:
+            raise KeyError(f"Colunas ausentes para o mapa de referência: {missing}")
+
+        values = df[self.feature_names].to_numpy(dtype=np.float64, na_value=np.nan)
+        values[~np.isfinite(values)] = np.nan
+        return ((values - self.mean) / self.scale).astype(np.float32)
+
+    def project(self, df, batch_size=50000):
+        """Posiciona as linhas no mapa; linhas com features inválidas ficam NaN"""
+        features = self.transform_features(df)
+        valid = ~np.isnan(features).any(axis=1)
+        placed = np.full((len(df), 2), np.nan, dtype=np.float32)
+
+        valid_positions = np.flatnonzero(valid)
+        for start in range(0, len(valid_positions), batch_size):
+            rows = valid_positions[start:start + batch_size]
+            distances, neighbors = self.index.kneighbors(features[rows])
+            weights = 1.0 / (distances + 1e-9)
+            weights /= weights.sum(axis=1, keepdims=True)
+            placed[rows] = np.einsum('nk,nkd->nd', weights, self.reference_embedding[neighbors])
+
+        return placed
+
+    def save(self, path):
+        """Salva o mapa em .npz (escrita atômica)"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez(
+                    handle,
+                    feature_names=np.array(self.feature_names),
+                    mean=self.mean,
+                    scale=self.scale,
+                    reference_features=self.reference_features,
+                    reference_embedding=self.reference_embedding,
+                    n_neighbors=self.n_neighbors,
+                    metadata_keys=np.array(list(self.metadata.keys()), dtype=str),
+                    metadata_values=np.array([str(v) for v in self.metadata.values()], dtype=str)
+                )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um mapa salvo por save()"""
+        with np.load(path) as stored:
+            return cls(
+                stored['feature_names'].tolist(),
+                stored['mean'],
+                stored['scale'],
+                stored['reference_features'],
+                stored['reference_embedding'],
+                n_neighbors=int(stored['n_neighbors']),
+                metadata=dict(zip(stored['metadata_keys'].tolist(), stored['metadata_values'].tolist()))
+            )
+
+
+@instrumented('Mapa de referência: projeção')
+def project_on_reference_map(df, positions, reference_map, placements, sample_size=5000, random_state=42,
+                             strategy=DEFAULT_SAMPLING_STRATEGY):
+    """Seleciona as viagens filtradas já posicionadas no mapa de referência"""
+    positions = positions[~np.isnan(placements[positions]).any(axis=1)]
+    if len(positions) == 0:
+        return None, None
+    valid_rows = len(positions)
+
+    # O tamanho da amostra aqui só limita os pontos exibidos
+    positions, weights = draw_sample(
+        df, positions, sample_size, random_state, strategy, reference_map.feature_names
+    )
+
+    tsne_df = df.take(positions)
+    tsne_df['sample_weight'] = weights
+    tsne_df['tsne_1'] = placements[positions, 0]
+    tsne_df['tsne_2'] = placements[positions, 1]
+
+    metadata = {
+        'features': reference_map.feature_names,
+        'perplexity': reference_map.metadata.get('perplexity'),
+        'sample_size': len(tsne_df),
+        'valid_rows': valid_rows,
+        'strategy': strategy,
+        'method': reference_map.metadata.get('method', DEFAULT_EMBEDDING_METHOD),
+        'cache_hit': True,
+        'reference_size': len(reference_map.reference_features)
+    }
+    return tsne_df, metadata
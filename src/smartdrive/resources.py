@@ -0,0 +1,232 @@
+"""Recursos do app compartilhados por todas as sessões (``st.cache_resource``).
+
+Caminhos dos caches em disco, bases carregadas, índices, cubos, mapas de
+referência, fila de jobs e o aquecimento que os preenche quando o servidor sobe.
+"""
+import os
+import threading
+import time
+
+import streamlit as st
+
+from smartdrive.comparison import run_parallel
+from smartdrive.cube import build_cube
+from smartdrive.embedding_cache import EmbeddingCache, fingerprint
+from smartdrive.embeddings import compute_embedding
+from smartdrive.filter_index import FilterIndex
+from smartdrive.hierarchical import cluster_summary, hierarchical_embedding
+from smartdrive.job_queue import DONE as JOB_DONE, FAILED as JOB_FAILED, EmbeddingJobQueue
+from smartdrive.loader import dataset_version
+from smartdrive.mappings import file_options, file_to_operation, plate_to_model_by_operation
+from smartdrive.pipeline import load_dataset
+from smartdrive.reference_map import ReferenceMap
+from smartdrive.tsne import build_feature_matrix, prepare_fleet_input, prepare_tsne_input
+from smartdrive.warmup import DEFAULT_DATASET, DEFAULT_VIEW, filters_key, prepare_view, view_filters
+
+# Caminho base onde os parquets estão salvos
+DATA_PATH = "data/processed"
+
+# Cache persistente dos embeddings (compartilhado entre sessões e reinícios)
+EMBEDDING_CACHE_PATH = os.environ.get("SMARTDRIVE_EMBEDDING_CACHE", "data/cache/embeddings")
+
+# Mapas de referência salvos (scaler + embedding para projeção sem refit)
+REFERENCE_MAP_PATH = os.environ.get("SMARTDRIVE_REFERENCE_MAPS", "data/cache/reference_maps")
+
+# Fila de jobs de embedding (SQLite + .npy das features) e intervalo de atualização do status
+JOB_QUEUE_PATH = os.environ.get("SMARTDRIVE_JOB_QUEUE", "data/cache/jobs")
+JOB_POLL_SECONDS = 1.0
+
+# Aquece as bases e os embeddings da visão padrão quando o servidor sobe ("0" desliga)
+WARMUP_ENABLED = os.environ.get("SMARTDRIVE_WARMUP", "1") != "0"
+
+# Cache quente das bases enriquecidas (Arrow IPC mapeado em memória; vazio desativa)
+HOT_CACHE_PATH = os.environ.get("SMARTDRIVE_HOT_CACHE", "data/cache/hot")
+
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_cache():
+    """Instância única do cache de embeddings para todas as sessões"""
+    return EmbeddingCache(EMBEDDING_CACHE_PATH)
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """Fila única de jobs de embedding no processo (pool de processos limitado pelos núcleos)"""
+    return EmbeddingJobQueue(JOB_QUEUE_PATH, EMBEDDING_CACHE_PATH)
+
+
+def data_folder_version(dataset_folder_name):
+    """Token de versão da base (só stat nos arquivos); None se ela não existir"""
+    return dataset_version(os.path.join(DATA_PATH, dataset_folder_name))
+
+
+# Os caches por base levam o token de versão dos dados: uma ingestão nova gera outra
+# chave. max_entries descarta as versões antigas.
+#
+# cache_resource (e não cache_data): a base processada é uma só no processo, compartilhada
+# por todas as sessões, sem pickle nem cópia a cada rerun. É somente leitura: o app só
+# lê df_all e trabalha sobre cópias das linhas selecionadas (take_rows, prepare_tsne_input).
+@st.cache_resource(show_spinner=False, max_entries=16)
+def load_and_process_data(dataset_folder_name, data_version, top_plates, plate_model_map):
+    """Lê os arquivos Parquet locais e processa os dados (data_version só entra na chave do cache)"""
+    try:
+        # Monta o caminho completo: data/processed/nome_da_pasta
+        folder_path = os.path.join(DATA_PATH, dataset_folder_name)
+
+        # Cache quente: frame já enriquecido, mapeado em memória sem decodificar o Parquet
+        return load_dataset(folder_path, data_version, top_plates, plate_model_map, HOT_CACHE_PATH)
+
+    except Exception as e:
+        st.error(f"Erro ao ler os dados locais: {e}")
+        return None, None
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_analytics_cube(dataset_folder_name, data_version, _df_all):
+    """Cubo de agregados da base, montado uma vez por carga"""
+    return build_cube(_df_all)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_filter_index(dataset_folder_name, data_version, _df_all):
+    """Índice de filtros da base (bitmaps e arrays ordenados), montado uma vez por carga"""
+    return FilterIndex(_df_all)
+
+
+def reference_map_path(dataset_folder_name, sample_size, random_state, method, strategy):
+    """Arquivo do mapa de referência para a base e os parâmetros de ajuste"""
+    name = fingerprint([dataset_folder_name, sample_size, random_state, method, strategy])[:16]
+    return os.path.join(REFERENCE_MAP_PATH, f"{dataset_folder_name}_{name}.npz")
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_reference_map(dataset_folder_name, data_version, sample_size, random_state, method, strategy, _df_all):
+    """Mapa de referência da base: carregado do disco ou ajustado uma única vez
+
+    O mapa salvo não depende da versão dos dados (o layout fica fixo); com dados
+    novos só as posições das viagens são recalculadas.
+    """
+    path = reference_map_path(dataset_folder_name, sample_size, random_state, method, strategy)
+    if os.path.exists(path):
+        reference_map = ReferenceMap.load(path)
+    else:
+        prepared = prepare_tsne_input(_df_all, sample_size, random_state, strategy=strategy)
+        if prepared is None:
+            return None, None
+        embedding = compute_embedding(
+            prepared['features'], method=method,
+            perplexity=prepared['perplexity'], random_state=random_state
+        )
+        reference_map = ReferenceMap.from_prepared(
+            prepared, embedding,
+            metadata={'method': method, 'perplexity': prepared['perplexity']}
+        )
+        reference_map.save(path)
+
+    # Posiciona todas as viagens da base uma vez; os filtros só selecionam linhas
+    placements = reference_map.project(_df_all)
+    return reference_map, placements
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_feature_matrix(dataset_folder_name, data_version, filters_key, _df_all, _selection):
+    """Matriz float32 das features válidas da seleção (filters_key identifica a seleção)
+
+    Montada uma vez por seleção: tamanho da amostra, semente, estratégia e método
+    só recortam outras linhas dela.
+    """
+    return build_feature_matrix(_df_all, _selection)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_fleet_map(dataset_folder_name, data_version, filters_key, n_clusters, method, random_state,
+                  _df_all, _selection, _feature_matrix=None):
+    """Embedding em dois níveis de todas as viagens filtradas (filters_key identifica a seleção)"""
+    prepared = prepare_fleet_input(_df_all, _selection, _feature_matrix)
+    if prepared is None:
+        return None
+
+    fleet = hierarchical_embedding(prepared['features'], n_clusters, method, random_state)
+    if fleet is None:
+        return None
+
+    fleet['clusters'] = cluster_summary(_df_all, prepared['positions'], fleet['labels'], len(fleet['sizes']))
+    fleet['feature_names'] = prepared['feature_names']
+    fleet['method'] = method
+    return fleet
+
+
+def warm_default_view(dataset_name):
+    """Carga, índices e amostra da visão padrão de uma base pelos caches do app
+
+    Retorna (amostra, chave) quando o embedding ainda não está no cache, senão None.
+    """
+    folder = file_options[dataset_name]
+    plate_model_map = plate_to_model_by_operation[file_to_operation[dataset_name]]
+    version = data_folder_version(folder)
+    if version is None:
+        return None
+    df, _ = load_and_process_data(folder, version, list(plate_model_map.keys()), plate_model_map)
+    if df is None:
+        return None
+
+    selection = get_filter_index(folder, version, df).select(*view_filters())
+    get_analytics_cube(folder, version, df)
+    embedding_cache = get_embedding_cache()
+    feature_matrix = get_feature_matrix(folder, version, filters_key(*view_filters()), df, selection)
+    prepared, cache_key = prepare_view(df, selection, folder, embedding_cache, feature_matrix=feature_matrix)
+    if prepared is None or embedding_cache.get(cache_key) is not None:
+        return None
+    return prepared, cache_key
+
+
+def _warm_default_views(status):
+    start = time.perf_counter()
+    try:
+        # Cargas em paralelo; embeddings na fila com a base padrão primeiro
+        names = sorted(file_options, key=lambda name: name != DEFAULT_DATASET)
+        views = run_parallel(warm_default_view, names)
+        status['loaded'] = len(names)
+
+        # A subida do servidor conta como pedido explícito: refaz as visões que falharam antes
+        job_queue = get_job_queue()
+        pending = []
+        for view in views.values():
+            if view is not None:
+                prepared, cache_key = view
+                job_queue.submit(
+                    cache_key, prepared['features'], DEFAULT_VIEW['method'], prepared['perplexity'],
+                    DEFAULT_VIEW['random_state'], retry=True
+                )
+                pending.append(cache_key)
+
+        while pending:
+            status['pending'] = len(pending)
+            time.sleep(JOB_POLL_SECONDS)
+            pending = [key for key in pending if job_queue.status(key)['state'] not in (JOB_DONE, JOB_FAILED)]
+        status['pending'] = 0
+        status['ready_seconds'] = time.perf_counter() - start
+    except Exception as e:
+        status['error'] = f"{type(e).__name__}: {e}"
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """Aquece, uma vez por processo, as bases e os embeddings da visão padrão em segundo plano"""
+    status = {'loaded': 0, 'total': len(file_options), 'pending': 0, 'ready_seconds': None, 'error': None}
+    threading.Thread(
+        target=_warm_default_views, args=(status,), daemon=True, name='smartdrive-aquecimento'
+    ).start()
+    return status
+
+
+def show_warmup_status(status):
+    """Estado do aquecimento (tempo até os caches ficarem prontos) na barra lateral"""
+    if status['error'] is not None:
+        st.sidebar.caption(f"⚠️ Aquecimento dos caches falhou: {status['error']}")
+    elif status['ready_seconds'] is not None:
+        st.sidebar.caption(f"🔥 Caches da visão padrão prontos em {status['ready_seconds']:.1f} s")
+    elif status['loaded'] < status['total']:
+        st.sidebar.caption(f"🔥 Aquecendo caches: carregando {status['total']} bases...")
+    else:
+        st.sidebar.caption(f"🔥 Aquecendo caches: embeddings da visão padrão na fila: {status['pending']}")
@@ -0,0 +1,154 @@
+"""Amostragem das viagens para a projeção: uniforme, estratificada ou coreset.
+
+A limpeza vem antes do sorteio: as posições recebidas já são as linhas com
+features finitas (``FeatureMatrix``), então a amostra sempre tem
+min(sample_size, válidas) pontos. Cada estratégia devolve as posições sorteadas (em ordem crescente)
+e um peso por ponto: quantas viagens da seleção o ponto representa.
+
+- uniforme: todas as viagens válidas com a mesma chance (peso N/n)
+- estratificada: cota por placa com piso para as placas raras e viagens com
+  evento sobre-amostradas; peso = viagens do estrato / sorteadas do estrato
+- coreset: coreset leve de k-means (Bachem et al., 2018): chance proporcional
+  a 1/N + distância² à média; peso = 1 / (n · chance)
+"""
+import numpy as np
+import pandas as pd
+
+from smartdrive.features import TSNE_CANDIDATE_FEATURES, standardize
+from smartdrive.instrumentation import instrumented
+
+SAMPLING_STRATEGIES = {
+    'uniforme': {'label': 'Uniforme'},
+    'estratificada': {'label': 'Estratificada (placa + eventos)'},
+    'coreset': {'label': 'Coreset k-means (pesos por importância)'}
+}
+
+DEFAULT_SAMPLING_STRATEGY = 'estratificada'
+
+# Estratos e sobre-amostragem das viagens com evento
+STRATA_COLUMNS = ['plate']
+EVENT_COLUMN = 'percurso_com_evento'
+EVENT_BOOST = 3.0
+
+# Piso de pontos por estrato (reduzido quando há estratos demais para a amostra)
+MIN_PER_STRATUM = 30
+
+
+def feature_columns_for(df):
+    """Features candidatas presentes no frame (ou as numéricas, se nenhuma estiver)"""
+    columns = [col for col in TSNE_CANDIDATE_FEATURES if col in df.columns]
+    if not columns:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    return columns
+
+
+def _allocate(counts, demand, sample_size, floor):
+    """Cota por estrato: piso, depois proporcional à demanda, sem passar do tamanho do estrato"""
+    allocation = np.minimum(counts, floor)
+    remaining = sample_size - allocation.sum()
+    while remaining > 0:
+        capacity = counts - allocation
+        share = np.where(capacity > 0, demand, 0.0)
+        if share.sum() == 0:
+            break
+        quota = remaining * share / share.sum()
+        extra = np.minimum(np.floor(quota).astype(np.int64), capacity)
+        if extra.sum() == 0:
+            # Sobra menor que o número de estratos: vai para as maiores frações
+            order = np.argsort(-(quota - np.floor(quota)), kind='stable')
+            order = order[capacity[order] > 0][:remaining]
+            extra = np.zeros_like(allocation)
+            extra[order] = 1
+        allocation += extra
+        remaining -= extra.sum()
+    return allocation
+
+
+def stratified_sample(df, positions, sample_size, random_state=42, strata_columns=None,
+                      event_column=EVENT_COLUMN, event_boost=EVENT_BOOST, min_per_stratum=MIN_PER_STRATUM):
+    """Sorteio por estrato (placa × com/sem evento); retorna (posições, pesos)"""
+    strata_columns = [col for col in (strata_columns or STRATA_COLUMNS) if col in df.columns]
+    keys = {col: df[col].iloc[positions].to_numpy() for col in strata_columns}
+    has_event = None
+    if event_column in df.columns:
+        has_event = df[event_column].iloc[positions].to_numpy(dtype=float, na_value=0) > 0
+        keys['_evento'] = has_event
+    if not keys:
+        return uniform_sample(positions, sample_size, random_state)
+
+    stratum = pd.DataFrame(keys).groupby(list(keys), sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    counts = np.bincount(stratum)
+    demand = counts.astype(float)
+    if has_event is not None:
+        event_strata = np.bincount(stratum, weights=has_event, minlength=len(counts)) > 0
+        demand[event_strata] *= event_boost
+
+    floor = min(min_per_stratum, sample_size // len(counts))
+    allocation = _allocate(counts, demand, sample_size, floor)
+
+    # Ordem aleatória dentro de cada estrato; ficam as primeiras `cota` de cada um
+    rng = np.random.default_rng(random_state)
+    # (permutação + argsort estável nos códigos inteiros: radix, sem ordenar chaves float)
+    shuffled = rng.permutation(len(positions))
+    order = shuffled[np.argsort(stratum[shuffled], kind='stable')]
+    sorted_strata = stratum[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(order)) - starts[sorted_strata]
+    chosen = order[rank < allocation[sorted_strata]]
+
+    chosen.sort()
+    chosen_strata = stratum[chosen]
+    weights = counts[chosen_strata] / allocation[chosen_strata]
+    return positions[chosen], weights
+
+
+def uniform_sample(positions, sample_size, random_state=42):
+    """Sorteio uniforme sem reposição; retorna (posições, pesos)"""
+    if len(positions) <= sample_size:
+        return positions, np.ones(len(positions))
+    rng = np.random.default_rng(random_state)
+    chosen = np.sort(rng.choice(len(positions), size=sample_size, replace=False))
+    return positions[chosen], np.full(sample_size, len(positions) / sample_size)
+
+
+def coreset_sample(df, positions, sample_size, random_state=42, feature_columns=None, feature_matrix=None):
+    """Coreset leve de k-means sobre as features padronizadas; retorna (posições, pesos)
+
+    Com feature_matrix (``FeatureMatrix`` que contém as posições), as features
+    vêm dela em float32 em vez de serem lidas de novo da base.
+    """
+    n_rows = len(positions)
+    if n_rows <= sample_size:
+        return positions, np.ones(n_rows)
+
+    if feature_matrix is not None and positions is feature_matrix.positions:
+        # Colunas constantes não mudam as distâncias: ficam de fora
+        features = feature_matrix.standardized()
+    elif feature_matrix is not None:
+        features, _, _ = standardize(feature_matrix.rows(positions))
+    else:
+        feature_columns = feature_columns or feature_columns_for(df)
+        features = np.column_stack([
+            df[col].iloc[positions].to_numpy(dtype=float, na_value=np.nan) for col in feature_columns
+        ])
+        features, _, _ = standardize(features)
+
+    distances = np.einsum('ij,ij->i', features, features, dtype=np.float64)
+    total = distances.sum()
+    probability = 0.5 / n_rows + (0.5 * distances / total if total > 0 else 0.5 / n_rows)
+    probability /= probability.sum()
+
+    rng = np.random.default_rng(random_state)
+    chosen = np.sort(rng.choice(n_rows, size=sample_size, replace=False, p=probability))
+    return positions[chosen], 1.0 / (sample_size * probability[chosen])
+
+
+@instrumented('Amostragem', rows_arg=1)
+def draw_sample(df, positions, sample_size, random_state=42, strategy=DEFAULT_SAMPLING_STRATEGY,
+                feature_columns=None, feature_matrix=None):
+    """Amostra as posições (já limpas) segundo a estratégia; retorna (posições, pesos)"""
+    if strategy == 'estratificada':
+        return stratified_sample(df, positions, sample_size, random_state)
+    if strategy == 'coreset':
+        return coreset_sample(df, positions, sample_size, random_state, feature_columns, feature_matrix)
+    return uniform_sample(positions, sample_size, random_state)
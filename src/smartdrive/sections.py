@@ -0,0 +1,204 @@
+"""Seções do painel calculadas pelo cubo de agregados e a comparação de operações.
+
+Os filtros e parâmetros da barra lateral chegam num dicionário ``view`` com as
+mesmas chaves de ``DEFAULT_VIEW``.
+"""
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from smartdrive.comparison import comparison_tables, prepare_joint_input, run_parallel, summarize_operation
+from smartdrive.cube import (
+    build_cube, consumption_comparison, event_analysis, event_columns, high_efficiency_analysis, select_cells,
+    type_distribution
+)
+from smartdrive.filter_index import take_rows
+from smartdrive.instrumentation import stage
+from smartdrive.mappings import file_options, file_to_operation, plate_to_model_by_operation
+from smartdrive.perf_panel import show_chart
+from smartdrive.plots import create_comparison_plot, create_distribution_plots
+from smartdrive.resources import (
+    data_folder_version, get_analytics_cube, get_embedding_cache, get_filter_index, load_and_process_data
+)
+from smartdrive.tsne import build_tsne_frame, tsne_cache_key
+from smartdrive.tsne_view import NO_TSNE_INPUT_MESSAGE, queued_embedding
+from smartdrive.warmup import filters_key, view_filters
+
+
+def filters_badge(view):
+    """Resumo dos filtros (formato, período e distância) exibido acima dos resultados"""
+    vehicle_types_str = ', '.join(view['vehicle_types']) if view['vehicle_types'] else 'Nenhum'
+    return (
+        f"**Formato:** {vehicle_types_str} | **Período:** Dias {view['day_min']}-{view['day_max']} | "
+        f"**Distância:** {view['dist_min']}-{view['dist_max']} km"
+    )
+
+
+def render_distributions_section(df_all, selection, analytics_cube, cube_cells):
+    """Tabelas por tipo/placa e gráficos de distribuição das viagens filtradas"""
+    # Tabela de distribuição por tipo de veículo
+    with st.expander("📊 Distribuição por Tipo de Veículo e Eficiência"):
+        type_dist = type_distribution(analytics_cube)
+        st.dataframe(type_dist, use_container_width=True)
+
+    # Tabela de consumo esperado vs real por placa
+    with st.expander("📊 Consumo Esperado vs Real - Top 10 Placas"):
+        st.dataframe(consumption_comparison(cube_cells), use_container_width=True)
+
+    st.subheader("📈 Distribuições e Outliers")
+    with st.spinner('Gerando gráficos de distribuição...'):
+        dist_fig = create_distribution_plots(
+            take_rows(df_all, selection, ['fuel_efficiency', 'vehicle_type', 'totalDistance'])
+        )
+        show_chart(dist_fig)
+
+
+def render_high_efficiency_section(cube_cells):
+    """Top placas e distribuição por tipo entre as viagens de alta eficiência"""
+    st.subheader("🎯 Análise de Veículos Altamente Eficientes")
+    top_efficient, eff_by_type = high_efficiency_analysis(cube_cells)
+
+    if top_efficient is not None:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**Top 10 Placas Mais Eficientes:**")
+            for (plate, model, vtype), eff in top_efficient.items():
+                st.markdown(f"- **{plate}** ({vtype}): {eff:.2f} km/L  \n  _{model}_")
+
+        with col2:
+            st.markdown("**Distribuição por Tipo:**")
+            st.dataframe(eff_by_type, use_container_width=True)
+    else:
+        st.info("Nenhum veículo com alta eficiência encontrado nos filtros atuais.")
+
+
+def render_events_section(cube_cells):
+    """Totais de eventos críticos e placas com mais eventos"""
+    st.subheader("⚠️ Análise de Eventos Críticos de Direção")
+
+    if event_columns(cube_cells.columns) and 'percurso_com_evento' in cube_cells.columns:
+        # Estatísticas gerais de eventos
+        events = event_analysis(cube_cells)
+        total_percursos = events['trips']
+        percursos_com_evento = events['trips_with_events']
+        percent_com_evento = (percursos_com_evento / total_percursos * 100) if total_percursos > 0 else 0
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📊 Total de Percursos", total_percursos)
+        with col2:
+            st.metric("⚠️ Percursos com Eventos", int(percursos_com_evento))
+        with col3:
+            st.metric("📈 % com Eventos", f"{percent_com_evento:.1f}%")
+
+        # Top eventos mais frequentes
+        if not events['event_totals'].empty:
+            st.markdown("**Top 10 Eventos Mais Frequentes:**")
+            st.dataframe(events['event_totals'], use_container_width=True)
+
+            # Placas com mais eventos críticos
+            if events['top_critical'] is not None:
+                st.markdown("**Top 10 Placas com Mais Eventos Críticos:**")
+                for plate, count in events['top_critical'].items():
+                    st.markdown(f"- **{plate}**: {int(count)} eventos críticos")
+    else:
+        st.info("Dados de eventos não disponíveis nesta base.")
+
+
+def load_operation(dataset_name, view):
+    """Carga, filtros e resumo de uma base (executa numa thread do pool da comparação)"""
+    start = time.perf_counter()
+    folder = file_options[dataset_name]
+    operation_name = file_to_operation[dataset_name]
+    plate_model_map = plate_to_model_by_operation[operation_name]
+
+    version = data_folder_version(folder)
+    if version is None:
+        return None
+    df, rows = load_and_process_data(folder, version, list(plate_model_map.keys()), plate_model_map)
+    if df is None:
+        return None
+
+    selection = get_filter_index(folder, version, df).select(*view_filters(view))
+    cells = select_cells(get_analytics_cube(folder, version, df), *view_filters(view))
+    if cells is None:
+        cells = build_cube(take_rows(df, selection))
+
+    result = summarize_operation(operation_name, cells, rows)
+    result.update({'df': df, 'selection': selection, 'version': version, 'seconds': time.perf_counter() - start})
+    return result
+
+
+def render_comparison_view(dataset_names, view):
+    """Métricas e tabelas de eficiência das operações lado a lado (+ t-SNE conjunto opcional)"""
+    st.subheader("🔀 Comparação de Operações")
+    if not dataset_names:
+        st.info("Selecione ao menos uma base na barra lateral.")
+        return
+
+    # As threads do pool herdam o contexto do script (cache e mensagens de erro do Streamlit)
+    ctx = get_script_run_ctx()
+    start = time.perf_counter()
+    with st.spinner(f'Carregando {len(dataset_names)} bases em paralelo...'), stage('Comparação: carga paralela'):
+        loaded = run_parallel(
+            lambda name: load_operation(name, view), dataset_names,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        )
+    elapsed = time.perf_counter() - start
+
+    missing = [name for name, result in loaded.items() if result is None]
+    results = {file_to_operation[name]: result for name, result in loaded.items() if result is not None}
+    if missing:
+        st.warning(f"Bases indisponíveis: {', '.join(missing)}")
+    if not results:
+        st.error("❌ Nenhuma das bases selecionadas pôde ser carregada.")
+        return
+
+    slowest = max(result['seconds'] for result in results.values())
+    total = sum(result['seconds'] for result in results.values())
+    st.caption(
+        f"⏱️ {len(results)} bases em {elapsed:.2f} s (mais lenta: {slowest:.2f} s; "
+        f"soma das cargas: {total:.2f} s)"
+    )
+
+    st.info(f"🔍 {filters_badge(view)}")
+
+    summary, shares, plates = comparison_tables(results)
+    st.markdown("**📊 Resumo por Operação:**")
+    st.dataframe(summary, use_container_width=True)
+    st.markdown("**⚡ % das Viagens por Classe de Eficiência:**")
+    st.dataframe(shares, use_container_width=True)
+    with st.expander("📊 Consumo Esperado vs Real por Placa"):
+        st.dataframe(plates, use_container_width=True, hide_index=True)
+
+    if st.checkbox("📊 t-SNE conjunto das operações", value=False, key='comparison_tsne',
+                   help="Amostra a mesma quantidade de viagens de cada operação e projeta todas num só mapa"):
+        prepared = prepare_joint_input(
+            {operation: (result['df'], result['selection']) for operation, result in results.items()},
+            view['sample_size'], view['random_state'], view['strategy']
+        )
+        if prepared is None:
+            st.warning(NO_TSNE_INPUT_MESSAGE)
+            return
+
+        embedding_cache = get_embedding_cache()
+        cache_context = {
+            'datasets': sorted((file_options[name], loaded[name]['version']) for name in dataset_names
+                               if loaded[name] is not None),
+            'filters': filters_key(*view_filters(view))
+        }
+        cache_key = tsne_cache_key(embedding_cache, prepared, cache_context, view['method'], view['sample_size'],
+                                   view['random_state'])
+        embedding = queued_embedding(prepared, cache_key, view['method'], embedding_cache, view['random_state'])
+        if embedding is None:
+            return
+
+        tsne_df, _ = build_tsne_frame(prepared, embedding, view['method'])
+        show_chart(create_comparison_plot(tsne_df))
+        st.caption(
+            f"{len(tsne_df)} viagens ({len(tsne_df) // len(results)} por operação, no máximo) de "
+            f"{prepared['valid_rows']} válidas; {len(prepared['feature_names'])} features em comum"
+        )
@@ -0,0 +1,167 @@
+"""Preparação das features e execução da projeção t-SNE (ou outro método).
+
+``prepare_tsne_input`` limpa, amostra (ver ``smartdrive.sampling``) e
+normaliza as features, recortando as linhas da ``FeatureMatrix`` (float32)
+da seleção; ``run_tsne``
+projeta (reaproveitando o cache de embeddings, se informado) e junta o
+embedding às linhas amostradas.
+"""
+import numpy as np
+
+from smartdrive.embedding_cache import array_digest
+from smartdrive.embeddings import DEFAULT_EMBEDDING_METHOD, compute_embedding
+from smartdrive.features import FeatureMatrix, non_constant_columns
+from smartdrive.instrumentation import instrumented
+from smartdrive.sampling import DEFAULT_SAMPLING_STRATEGY, draw_sample, feature_columns_for
+
+
+@instrumented('t-SNE: preparação')
+def prepare_tsne_input(df, sample_size=5000, random_state=42, positions=None,
+                       strategy=DEFAULT_SAMPLING_STRATEGY, feature_matrix=None):
+    """Limpa, amostra e normaliza as features para a projeção
+
+    positions (opcional) restringe a base às linhas selecionadas pelo FilterIndex.
+    feature_matrix (opcional) é a ``FeatureMatrix`` já montada para essa seleção:
+    mudar o tamanho da amostra só recorta outras linhas dela. As linhas inválidas
+    saem antes do sorteio: a amostra tem min(sample_size, válidas) pontos.
+    """
+    if df is None or df.empty:
+        return None
+
+    if feature_matrix is None:
+        feature_matrix = build_feature_matrix(df, positions)
+    if len(feature_matrix) == 0:
+        return None
+
+    sampled, weights = draw_sample(
+        df, feature_matrix.positions, sample_size, random_state, strategy,
+        feature_matrix.columns, feature_matrix
+    )
+    working_df = df.take(sampled)
+    working_df['sample_weight'] = weights
+    values = feature_matrix.rows(sampled)
+
+    # Remover colunas constantes na amostra (mínimo == máximo)
+    keep = non_constant_columns(values)
+    if not keep.any():
+        return None
+    if not keep.all():
+        values = values[:, keep]
+    n_samples = values.shape[0]
+
+    if n_samples < 3:
+        return None
+
+    # Normalizar no lugar, em float32 (values já é uma cópia das linhas sorteadas)
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler(copy=False)
+    scaled_features = np.ascontiguousarray(scaler.fit_transform(values))
+
+    # Calcular perplexidade apropriada
+    perplexity = min(30, max(5, n_samples // 3))
+    perplexity = min(perplexity, n_samples - 1)
+    perplexity = max(perplexity, 1)
+
+    return {
+        'working_df': working_df,
+        'features': scaled_features,
+        'feature_names': [col for col, kept in zip(feature_matrix.columns, keep) if kept],
+        'perplexity': perplexity,
+        'scaler': scaler,
+        'strategy': strategy,
+        'valid_rows': len(feature_matrix)
+    }
+
+
+@instrumented('Features: matriz float32', rows_arg=1)
+def build_feature_matrix(df, positions=None):
+    """FeatureMatrix das features candidatas presentes na base, para as posições dadas"""
+    return FeatureMatrix(df, positions, feature_columns_for(df))
+
+
+@instrumented('Frota: preparação')
+def prepare_fleet_input(df, positions=None, feature_matrix=None):
+    """Features normalizadas (float32) de todas as viagens válidas da seleção, sem amostrar"""
+    if df is None or df.empty:
+        return None
+
+    if feature_matrix is None:
+        feature_matrix = build_feature_matrix(df, positions)
+    if len(feature_matrix) == 0:
+        return None
+
+    # Remover colunas constantes (mínimo == máximo na seleção) e normalizar
+    keep = feature_matrix.non_constant()
+    if not keep.any():
+        return None
+    features = feature_matrix.standardized(keep)
+
+    return {
+        'positions': feature_matrix.positions,
+        'features': features,
+        'feature_names': [col for col, kept in zip(feature_matrix.columns, keep) if kept]
+    }
+
+
+def tsne_cache_key(cache, prepared, cache_context, method, sample_size, random_state):
+    """Chave do cache: base, filtros, parâmetros e o conteúdo da amostra normalizada"""
+    return cache.make_key(
+        context=cache_context,
+        method=method,
+        sample_size=sample_size,
+        random_state=random_state,
+        strategy=prepared['strategy'],
+        features=prepared['feature_names'],
+        perplexity=prepared['perplexity'],
+        data=array_digest(prepared['features'])
+    )
+
+
+def build_tsne_frame(prepared, embedding, method, cache_hit=False):
+    """Junta o embedding às linhas amostradas e monta os metadados"""
+    tsne_df = prepared['working_df'].copy()
+    tsne_df['tsne_1'] = embedding[:, 0]
+    tsne_df['tsne_2'] = embedding[:, 1]
+
+    metadata = {
+        'features': prepared['feature_names'],
+        'perplexity': prepared['perplexity'],
+        'sample_size': prepared['features'].shape[0],
+        'valid_rows': prepared['valid_rows'],
+        'strategy': prepared['strategy'],
+        'method': method,
+        'cache_hit': cache_hit
+    }
+
+    return tsne_df, metadata
+
+
+@instrumented('t-SNE: execução')
+def run_tsne(df, sample_size=5000, random_state=42, cache=None, cache_context=None,
+             method=DEFAULT_EMBEDDING_METHOD, positions=None, strategy=DEFAULT_SAMPLING_STRATEGY,
+             feature_matrix=None):
+    """Executa o t-SNE nos dados (reaproveitando o cache de embeddings, se informado)"""
+    prepared = prepare_tsne_input(df, sample_size, random_state, positions, strategy, feature_matrix)
+    if prepared is None:
+        return None, None
+
+    embedding = None
+    cache_key = None
+    if cache is not None:
+        cache_key = tsne_cache_key(cache, prepared, cache_context, method, sample_size, random_state)
+        embedding = cache.get(cache_key)
+
+    cache_hit = embedding is not None
+
+    # Executar a projeção (t-SNE por padrão)
+    if embedding is None:
+        embedding = compute_embedding(
+            prepared['features'], method=method,
+            perplexity=prepared['perplexity'], random_state=random_state
+        )
+
+        if cache is not None:
+            cache.put(cache_key, embedding)
+
+    return build_tsne_frame(prepared, embedding, method, cache_hit)
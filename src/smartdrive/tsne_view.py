@@ -0,0 +1,446 @@
+"""Seção t-SNE do app: escolha do modo de projeção, jobs e desenho do gráfico.
+
+Os parâmetros da barra lateral chegam num dicionário ``view`` com as mesmas
+chaves de ``DEFAULT_VIEW``. Widgets só de visualização (cor, outliers,
+renderização e zoom) ficam em fragmentos e não refazem o embedding.
+"""
+import time
+
+import numpy as np
+import streamlit as st
+
+from smartdrive.embedding_cache import array_digest
+from smartdrive.embeddings import EMBEDDING_METHODS, compute_embedding
+from smartdrive.hierarchical import DEFAULT_MICRO_CLUSTERS
+from smartdrive.job_queue import (
+    DONE as JOB_DONE, FAILED as JOB_FAILED, QUEUED as JOB_QUEUED, RUNNING as JOB_RUNNING
+)
+from smartdrive.perf_panel import fragment_trace, performance_panel_enabled, section_timer, show_chart
+from smartdrive.plots import create_fleet_map, create_tsne_plot, create_tsne_raster, selection_box
+from smartdrive.progressive import ProgressiveEmbeddingJob, checkpoint_note
+from smartdrive.reference_map import project_on_reference_map
+from smartdrive.resources import (
+    JOB_POLL_SECONDS, get_embedding_cache, get_feature_matrix, get_fleet_map, get_job_queue, get_reference_map
+)
+from smartdrive.sampling import SAMPLING_STRATEGIES
+from smartdrive.tsne import build_tsne_frame, prepare_tsne_input, tsne_cache_key
+from smartdrive.warmup import filters_key, view_filters
+
+# Intervalo de atualização do gráfico no modo progressivo (segundos)
+PROGRESSIVE_REFRESH_SECONDS = 1.0
+
+# Aviso quando a figura do t-SNE não tem pontos
+NO_TSNE_DATA_MESSAGE = "Não há dados suficientes para gerar o t-SNE com os filtros aplicados."
+
+# Aviso quando a amostra ou o mapa não puderam ser montados
+NO_TSNE_INPUT_MESSAGE = "Não foi possível gerar o t-SNE com os dados filtrados."
+
+# Renderização do t-SNE: acima de RASTER_POINT_LIMIT pontos, a automática agrega no servidor
+RENDER_MODES = ['Automática', 'Pontos', 'Densidade']
+RASTER_POINT_LIMIT = 5000
+
+
+def projection_mode(fleet_map=False, use_reference_map=False, progressive=True):
+    """Modo da seção t-SNE a partir das opções da barra lateral (a frota tem precedência)"""
+    if fleet_map:
+        return 'frota'
+    if use_reference_map:
+        return 'referência'
+    return 'progressivo' if progressive else 'fila'
+
+
+def tsne_view_options(with_outliers=True, with_render_mode=False):
+    """Widgets só de visualização do t-SNE (dentro do fragmento: mudam só o gráfico)"""
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        color_by = st.selectbox(
+            "Colorir por:",
+            options=['Eficiência de Combustível (km/L)', 'Evento Dominante', 'Distância Total (km)'],
+            index=0,
+            key='tsne_color_by'
+        )
+    show_outliers = False
+    if with_outliers:
+        with col2:
+            show_outliers = st.checkbox("🎯 Destacar outliers", value=False, key='tsne_show_outliers')
+    render_mode = RENDER_MODES[0]
+    if with_render_mode:
+        with col3:
+            render_mode = st.selectbox(
+                "Renderização:",
+                options=RENDER_MODES,
+                index=0,
+                key='tsne_render_mode',
+                help=f"Automática agrega no servidor acima de {RASTER_POINT_LIMIT} pontos; "
+                     "selecione uma região com a caixa para ver os pontos com hover"
+            )
+    return color_by, show_outliers, render_mode
+
+
+def show_tsne_result(tsne_df, metadata, embedding_cache, random_state):
+    """Exibe o gráfico t-SNE final e as informações técnicas"""
+
+    @st.fragment
+    def _tsne_chart():
+        # Cor e outliers reexecutam só este fragmento, sem refazer filtros nem embedding
+        with fragment_trace():
+            with section_timer("t-SNE: gráfico"):
+                color_by, show_outliers, render_mode = tsne_view_options(with_render_mode=True)
+                _draw_tsne_result(
+                    tsne_df, metadata, embedding_cache, random_state, color_by, show_outliers, render_mode
+                )
+        if performance_panel_enabled():
+            entry = st.session_state['section_timings']["t-SNE: gráfico"]
+            st.caption(f"⏱️ Gráfico desenhado em {entry['last_ms']:.0f} ms (rerun {entry['rerun']})")
+
+    _tsne_chart()
+
+
+def _zoom_to_selection(chart_key, token):
+    """Callback da seleção na imagem agregada: guarda a região para o próximo rerun do fragmento"""
+    box = selection_box(st.session_state.get(chart_key))
+    if box is not None:
+        st.session_state['tsne_zoom'] = {'token': token, 'window': box}
+        # Chave nova para o gráfico: a seleção antiga não volta a disparar o zoom
+        st.session_state['tsne_zoom_generation'] = st.session_state.get('tsne_zoom_generation', 0) + 1
+
+
+def _reset_zoom():
+    st.session_state['tsne_zoom'] = None
+
+
+def render_tsne_view(tsne_df, color_by, show_outliers, render_mode):
+    """Pontos com hover ou imagem agregada no servidor, com zoom por seleção de região"""
+    # O zoom vale só para o resultado em que a região foi selecionada
+    token = array_digest(tsne_df[['tsne_1', 'tsne_2']].to_numpy(dtype=np.float32))
+    zoom = st.session_state.get('tsne_zoom')
+    window = zoom['window'] if zoom is not None and zoom['token'] == token else None
+
+    view_df = tsne_df
+    if window is not None:
+        x0, x1, y0, y1 = window
+        view_df = tsne_df[tsne_df['tsne_1'].between(x0, x1) & tsne_df['tsne_2'].between(y0, y1)]
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"🔍 Zoom: {len(view_df)} de {len(tsne_df)} viagens na região selecionada")
+        with col2:
+            st.button("↩️ Visão completa", key='tsne_zoom_reset', on_click=_reset_zoom)
+
+    rasterize = render_mode == 'Densidade' or (render_mode == 'Automática' and len(view_df) > RASTER_POINT_LIMIT)
+    if not rasterize:
+        tsne_fig = create_tsne_plot(view_df, color_by, show_outliers)
+        if tsne_fig is None:
+            return False
+        show_chart(tsne_fig)
+        return True
+
+    tsne_fig = create_tsne_raster(
+        view_df, color_by,
+        x_range=window[:2] if window is not None else None,
+        y_range=window[2:] if window is not None else None
+    )
+    if tsne_fig is None:
+        return False
+    st.caption(
+        f"🗺️ {len(view_df)} viagens agregadas no servidor. Selecione uma região com a caixa para "
+        f"aproximar; com até {RASTER_POINT_LIMIT} viagens na região, os pontos aparecem com hover."
+    )
+    chart_key = f"tsne_raster_{st.session_state.get('tsne_zoom_generation', 0)}"
+    show_chart(
+        tsne_fig, key=chart_key, selection_mode='box',
+        on_select=lambda: _zoom_to_selection(chart_key, token)
+    )
+    return True
+
+
+def _draw_tsne_result(tsne_df, metadata, embedding_cache, random_state, color_by, show_outliers, render_mode):
+    if not render_tsne_view(tsne_df, color_by, show_outliers, render_mode):
+        st.warning(NO_TSNE_DATA_MESSAGE)
+        return
+
+    # Informações sobre o t-SNE
+    with st.expander("ℹ️ Informações Técnicas do t-SNE"):
+        cache_stats = embedding_cache.stats
+        reference_line = ''
+        if 'reference_size' in metadata:
+            reference_line = (
+                f"- **Mapa de referência:** ajustado em {metadata['reference_size']} viagens; "
+                f"pontos posicionados por kNN, sem refit"
+            )
+        st.markdown(f"""
+        - **Método:** {EMBEDDING_METHODS[metadata['method']]['label']}
+        - **Amostras utilizadas:** {metadata['sample_size']} de {metadata['valid_rows']} viagens válidas ({SAMPLING_STRATEGIES[metadata['strategy']]['label']}; cada ponto representa em média {metadata['valid_rows'] / max(metadata['sample_size'], 1):.1f} viagens)
+        - **Perplexidade:** {metadata['perplexity']}
+        - **Features utilizadas:** {len(metadata['features'])}
+        - **Random state:** {random_state}
+        - **Cache de embeddings:** {'hit' if metadata['cache_hit'] else 'miss'} (hits: {cache_stats['memory_hits']} memória / {cache_stats['disk_hits']} disco, misses: {cache_stats['misses']})
+        {reference_line}
+
+        **Features principais:**
+        {', '.join(metadata['features'][:10])}
+        """)
+
+    st.success("✅ Gráfico t-SNE gerado com sucesso!")
+
+
+def show_fleet_result(fleet, random_state):
+    """Exibe o mapa da frota (densidade + centróides); a cor reexecuta só o fragmento"""
+
+    @st.fragment
+    def _fleet_chart():
+        with section_timer("Frota: gráfico"):
+            color_by, _, _ = tsne_view_options(with_outliers=False)
+            fleet_fig = create_fleet_map(
+                fleet['embedding'], fleet['centroid_embedding'], fleet['clusters'], color_by
+            )
+            if fleet_fig is None:
+                st.warning(NO_TSNE_DATA_MESSAGE)
+                return
+            show_chart(fleet_fig)
+
+    _fleet_chart()
+
+    with st.expander("ℹ️ Informações Técnicas do Mapa da Frota"):
+        st.markdown(f"""
+        - **Método (centróides):** {EMBEDDING_METHODS[fleet['method']]['label']}
+        - **Viagens posicionadas:** {len(fleet['embedding'])} (todas as válidas da seleção)
+        - **Micro-clusters:** {len(fleet['sizes'])} (mediana de {np.median(fleet['sizes']):.0f} viagens por cluster)
+        - **Perplexidade:** {fleet['perplexity']}
+        - **Features utilizadas:** {len(fleet['feature_names'])}
+        - **Random state:** {random_state}
+
+        Cada viagem fica em volta do centróide do seu micro-cluster; o fundo mostra a
+        densidade de viagens e os círculos são os centróides (tamanho = viagens).
+        """)
+
+    st.success("✅ Mapa da frota gerado com sucesso!")
+
+
+def queued_embedding(prepared, cache_key, method, embedding_cache, random_state):
+    """Embedding do cache; na falta, envia à fila de jobs e mostra posição e progresso (None)"""
+    embedding = embedding_cache.get(cache_key)
+    if embedding is not None:
+        return embedding
+
+    # PCA é instantâneo: não compensa um processo na fila
+    if method == 'pca':
+        embedding = compute_embedding(prepared['features'], method=method, random_state=random_state)
+        embedding_cache.put(cache_key, embedding)
+        return embedding
+
+    # Pedido idêntico de outra sessão (mesma chave) entra no mesmo job
+    job_queue = get_job_queue()
+    job_queue.submit(cache_key, prepared['features'], method, prepared['perplexity'], random_state)
+    render_job_status(job_queue, cache_key, method, prepared)
+    return None
+
+
+def render_job_status(job_queue, cache_key, method, prepared):
+    """Posição na fila e progresso do job; refaz a página quando ele termina"""
+    status = job_queue.status(cache_key)
+    if status is not None and status['state'] == JOB_FAILED:
+        # Sem polling: o job só volta para a fila a pedido do usuário
+        st.error(f"❌ Erro ao gerar o gráfico: {status['error']}")
+        st.button(
+            "🔁 Tentar novamente", key='tsne_job_retry', on_click=job_queue.submit,
+            args=(cache_key, prepared['features'], method, prepared['perplexity'], status['random_state']),
+            kwargs={'retry': True}
+        )
+        return
+
+    # O fragmento só existe enquanto o job está na fila ou rodando
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def _job_status():
+        status = job_queue.status(cache_key)
+        if status is None or status['state'] in (JOB_DONE, JOB_FAILED):
+            st.rerun()
+
+        label = EMBEDDING_METHODS[method]['label']
+        if status['state'] == JOB_QUEUED:
+            st.progress(
+                0.0,
+                text=f"⏳ {label} na fila: posição {status['position']} "
+                     f"({status['running']} em execução, até {job_queue.max_workers} por vez)"
+            )
+        else:
+            elapsed = time.time() - status['started_at']
+            note = checkpoint_note(method)
+            st.progress(
+                status['progress'],
+                text=f"⚙️ Calculando {label} ({status['n_rows']} pontos): "
+                     f"checkpoint {status['checkpoint']}/{status['total']}, {elapsed:.0f} s"
+                     + (f"; {note}" if note else "")
+            )
+        st.caption(
+            "O cálculo segue mesmo com a aba fechada: o resultado vai para o cache de embeddings "
+            "e aparece ao voltar com os mesmos filtros e parâmetros."
+        )
+
+    _job_status()
+
+
+def get_progressive_job(prepared, cache_key, method, embedding_cache, random_state):
+    """Retorna (job da sessão, None) ou (None, embedding) se já estiver no cache"""
+    job = st.session_state.get('tsne_job')
+    if job is not None and st.session_state.get('tsne_job_key') == cache_key:
+        return job, None
+
+    # Parâmetros mudaram: o job antigo é descartado
+    if job is not None:
+        job.cancel()
+        st.session_state['tsne_job'] = None
+        st.session_state['tsne_job_key'] = None
+
+    embedding = embedding_cache.get(cache_key)
+    if embedding is not None:
+        return None, embedding
+
+    job = ProgressiveEmbeddingJob(
+        prepared['features'],
+        method=method,
+        perplexity=prepared['perplexity'],
+        random_state=random_state,
+        on_done=lambda embedding: embedding_cache.put(cache_key, embedding)
+    ).start()
+    st.session_state['tsne_job'] = job
+    st.session_state['tsne_job_key'] = cache_key
+    return job, None
+
+
+def render_progressive_tsne(job, prepared, method):
+    """Mostra a prévia e redesenha só o gráfico a cada checkpoint do job"""
+    polling = not job.done
+
+    @st.fragment(run_every=PROGRESSIVE_REFRESH_SECONDS if polling else None)
+    def _progressive_chart():
+        if job.error is not None:
+            st.error(f"❌ Erro ao gerar o gráfico: {job.error}")
+            return
+
+        if job.done and polling:
+            # Terminou: rerun completo para exibir o resultado final sem polling
+            st.rerun()
+
+        color_by, show_outliers, _ = tsne_view_options()
+        note = checkpoint_note(method)
+        st.progress(
+            job.progress,
+            text=f"Prévia PCA exibida; refinando em segundo plano (checkpoint {job.checkpoint}/{job.total})..."
+                 + (f" ({note})" if note else "")
+        )
+        tsne_df, _ = build_tsne_frame(prepared, job.latest, method)
+        tsne_fig = create_tsne_plot(tsne_df, color_by, show_outliers)
+        if tsne_fig is not None:
+            show_chart(tsne_fig)
+        else:
+            st.warning(NO_TSNE_DATA_MESSAGE)
+
+    _progressive_chart()
+
+
+def _render_fleet(df_all, selection, dataset_folder, data_version, view, n_micro_clusters, feature_matrix):
+    with st.spinner('Agrupando a frota em micro-clusters e projetando os centróides...'):
+        fleet = get_fleet_map(
+            dataset_folder, data_version, filters_key(*view_filters(view)), n_micro_clusters,
+            view['method'], view['random_state'], df_all, selection, feature_matrix
+        )
+
+    if fleet is not None:
+        show_fleet_result(fleet, view['random_state'])
+    else:
+        st.warning(NO_TSNE_INPUT_MESSAGE)
+
+
+def _render_reference(df_all, selection, dataset_folder, data_version, view, embedding_cache):
+    with st.spinner('Preparando o mapa de referência (só na primeira vez)...'):
+        reference_map, placements = get_reference_map(
+            dataset_folder, data_version, view['sample_size'], view['random_state'], view['method'],
+            view['strategy'], df_all
+        )
+
+    tsne_df, metadata = (None, None)
+    if reference_map is not None:
+        tsne_df, metadata = project_on_reference_map(
+            df_all, selection, reference_map, placements, view['sample_size'], view['random_state'],
+            view['strategy']
+        )
+
+    if tsne_df is not None:
+        show_tsne_result(tsne_df, metadata, embedding_cache, view['random_state'])
+    else:
+        st.warning(NO_TSNE_INPUT_MESSAGE)
+
+
+def _render_progressive(prepared, cache_key, view, embedding_cache):
+    method = view['method']
+    queued = st.session_state.get('tsne_job_key') != cache_key and get_job_queue().status(cache_key)
+    if queued and queued['state'] in (JOB_QUEUED, JOB_RUNNING):
+        # Mesmo embedding já na fila (aquecimento ou outra sessão): acompanha o job
+        render_job_status(get_job_queue(), cache_key, method, prepared)
+        return
+
+    job, cached_embedding = get_progressive_job(prepared, cache_key, method, embedding_cache, view['random_state'])
+    if job is None:
+        tsne_df, metadata = build_tsne_frame(prepared, cached_embedding, method, cache_hit=True)
+        show_tsne_result(tsne_df, metadata, embedding_cache, view['random_state'])
+    elif job.done:
+        tsne_df, metadata = build_tsne_frame(prepared, job.latest, method)
+        show_tsne_result(tsne_df, metadata, embedding_cache, view['random_state'])
+    else:
+        render_progressive_tsne(job, prepared, method)
+
+
+def _render_queued(prepared, cache_key, view, embedding_cache):
+    # Sem prévia: o embedding roda na fila de jobs, fora da thread do script
+    embedding = queued_embedding(prepared, cache_key, view['method'], embedding_cache, view['random_state'])
+    if embedding is not None:
+        tsne_df, metadata = build_tsne_frame(prepared, embedding, view['method'], cache_hit=True)
+        show_tsne_result(tsne_df, metadata, embedding_cache, view['random_state'])
+
+
+def render_tsne_section(df_all, selection, dataset_folder, data_version, view, mode='progressivo',
+                        n_micro_clusters=DEFAULT_MICRO_CLUSTERS):
+    """Projeção das viagens filtradas no modo escolhido (embedding em cache; cor e outliers num fragmento)"""
+    st.subheader("📊 Visualização t-SNE")
+
+    if len(selection) < 10:
+        st.warning("⚠️ Dados insuficientes para gerar o t-SNE. Ajuste os filtros para incluir mais dados.")
+        return
+
+    try:
+        # Widgets só de visualização reaproveitam o cache de embeddings
+        embedding_cache = get_embedding_cache()
+        cache_context = {'dataset': dataset_folder, 'filters': filters_key(*view_filters(view))}
+
+        feature_matrix = None
+        if mode != 'referência':
+            feature_matrix = get_feature_matrix(
+                dataset_folder, data_version, cache_context['filters'], df_all, selection
+            )
+
+        if mode == 'frota':
+            _render_fleet(df_all, selection, dataset_folder, data_version, view, n_micro_clusters, feature_matrix)
+            return
+        if mode == 'referência':
+            _render_reference(df_all, selection, dataset_folder, data_version, view, embedding_cache)
+            return
+
+        prepared = prepare_tsne_input(
+            df_all, view['sample_size'], view['random_state'], positions=selection, strategy=view['strategy'],
+            feature_matrix=feature_matrix
+        )
+        if prepared is None:
+            st.warning(NO_TSNE_INPUT_MESSAGE)
+            return
+
+        cache_key = tsne_cache_key(
+            embedding_cache, prepared, cache_context, view['method'], view['sample_size'], view['random_state']
+        )
+        if mode == 'progressivo':
+            _render_progressive(prepared, cache_key, view, embedding_cache)
+        else:
+            _render_queued(prepared, cache_key, view, embedding_cache)
+
+    except Exception as e:
+        st.error(f"❌ Erro ao gerar o gráfico: {e}")
+        st.exception(e)
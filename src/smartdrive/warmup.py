@@ -0,0 +1,163 @@
+"""Aquecimento dos caches persistentes para a visão padrão do app.
+
+Depois de um deploy, o primeiro visitante pagaria o caminho frio inteiro:
+decodificar o Parquet, enriquecer as viagens e rodar o t-SNE da visão padrão.
+O aquecimento faz isso antes: grava o cache quente de cada base e o embedding
+da visão padrão (valores iniciais da barra lateral) no cache de embeddings,
+com a mesma chave que o app calcula e pelo mesmo cálculo da fila de jobs
+(``embedding_steps`` até o último checkpoint).
+
+Uso no deploy, depois do ``preprocess_data.py``::
+
+    python -m smartdrive.warmup
+    python -m smartdrive.warmup --datasets Reiter Framento --no-embeddings
+
+O app também aquece as bases em segundo plano quando o servidor sobe
+(``SMARTDRIVE_WARMUP=0`` desliga).
+"""
+import argparse
+import os
+import time
+
+from smartdrive.comparison import run_parallel
+from smartdrive.embedding_cache import EmbeddingCache, fingerprint
+from smartdrive.embeddings import DEFAULT_EMBEDDING_METHOD
+from smartdrive.filter_index import FilterIndex
+from smartdrive.loader import dataset_version
+from smartdrive.mappings import file_options, file_to_operation, plate_to_model_by_operation
+from smartdrive.pipeline import load_dataset
+from smartdrive.progressive import embedding_steps
+from smartdrive.sampling import DEFAULT_SAMPLING_STRATEGY
+from smartdrive.tsne import build_feature_matrix, prepare_tsne_input, tsne_cache_key
+
+# Base aberta por padrão no app
+DEFAULT_DATASET = "Delta 2 (BRF Secundaria)"
+
+# Visão padrão: valores iniciais dos filtros e parâmetros da barra lateral
+DEFAULT_VIEW = {
+    'vehicle_types': ['Extra Pesado', 'Médio', 'Leve', 'Desconhecido'],
+    'efficiency': 'Todos',
+    'dist_min': 0,
+    'dist_max': 100,
+    'day_min': 1,
+    'day_max': 31,
+    'sample_size': 5000,
+    'random_state': 42,
+    'strategy': DEFAULT_SAMPLING_STRATEGY,
+    'method': DEFAULT_EMBEDDING_METHOD
+}
+
+
+def filters_key(vehicle_types, efficiency, dist_min, dist_max, day_min, day_max):
+    """Impressão digital dos filtros da barra lateral (entra nas chaves dos caches)"""
+    return fingerprint([sorted(vehicle_types), efficiency, dist_min, dist_max, day_min, day_max])
+
+
+def view_filters(view=DEFAULT_VIEW):
+    """Filtros da visão na ordem de ``FilterIndex.select`` e ``select_cells``"""
+    return (
+        view['vehicle_types'], view['efficiency'],
+        view['dist_min'], view['dist_max'], view['day_min'], view['day_max']
+    )
+
+
+def dataset_plates(dataset_name):
+    """(top placas, mapa placa → modelo) da operação da base"""
+    plate_model_map = plate_to_model_by_operation[file_to_operation[dataset_name]]
+    return list(plate_model_map.keys()), plate_model_map
+
+
+def prepare_view(df, selection, dataset_folder_name, embedding_cache, view=DEFAULT_VIEW, feature_matrix=None):
+    """Amostra normalizada da visão e a chave do seu embedding; (None, None) sem dados suficientes"""
+    if feature_matrix is None:
+        feature_matrix = build_feature_matrix(df, selection)
+    prepared = prepare_tsne_input(
+        df, view['sample_size'], view['random_state'], positions=selection, strategy=view['strategy'],
+        feature_matrix=feature_matrix
+    )
+    if prepared is None:
+        return None, None
+
+    cache_context = {'dataset': dataset_folder_name, 'filters': filters_key(*view_filters(view))}
+    cache_key = tsne_cache_key(
+        embedding_cache, prepared, cache_context, view['method'], view['sample_size'], view['random_state']
+    )
+    return prepared, cache_key
+
+
+def load_view(dataset_name, data_path, hot_cache_dir, embedding_cache, view=DEFAULT_VIEW):
+    """Carga da base (gravando o cache quente) e amostra da visão padrão; None se a base não existir"""
+    start = time.perf_counter()
+    folder = file_options[dataset_name]
+    folder_path = os.path.join(data_path, folder)
+    version = dataset_version(folder_path)
+    if version is None:
+        return None
+
+    top_plates, plate_model_map = dataset_plates(dataset_name)
+    df, _ = load_dataset(folder_path, version, top_plates, plate_model_map, hot_cache_dir)
+    selection = FilterIndex(df).select(*view_filters(view))
+    prepared, cache_key = prepare_view(df, selection, folder, embedding_cache, view)
+    return {
+        'rows': len(df),
+        'prepared': prepared,
+        'cache_key': cache_key,
+        'cached': cache_key is not None and embedding_cache.get(cache_key) is not None,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquece o cache quente das bases e os embeddings da visão padrão")
+    parser.add_argument('--datasets', nargs='+', default=list(file_options),
+                        help="Bases a aquecer (nomes do app ou das pastas; padrão: todas)")
+    parser.add_argument('--data-path', default="data/processed")
+    parser.add_argument('--hot-cache', default=os.environ.get("SMARTDRIVE_HOT_CACHE", "data/cache/hot"))
+    parser.add_argument('--embedding-cache',
+                        default=os.environ.get("SMARTDRIVE_EMBEDDING_CACHE", "data/cache/embeddings"))
+    parser.add_argument('--no-embeddings', action='store_true', help="Só o cache quente das bases")
+    args = parser.parse_args()
+
+    folder_names = {folder: name for name, folder in file_options.items()}
+    dataset_names = [folder_names.get(name, name) for name in args.datasets]
+    unknown = [name for name in dataset_names if name not in file_options]
+    if unknown:
+        parser.error(f"bases desconhecidas: {', '.join(unknown)}")
+    # A base padrão primeiro: é a que o primeiro visitante abre
+    dataset_names.sort(key=lambda name: name != DEFAULT_DATASET)
+
+    start = time.perf_counter()
+    embedding_cache = EmbeddingCache(args.embedding_cache)
+    loaded = run_parallel(
+        lambda name: load_view(name, args.data_path, args.hot_cache, embedding_cache), dataset_names
+    )
+    print(f"📦 Bases carregadas em {time.perf_counter() - start:.1f} s")
+    for name, view in loaded.items():
+        if view is None:
+            print(f"   ⚠️ {name}: sem dados em {args.data_path}")
+        else:
+            print(f"   ✅ {name}: {view['rows']} viagens em {view['seconds']:.2f} s")
+
+    if not args.no_embeddings:
+        for name, view in loaded.items():
+            if view is None or view['prepared'] is None:
+                continue
+            if view['cached']:
+                print(f"   ♻️ {name}: embedding da visão padrão já estava no cache")
+                continue
+            embedding_start = time.perf_counter()
+            # Mesmos checkpoints da fila de jobs: o app encontra o resultado que ele próprio geraria
+            for embedding in embedding_steps(
+                view['prepared']['features'], DEFAULT_VIEW['method'], view['prepared']['perplexity'],
+                DEFAULT_VIEW['random_state'], n_checkpoints=3
+            ):
+                pass
+            embedding_cache.put(view['cache_key'], embedding)
+            print(f"   🧭 {name}: embedding de {len(embedding)} pontos em "
+                  f"{time.perf_counter() - embedding_start:.1f} s")
+
+    print(f"🔥 Caches prontos em {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
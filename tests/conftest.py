@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do app ficam em src/ (o projeto não é instalado como pacote)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
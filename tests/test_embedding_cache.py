@@ -0,0 +1,23 @@
+"""Cache de embeddings compartilhado entre processos."""
+import numpy as np
+
+from smartdrive import embedding_cache as cache_module
+from smartdrive.embedding_cache import EmbeddingCache
+
+
+def test_disk_hit_survives_eviction_after_load(tmp_path, monkeypatch):
+    embedding = np.arange(6, dtype=np.float32).reshape(3, 2)
+    EmbeddingCache(str(tmp_path)).put('chave', embedding)
+    cache = EmbeddingCache(str(tmp_path))
+
+    # Outro processo remove o arquivo logo depois da leitura (antes do utime)
+    load = np.load
+
+    def load_then_evict(path, *args, **kwargs):
+        stored = load(path, *args, **kwargs)
+        cache_module.os.remove(path)
+        return stored
+
+    monkeypatch.setattr(cache_module.np, 'load', load_then_evict)
+    np.testing.assert_array_equal(cache.get('chave'), embedding)
+    assert cache.stats['disk_hits'] == 1
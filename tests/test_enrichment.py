@@ -0,0 +1,157 @@
+"""Paridade de ``enrich_trips`` (colunar) com as funções linha a linha."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartdrive import enrichment
+from smartdrive.enrichment import (
+    CRITICAL_EVENT_COLUMNS,
+    TIME_EVENT_COLUMNS,
+    classify_fuel_efficiency,
+    classify_vehicle_type,
+    enrich_trips,
+    get_expected_consumption,
+    identify_dominant_event_from_columns,
+)
+
+ENRICHED_COLUMNS = ['vehicle_type', 'expected_consumption', 'efficiency_class', 'dominant_event']
+
+# Placas com consumo esperado nulo, NaN, zero e negativo, além de casos normais
+VEHICLE_INFO = {
+    'AAA0001': {'porte': 'Extra Pesado', 'consumo_esperado': 3.0},
+    'AAA0002': {'porte': 'Médio', 'consumo_esperado': 6.5},
+    'AAA0003': {'porte': 'Desconhecido', 'consumo_esperado': None},
+    'AAA0004': {'porte': 'Leve', 'consumo_esperado': np.nan},
+    'AAA0005': {'porte': 'Leve', 'consumo_esperado': 0.0},
+    'AAA0006': {'porte': 'Médio', 'consumo_esperado': -2.0},
+}
+
+
+def enrich_rowwise(df):
+    """Caminho de referência: as funções linha a linha via apply"""
+    # Em object: o apply de uma categórica pula os nulos sem chamar a função
+    plates = df['plate'].astype(object)
+    df['vehicle_type'] = plates.apply(classify_vehicle_type).astype(object)
+    df['expected_consumption'] = plates.apply(get_expected_consumption).astype(float)
+    df['efficiency_class'] = df.apply(
+        lambda row: classify_fuel_efficiency(row['fuel_efficiency'], row['expected_consumption']),
+        axis=1
+    )
+    df['dominant_event'] = df.apply(identify_dominant_event_from_columns, axis=1)
+    return df
+
+
+def assert_parity(df, vehicle_info, monkeypatch):
+    """enrich_trips e o caminho linha a linha geram as mesmas colunas"""
+    monkeypatch.setattr(enrichment, 'plate_to_vehicle_info', vehicle_info)
+    expected = enrich_rowwise(df.copy())
+    actual = enrich_trips(df.copy(), vehicle_info)
+    for column in ENRICHED_COLUMNS:
+        pd.testing.assert_series_equal(
+            actual[column], expected[column], check_dtype=False, check_categorical=False, obj=column
+        )
+    return actual
+
+
+def make_trips(plates, fuel_efficiency, times=None, events=None):
+    """Viagens com as colunas de tempo e de eventos (zeradas quando não informadas)"""
+    n_rows = len(plates)
+    data = {'plate': plates, 'fuel_efficiency': np.asarray(fuel_efficiency, dtype=float)}
+    for column in TIME_EVENT_COLUMNS.values():
+        data[column] = np.zeros(n_rows)
+    for column in CRITICAL_EVENT_COLUMNS:
+        data[column] = np.zeros(n_rows)
+    for column, values in {**(times or {}), **(events or {})}.items():
+        data[column] = np.asarray(values, dtype=float)
+    return pd.DataFrame(data)
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_plate_lookups_and_efficiency_classes(categorical, monkeypatch):
+    plates = list(VEHICLE_INFO) + ['ZZZ9999', None]
+    rows = [(plate, efficiency) for plate in plates for efficiency in [np.nan, -1.0, 0.0, 1.0, 2.5, 3.0, 7.0]]
+    plate_column = [plate for plate, _ in rows]
+    if categorical:
+        plate_column = pd.Categorical(plate_column, categories=list(VEHICLE_INFO) + ['ZZZ9999'])
+    df = make_trips(plate_column, [efficiency for _, efficiency in rows])
+
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+
+    unknown = actual['plate'].astype(object).isin(['ZZZ9999']) | actual['plate'].isna()
+    assert (actual.loc[unknown, 'vehicle_type'] == 'Desconhecido').all()
+    assert actual.loc[unknown, 'expected_consumption'].isna().all()
+    assert set(actual.loc[actual['fuel_efficiency'].isna() | (actual['fuel_efficiency'] <= 0),
+                          'efficiency_class']) == {'Inválido'}
+
+
+def test_invalid_expected_consumption_is_unknown(monkeypatch):
+    # Consumo esperado nulo, NaN, zero ou negativo: sem referência para a classe
+    df = make_trips(['AAA0003', 'AAA0004', 'AAA0005', 'AAA0006'], [3.0] * 4)
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert set(actual['efficiency_class']) == {'Desconhecido'}
+
+
+def test_efficiency_thresholds(monkeypatch):
+    # 3.0 km/L esperado: 79%, 80%, 99% e 100% nas bordas das classes
+    df = make_trips(['AAA0001'] * 4, [2.37, 2.4, 2.97, 3.0])
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert list(actual['efficiency_class']) == [
+        'Baixa Eficiência', 'Média Eficiência', 'Média Eficiência', 'Alta Eficiência'
+    ]
+
+
+def test_zero_and_nan_time_rows(monkeypatch):
+    times = {
+        'movementTime': [0, np.nan, -5, 0],
+        'stoppedTime': [0, np.nan, 0, np.nan],
+        'flatTime': [0, np.nan, np.nan, 10],
+    }
+    df = make_trips(['AAA0001'] * 4, [3.0] * 4, times=times)
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert list(actual['dominant_event']) == ['Desconhecido', 'Desconhecido', 'Desconhecido', 'Plano']
+
+
+def test_nan_event_rows_fall_back_to_times(monkeypatch):
+    events = {column: [np.nan, 0] for column in CRITICAL_EVENT_COLUMNS}
+    df = make_trips(['AAA0002'] * 2, [6.0] * 2, times={'stoppedTime': [30, 40]}, events=events)
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert list(actual['dominant_event']) == ['Parado', 'Parado']
+
+
+def test_ties_keep_the_first_column(monkeypatch):
+    # Linhas 0-1: empate entre eventos críticos; linhas 2-3: empate entre tempos
+    events = {
+        'event_ARRANCADA BRUSCA': [2, 0, 0, 0],
+        'event_EXCESSO DE ROTAÇÃO': [2, 1, 0, 0],
+        'event_FORÇA G LATERAL FRACA': [2, 1, 0, 0],
+    }
+    times = {
+        'movementTime': [50, 50, 5, 0],
+        'stoppedTime': [0, 0, 10, 7],
+        'ascendingTime': [0, 0, 10, 7],
+        'flatTime': [0, 0, 3, 7],
+    }
+    df = make_trips(['AAA0001'] * 4, [3.0] * 4, times=times, events=events)
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert list(actual['dominant_event']) == ['ARRANCADA BRUSCA', 'EXCESSO DE ROTAÇÃO', 'Parado', 'Parado']
+
+
+def test_missing_event_columns(monkeypatch):
+    df = make_trips(['AAA0001', 'ZZZ9999'], [3.0, 1.0], times={'descendingTime': [4, 0]})
+    df = df.drop(columns=CRITICAL_EVENT_COLUMNS)
+    actual = assert_parity(df, VEHICLE_INFO, monkeypatch)
+    assert list(actual['dominant_event']) == ['Descida', 'Desconhecido']
+
+
+def test_random_trips_with_app_mapping(monkeypatch):
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    plates = list(enrichment.plate_to_vehicle_info) + ['XXX0000', None]
+    df = make_trips(
+        [plates[i] for i in rng.integers(0, len(plates), n_rows)],
+        np.where(rng.random(n_rows) < 0.05, np.nan, rng.gamma(2.0, 2.0, n_rows)),
+        times={column: rng.integers(0, 4, n_rows) * 100 for column in TIME_EVENT_COLUMNS.values()},
+        events={column: rng.integers(0, 3, n_rows) * (rng.random(n_rows) < 0.2)
+                for column in CRITICAL_EVENT_COLUMNS}
+    )
+    assert_parity(df, enrichment.plate_to_vehicle_info, monkeypatch)